@@ -1 +1,2 @@
 from clairvoyance.cli import cli  # noqa
+from clairvoyance.scanner import Scanner  # noqa
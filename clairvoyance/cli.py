@@ -1,20 +1,38 @@
 import asyncio
+import copy
 import json
 import logging
 import re
 import sys
-from pathlib import Path
-from typing import Dict, List, Optional
+import time
+from typing import Any, Dict, List, Optional, Sequence
 
-from clairvoyance import graphql, oracle
-from clairvoyance.client import Client
+from clairvoyance import graphql
+from clairvoyance.client import Client, Limits
 from clairvoyance.config import Config
 from clairvoyance.entities import GraphQLPrimitive
-from clairvoyance.entities.context import client, logger_ctx
+from clairvoyance.entities.context import client, config, knowledge, logger_ctx
+from clairvoyance.knowledge import KnowledgeBase
+from clairvoyance.pool import Pool, load_credentials, load_proxies
+from clairvoyance.scanner import Scanner
+from clairvoyance.server import serve
 from clairvoyance.utils import parse_args, setup_logger
+from clairvoyance.wordlist import (
+    CandidateModel,
+    CompiledWordlist,
+    Shard,
+    Wordlist,
+    compile_wordlist,
+    learn_candidates,
+    learn_frequencies,
+    load_default_wordlist,
+    open_wordlist,
+    rank,
+)
+from clairvoyance.workqueue import WorkQueue, work
 
 
-def setup_context(
+def setup_context(  # pylint: disable=too-many-arguments
     url: str,
     logger: logging.Logger,
     headers: Optional[Dict[str, str]] = None,
@@ -23,6 +41,13 @@ def setup_context(
     max_retries: Optional[int] = None,
     backoff: Optional[int] = None,
     disable_ssl_verify: Optional[bool] = None,
+    knowledge_base: Optional[str] = None,
+    knowledge_ttl: Optional[float] = None,
+    limits: Optional[List[asyncio.Semaphore]] = None,
+    proxies: Optional[Pool[str]] = None,
+    credentials: Optional[Pool[Dict[str, str]]] = None,
+    keepalive_timeout: Optional[float] = None,
+    dns_ttl: Optional[int] = None,
 ) -> None:
     """Initialize objects and freeze them into the context."""
 
@@ -35,20 +60,21 @@ def setup_context(
         max_retries=max_retries,
         backoff=backoff,
         disable_ssl_verify=disable_ssl_verify,
+        limits=limits,
+        proxies=proxies,
+        credentials=credentials,
+        keepalive_timeout=keepalive_timeout,
+        dns_ttl=dns_ttl,
     )
     logger_ctx.set(logger)
+    if knowledge_base:
+        KnowledgeBase(knowledge_base, url, ttl=knowledge_ttl)
 
 
-def load_default_wordlist() -> List[str]:
-    wl = Path(__file__).parent / "wordlist.txt"
-    with open(wl, "r", encoding="utf-8") as f:
-        return [w.strip() for w in f.readlines() if w.strip()]
-
-
-async def blind_introspection(  # pylint: disable=too-many-arguments
+async def blind_introspection(  # pylint: disable=too-many-arguments, too-many-locals
     url: str,
     logger: logging.Logger,
-    wordlist: List[str],
+    wordlist: Sequence[str],
     concurrent_requests: Optional[int] = None,
     headers: Optional[Dict[str, str]] = None,
     input_document: Optional[str] = None,
@@ -58,10 +84,29 @@ async def blind_introspection(  # pylint: disable=too-many-arguments
     max_retries: Optional[int] = None,
     backoff: Optional[int] = None,
     disable_ssl_verify: Optional[bool] = None,
+    enumerate_types: bool = False,
+    delta_path: Optional[str] = None,
+    knowledge_base: Optional[str] = None,
+    knowledge_ttl: Optional[float] = None,
+    knowledge_reset: bool = False,
+    corpus: Optional[List[str]] = None,
+    candidates: Optional[CandidateModel] = None,
+    limits: Optional[List[asyncio.Semaphore]] = None,
+    shard: Optional[Shard] = None,
+    queue_path: Optional[str] = None,
+    proxies: Optional[Pool[str]] = None,
+    credentials: Optional[Pool[Dict[str, str]]] = None,
+    keepalive_timeout: Optional[float] = None,
+    dns_ttl: Optional[int] = None,
+    warmup: int = 0,
 ) -> str:
     wordlist = wordlist or load_default_wordlist()
     assert wordlist, "No wordlist provided"
 
+    # Fields seen along with a type's name or its other fields elsewhere are tried first on it
+    if candidates is None:
+        candidates = learn_candidates(corpus or [])
+
     setup_context(
         url,
         logger=logger,
@@ -71,7 +116,27 @@ async def blind_introspection(  # pylint: disable=too-many-arguments
         max_retries=max_retries,
         backoff=backoff,
         disable_ssl_verify=disable_ssl_verify,
+        knowledge_base=knowledge_base,
+        knowledge_ttl=knowledge_ttl,
+        limits=limits,
+        proxies=proxies,
+        credentials=credentials,
+        keepalive_timeout=keepalive_timeout,
+        dns_ttl=dns_ttl,
     )
+    scanner = Scanner(
+        client(),
+        config(),
+        wordlist=wordlist,
+        logger=logger,
+        knowledge=knowledge(),
+        candidates=candidates,
+    )
+
+    kb = knowledge()
+    if kb and knowledge_reset:
+        logger.info(f"Forgetting what {knowledge_base} knows about {url}")
+        kb.reset()
 
     logger.info(f"Starting blind introspection on {url}...")
 
@@ -80,36 +145,150 @@ async def blind_introspection(  # pylint: disable=too-many-arguments
         with open(input_schema_path, "r", encoding="utf-8") as f:
             input_schema = json.load(f)
 
-    input_document = input_document or "query { FUZZ }"
-    ignored = set(e.value for e in GraphQLPrimitive)
-    iterations = 1
-    while True:
-        logger.info(f"Iteration {iterations}")
-        iterations += 1
-        schema = await oracle.clairvoyance(
-            wordlist,
-            input_document=input_document,
-            input_schema=input_schema,
+    if delta_path:
+        assert input_schema, "--delta needs the previous output as --input-schema"
+        previous = graphql.Schema(schema=input_schema)
+
+    queue = None
+    if queue_path:
+        assert not (input_schema or shard), "--queue starts from scratch, unsharded"
+        queue = WorkQueue(queue_path)
+        logger.info(f"Working on {queue_path} as {queue.worker}")
+
+    try:
+        if warmup:
+            opened = await client().warm_up(warmup)
+            logger.info(f"Opened {opened} connections to {url} ahead of the scan")
+        if queue:
+            s = await work(
+                scanner,
+                queue,
+                input_document,
+                enumerate_types=enumerate_types,
+                output_path=output_path,
+            )
+        else:
+            s = await scanner.scan(
+                input_document,
+                input_schema,
+                enumerate_types=enumerate_types,
+                verify=bool(delta_path),
+                output_path=output_path,
+                shard=shard,
+            )
+    finally:
+        await client().close()
+        if kb:
+            kb.close()
+        if queue:
+            queue.close()
+
+    if delta_path:
+        delta = graphql.diff_schemas(previous, s)
+        with open(delta_path, "w", encoding="utf-8") as f:
+            json.dump(delta, f, indent=4, sort_keys=True)
+        logger.info(
+            f"Added {sum(len(v) for v in delta['added'].values())} and removed {sum(len(v) for v in delta['removed'].values())} names, see {delta_path}"
         )
 
-        if output_path:
-            with open(output_path, "w", encoding="utf-8") as f:
-                f.write(schema)
+    logger.info("Blind introspection complete.")
+    return repr(s)
+
 
-        input_schema = json.loads(schema)
-        s = graphql.Schema(schema=input_schema)
+def read_targets(path: str) -> List[Dict[str, Any]]:
+    """Read a file of targets, one JSON object per line with a `url` and an `output`, and optionally `headers`, `document`, `input_schema` and `delta`."""
 
-        _next = s.get_type_without_fields(ignored)
-        ignored.add(_next)
+    targets = []
+    with open(path, "r", encoding="utf-8") as f:
+        for i, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            target = json.loads(line)
+            if (
+                not isinstance(target, dict)
+                or not target.get("url")
+                or not target.get("output")
+            ):
+                raise ValueError(f"{path}:{i}: a target needs a url and an output")
+            targets.append(target)
+    return targets
 
-        if _next:
-            input_document = s.convert_path_to_document(s.get_path_from_root(_next))
-        else:
-            break
 
-    logger.info("Blind introspection complete.")
-    await client().close()
-    return schema
+async def scan_targets(  # pylint: disable=too-many-arguments
+    targets: List[Dict[str, Any]],
+    logger: logging.Logger,
+    wordlist: Sequence[str],
+    headers: Optional[Dict[str, str]] = None,
+    input_document: Optional[str] = None,
+    host_concurrent_requests: Optional[int] = None,
+    total_concurrent_requests: Optional[int] = None,
+    corpus: Optional[List[str]] = None,
+    **kwargs: Any,
+) -> None:
+    """Run blind introspection on every target at once, sharing the wordlist.
+
+    Each target runs in a task of its own, so that the client, config and knowledge base it sets in the context stay its own. Requests are limited per
+    host and in total on top of the `concurrent_requests` of each target. Targets add their own headers to `headers`, and may replace `input_document`.
+    """
+
+    wordlist = wordlist or load_default_wordlist()
+    corpus_candidates = learn_candidates(corpus or [])
+    limits = Limits(host_concurrent_requests, total_concurrent_requests)
+
+    async def __scan(target: Dict[str, Any]) -> None:
+        try:
+            await blind_introspection(
+                target["url"],
+                logger=logger,
+                wordlist=wordlist,
+                headers={**(headers or {}), **target.get("headers", {})},
+                input_document=target.get("document", input_document),
+                input_schema_path=target.get("input_schema"),
+                output_path=target["output"],
+                delta_path=target.get("delta"),
+                candidates=copy.deepcopy(corpus_candidates),
+                limits=limits.of(target["url"]),
+                **kwargs,
+            )
+        except Exception as e:  # pylint: disable=broad-except
+            # One target going wrong mustn't stop the others
+            logger.error(f"Blind introspection on {target['url']} failed: {e!r}")
+
+    started = time.monotonic()
+    await asyncio.gather(*[__scan(target) for target in targets])
+    logger.info(
+        f"Scanned {len(targets)} targets in {time.monotonic() - started:.1f} seconds"
+    )
+
+
+def merge_outputs(paths: List[str], output_path: Optional[str] = None) -> None:
+    """Merge the schemas of several outputs, such as the ones of the shards of a scan, into one written to `output_path` or stdout."""
+
+    schemas = []
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            schemas.append(graphql.Schema(schema=json.load(f)))
+
+    merged, conflicts = graphql.merge_schemas(schemas)
+    for conflict in conflicts:
+        logging.warning(f"Conflicting {conflict}, keeping the first")
+    logging.info(f"Merged {len(paths)} schemas with {len(conflicts)} conflicts")
+    # Types found by a shard other than theirs are left to the next round
+    unexplored = (
+        merged.get_types_without_fields(set(e.value for e in GraphQLPrimitive))
+        + merged.get_input_types_without_values()
+    )
+    if unexplored:
+        logging.info(
+            f"{len(unexplored)} types are yet to be explored, run another round of shards with the merged schema as --input-schema"
+        )
+
+    schema = repr(merged)
+    if output_path:
+        with open(output_path, "w", encoding="utf-8") as f:
+            f.write(schema)
+    else:
+        print(schema)
 
 
 def cli(argv: Optional[List[str]] = None) -> None:
@@ -119,41 +298,109 @@ def cli(argv: Optional[List[str]] = None) -> None:
     args = parse_args(argv)
     setup_logger(args.verbose)
 
+    if args.merge:
+        merge_outputs(args.merge, args.output)
+        return
+
     headers = {}
     for h in args.headers:
         key, value = h.split(": ", 1)
         headers[key] = value
 
-    wordlist = []
+    wordlist: Wordlist = Wordlist()
     if args.wordlist:
-        wordlist = [w.strip() for w in args.wordlist.readlines() if w.strip()]
-        # de-dupe the wordlist.
-        wordlist = list(set(wordlist))
+        # de-duped, keeping its order, unless compiled already.
+        wordlist = open_wordlist(args.wordlist)
 
     # remove wordlist items that don't conform to graphQL regex github-issue #11
-    if args.validate:
-        wordlist_parsed = [
+    if args.validate and not isinstance(wordlist, CompiledWordlist):
+        wordlist_parsed = Wordlist(
             w for w in wordlist if re.match(r"[_A-Za-z][_0-9A-Za-z]*", w)
-        ]
+        )
         logging.info(
             f"Removed {len(wordlist) - len(wordlist_parsed)} items from wordlist, to conform to name regex. "
             f"https://spec.graphql.org/June2018/#sec-Names"
         )
         wordlist = wordlist_parsed
 
-    asyncio.run(
-        blind_introspection(
-            args.url,
+    if args.corpus and not isinstance(wordlist, CompiledWordlist):
+        # Likely names first, so that most hits come in the first buckets; compiled wordlists were ranked when compiled
+        wordlist = Wordlist(
+            rank(wordlist or load_default_wordlist(), learn_frequencies(args.corpus))
+        )
+
+    if args.compile_wordlist:
+        count = compile_wordlist(
+            wordlist or load_default_wordlist(), args.compile_wordlist
+        )
+        wordlist.close()
+        logging.info(f"Compiled {count} words into {args.compile_wordlist}")
+        if not (args.url or args.targets or args.serve):
+            return
+        wordlist = CompiledWordlist(args.compile_wordlist)
+
+    options: Dict[str, Any] = {
+        "concurrent_requests": args.concurrent_requests,
+        "proxy": args.proxy,
+        "proxies": (
+            load_proxies(args.proxies, args.proxy_policy) if args.proxies else None
+        ),
+        "credentials": (
+            load_credentials(args.credentials, args.credential_policy)
+            if args.credentials
+            else None
+        ),
+        "max_retries": args.max_retries,
+        "keepalive_timeout": args.keepalive,
+        "dns_ttl": args.dns_ttl,
+        "warmup": args.warmup,
+        "backoff": args.backoff,
+        "disable_ssl_verify": args.no_ssl,
+        "enumerate_types": args.enumerate_types,
+        "knowledge_base": args.kb,
+        "knowledge_ttl": args.kb_ttl * 86400,
+        "knowledge_reset": args.kb_reset,
+        "corpus": args.corpus,
+    }
+    if args.serve:
+        serve(
+            args.serve,
             logger=logging.getLogger("clairvoyance"),
-            concurrent_requests=args.concurrent_requests,
+            wordlist=wordlist,
+            jobs=args.jobs,
             headers=headers,
             input_document=args.document,
-            input_schema_path=args.input_schema,
-            output_path=args.output,
-            wordlist=wordlist,
-            proxy=args.proxy,
-            max_retries=args.max_retries,
-            backoff=args.backoff,
-            disable_ssl_verify=args.no_ssl,
+            host_concurrent_requests=args.host_concurrent_requests,
+            total_concurrent_requests=args.total_concurrent_requests,
+            **options,
         )
-    )
+    elif args.targets:
+        asyncio.run(
+            scan_targets(
+                read_targets(args.targets),
+                logger=logging.getLogger("clairvoyance"),
+                wordlist=wordlist,
+                headers=headers,
+                input_document=args.document,
+                host_concurrent_requests=args.host_concurrent_requests,
+                total_concurrent_requests=args.total_concurrent_requests,
+                **options,
+            )
+        )
+    else:
+        asyncio.run(
+            blind_introspection(
+                args.url,
+                logger=logging.getLogger("clairvoyance"),
+                headers=headers,
+                input_document=args.document,
+                input_schema_path=args.input_schema,
+                output_path=args.output,
+                wordlist=wordlist,
+                delta_path=args.delta,
+                shard=args.shard,
+                queue_path=args.queue,
+                **options,
+            )
+        )
+    wordlist.close()
@@ -1,15 +1,50 @@
 import asyncio
+import contextlib
 import json
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
 
 import aiohttp
 
+from clairvoyance.connections import ConnectionStats, open_session, warm_up
 from clairvoyance.entities.context import client_ctx, log
 from clairvoyance.entities.interfaces import IClient
+from clairvoyance.pool import Member, Pool
 
 
-class Client(IClient):  # pylint: disable=too-many-instance-attributes
+class Limits:  # pylint: disable=too-few-public-methods
+    """Requests in flight to each host and in total, shared by the clients of many targets."""
+
     def __init__(
+        self,
+        host_concurrent_requests: Optional[int] = None,
+        total_concurrent_requests: Optional[int] = None,
+    ) -> None:
+        self.host_concurrent_requests = host_concurrent_requests or 50
+        self.total_concurrent_requests = total_concurrent_requests or 200
+        self._total = asyncio.Semaphore(self.total_concurrent_requests)
+        self._hosts: Dict[str, asyncio.Semaphore] = {}
+
+    def of(self, url: str) -> List[asyncio.Semaphore]:
+        """The limits for a client of `url`."""
+
+        host = urlparse(url).netloc
+        if host not in self._hosts:
+            self._hosts[host] = asyncio.Semaphore(self.host_concurrent_requests)
+        return [self._hosts[host], self._total]
+
+
+def _retry_after(response: aiohttp.ClientResponse) -> Optional[float]:
+    """The seconds to wait that the response asks for, if it does in seconds."""
+
+    try:
+        return float(response.headers.get("Retry-After", ""))
+    except ValueError:
+        return None
+
+
+class Client(IClient):  # pylint: disable=too-many-instance-attributes
+    def __init__(  # pylint: disable=too-many-arguments
         self,
         url: str,
         max_retries: Optional[int] = None,
@@ -18,14 +53,32 @@ class Client(IClient):  # pylint: disable=too-many-instance-attributes
         proxy: Optional[str] = None,
         backoff: Optional[int] = None,
         disable_ssl_verify: Optional[bool] = None,
+        limits: Optional[List[asyncio.Semaphore]] = None,
+        session: Optional[aiohttp.ClientSession] = None,
+        proxies: Optional[Pool[str]] = None,
+        credentials: Optional[Pool[Dict[str, str]]] = None,
+        keepalive_timeout: Optional[float] = None,
+        dns_ttl: Optional[int] = None,
     ) -> None:
         self._url = url
-        self._session = None
+        # A session given is shared with other clients, and stays open when this one closes
+        self._session = session
+        self._owns_session = session is None
+        self._keepalive_timeout = keepalive_timeout
+        self._dns_ttl = dns_ttl
+        self.stats = ConnectionStats() if self._owns_session else None
 
         self._headers = headers or {}
         self._max_retries = max_retries or 3
-        self._semaphore = asyncio.Semaphore(concurrent_requests or 50)
+        self._concurrent_requests = concurrent_requests or 50
+        self._semaphore = asyncio.Semaphore(self._concurrent_requests)
+        # Shared with the clients of other targets, such as the ones on the same host
+        self._limits = limits or []
         self.proxy = proxy
+        # Spread over by requests, in place of `proxy`
+        self._proxies = proxies
+        # Headers added to `headers`, in turns
+        self._credentials = credentials
         self.backoff = backoff
         self._backoff_semaphore = asyncio.Lock()
         self.disable_ssl_verify = disable_ssl_verify or False
@@ -37,58 +90,149 @@ class Client(IClient):  # pylint: disable=too-many-instance-attributes
         document: Optional[str],
         retries: int = 0,
     ) -> Dict:
-        """Post a GraphQL document to the server and return the response as JSON."""
-
-        if retries >= self._max_retries:
-            return {}
-
-        async with self._semaphore:
-            if not self._session:
-                connector = aiohttp.TCPConnector(ssl=not self.disable_ssl_verify)
-                self._session = aiohttp.ClientSession(
-                    headers=self._headers, connector=connector
-                )
-
-            # Translate an existing document into a GraphQL request.
-            gql_document = {"query": document} if document else None
-            try:
-                response = await self._session.post(
-                    self._url,
-                    json=gql_document,
-                    proxy=self.proxy,
-                )
-
-                if response.status >= 500:
-                    log().warning(f"Received status code {response.status}")
-                    return await self.post(document, retries + 1)
-
+        """Post a GraphQL document to the server and return the response as JSON.
+
+        A throttled request goes to other proxies or credentials, and counts as a retry once there were as many as members in the pools.
+        """
+
+        session = self._open()
+        # Translate an existing document into a GraphQL request.
+        gql_document = {"query": document} if document else None
+        throttles = 0
+        while retries < self._max_retries:
+            retry = retries + 1
+            async with self._semaphore:
+                proxy: Optional[Member[str]] = None
+                credential: Optional[Member[Dict[str, str]]] = None
                 try:
-                    return await response.json(content_type=None)
-                except json.decoder.JSONDecodeError as e:
+                    async with contextlib.AsyncExitStack() as stack:
+                        for limit in self._limits:
+                            await stack.enter_async_context(limit)
+                        if self._proxies:
+                            proxy = await stack.enter_async_context(self._proxies.use())
+                        if self._credentials:
+                            credential = await stack.enter_async_context(
+                                self._credentials.use()
+                            )
+                        response = await session.post(
+                            self._url,
+                            json=gql_document,
+                            headers=(
+                                {**self._headers, **credential.value}
+                                if credential
+                                else self._headers
+                            ),
+                            proxy=proxy.value if proxy else self.proxy,
+                        )
+
+                    throttled, rejected = self._report(response, proxy, credential)
+                    if throttled or rejected:
+                        # Other proxies or credentials take the request; rejections count as retries, in case every credential is rejected, and so
+                        # do throttles once every member could have been parked
+                        response.release()
+                        throttles += throttled
+                        if not rejected and throttles <= self._members():
+                            retry = retries
+                    elif response.status >= 500:
+                        log().warning(f"Received status code {response.status}")
+                        retries += 1
+                        continue
+                    else:
+                        try:
+                            return await response.json(content_type=None)
+                        except json.decoder.JSONDecodeError as e:
+                            log().warning(
+                                f"JSON decode error while decoding response from {self._url} (status code: {response.status}): {e}"
+                            )
+                            log().debug(
+                                "[Hint] Endpoint might require authentication, or, site is behind something like Cloudflare and is rate limiting you. "
+                                "You can pass headers and cookies via -H option. Consult "
+                                "https://github.com/nikitastupin/clairvoyance/blob/main/troubleshooting.md for more information."
+                            )
+
+                except (
+                    aiohttp.ClientConnectionError,
+                    aiohttp.ClientPayloadError,
+                    asyncio.TimeoutError,
+                ) as e:
                     log().warning(
-                        f"JSON decode error while decoding response from {self._url} (status code: {response.status}): {e}"
-                    )
-                    log().debug(
-                        "[Hint] Endpoint might require authentication, or, site is behind something like Cloudflare and is rate limiting you. "
-                        "You can pass headers and cookies via -H option. Consult "
-                        "https://github.com/nikitastupin/clairvoyance/blob/main/troubleshooting.md for more information."
+                        f"Connection error while POSTing to {self._url}{f' through {proxy}' if proxy else ''}: {e}"
                     )
-
-            except (
-                aiohttp.ClientConnectionError,
-                aiohttp.ClientPayloadError,
-                asyncio.TimeoutError,
-            ) as e:
-                log().warning(f"Connection error while POSTing to {self._url}: {e}")
-
-            if self.backoff:
-                async with self._backoff_semaphore:
-                    delay = 0.5 * self.backoff**retries
-                    log().debug(f"Waiting for backoff {delay} seconds.")
-                    await asyncio.sleep(delay)
-
-        return await self.post(document, retries + 1)
+                    if self._proxies and proxy:
+                        self._proxies.failed(proxy)
+
+                if self.backoff and retry > retries:
+                    async with self._backoff_semaphore:
+                        delay = 0.5 * self.backoff**retries
+                        log().debug(f"Waiting for backoff {delay} seconds.")
+                        await asyncio.sleep(delay)
+
+            retries = retry
+
+        return {}
+
+    def _members(self) -> int:
+        """How many proxies and credentials requests are spread over."""
+
+        return sum(
+            len(pool.members) for pool in (self._proxies, self._credentials) if pool
+        )
+
+    def _open(self) -> aiohttp.ClientSession:
+        """The session of the client, made on first use in the loop requests are sent from."""
+
+        if not self._session:
+            # As many connections as requests in flight, so that none waits for a connection or closes one it leaves
+            self._session = open_session(
+                self._concurrent_requests,
+                keepalive_timeout=self._keepalive_timeout,
+                dns_ttl=self._dns_ttl,
+                disable_ssl_verify=self.disable_ssl_verify,
+                stats=self.stats,
+            )
+        return self._session
+
+    async def warm_up(self, count: int) -> int:
+        proxies = (
+            [m.value for m in self._proxies.members] if self._proxies else [self.proxy]
+        )
+        return await warm_up(
+            self._open(),
+            self._url,
+            min(count, self._concurrent_requests),
+            headers=self._headers,
+            proxies=proxies,
+        )
+
+    def _report(
+        self,
+        response: aiohttp.ClientResponse,
+        proxy: Optional[Member[str]],
+        credential: Optional[Member[Dict[str, str]]],
+    ) -> Tuple[bool, bool]:
+        """Tell the pools how the proxy and the credential of a response did, and whether it was throttled or rejected."""
+
+        # Which of the proxy or the credential hit a rate limit can't be told
+        throttled = response.status == 429 and bool(proxy or credential)
+        rejected = response.status == 401 and bool(credential)
+        if self._proxies and proxy:
+            if throttled:
+                self._proxies.throttled(proxy, _retry_after(response))
+            elif response.status >= 500:
+                self._proxies.failed(proxy)
+            else:
+                self._proxies.succeeded(proxy)
+        if self._credentials and credential:
+            if throttled:
+                self._credentials.throttled(credential, _retry_after(response))
+            elif rejected:
+                log().warning(f"{credential} was rejected")
+                self._credentials.rejected(credential)
+            elif response.status < 500:
+                self._credentials.succeeded(credential)
+        return throttled, rejected
 
     async def close(self) -> None:
-        if self._session:
+        if self._session and self._owns_session:
             await self._session.close()
+            log().info(f"Sent {self.stats} to {self._url}")
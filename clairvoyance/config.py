@@ -1,3 +1,6 @@
+import collections
+from typing import Counter, Optional
+
 from clairvoyance.entities.context import config_ctx
 from clairvoyance.entities.interfaces import IConfig
 
@@ -7,5 +10,9 @@ class Config(IConfig):
     def __init__(self) -> None:
         super().__init__()
         self._bucket_size: int = 64
+        self._alias_batch_size: int = 8
+        self._type_batch_size: int = 8
+        self._arg_typeref_hits: Counter[Optional[str]] = collections.Counter()
+        self._max_errors: Optional[int] = None
 
         config_ctx.set(self)
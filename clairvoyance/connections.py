@@ -0,0 +1,101 @@
+"""Sessions whose connections are pooled, kept alive and opened ahead of the requests that need them."""
+
+import asyncio
+from typing import Any, Dict, Optional, Sequence
+
+import aiohttp
+
+from clairvoyance.entities.context import log
+
+# aiohttp's defaults
+KEEPALIVE_TIMEOUT = 15.0
+DNS_TTL = 10
+
+
+class ConnectionStats:
+    """How many connections a session opened, and how many requests went over one already open, as aiohttp traces them."""
+
+    def __init__(self) -> None:
+        self.opened = 0
+        self.reused = 0
+
+    def trace_config(self) -> aiohttp.TraceConfig:
+        async def __opened(*_: Any) -> None:
+            self.opened += 1
+
+        async def __reused(*_: Any) -> None:
+            self.reused += 1
+
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_connection_create_end.append(__opened)
+        trace_config.on_connection_reuseconn.append(__reused)
+        return trace_config
+
+    @property
+    def reuse_ratio(self) -> float:
+        requests = self.opened + self.reused
+        return self.reused / requests if requests else 0.0
+
+    def __repr__(self) -> str:
+        return f"{self.opened + self.reused} requests over {self.opened} connections ({self.reuse_ratio:.0%} reused)"
+
+
+def open_session(  # pylint: disable=too-many-arguments
+    limit: int,
+    limit_per_host: int = 0,
+    keepalive_timeout: Optional[float] = None,
+    dns_ttl: Optional[int] = None,
+    disable_ssl_verify: bool = False,
+    stats: Optional[ConnectionStats] = None,
+) -> aiohttp.ClientSession:
+    """A session with as many connections as requests may be in flight: `limit` in total and `limit_per_host` to each host, if not 0.
+
+    Idle connections are kept open for `keepalive_timeout` seconds, and hostnames resolved again after `dns_ttl` seconds, or every time with 0.
+    """
+
+    dns_ttl = DNS_TTL if dns_ttl is None else dns_ttl
+    connector = aiohttp.TCPConnector(
+        ssl=not disable_ssl_verify,
+        limit=limit,
+        limit_per_host=limit_per_host,
+        keepalive_timeout=(
+            KEEPALIVE_TIMEOUT if keepalive_timeout is None else keepalive_timeout
+        ),
+        use_dns_cache=dns_ttl > 0,
+        ttl_dns_cache=dns_ttl,
+    )
+    return aiohttp.ClientSession(
+        connector=connector, trace_configs=[stats.trace_config()] if stats else None
+    )
+
+
+async def warm_up(
+    session: aiohttp.ClientSession,
+    url: str,
+    count: int,
+    headers: Optional[Dict[str, str]] = None,
+    proxies: Sequence[Optional[str]] = (None,),
+) -> int:
+    """Open `count` connections to `url`, spread over `proxies`, and return how many could be.
+
+    Each sends `query { __typename }` at once, so that the handshakes are done before the scan and its connections are found open.
+    """
+
+    async def __open(proxy: Optional[str]) -> bool:
+        try:
+            async with session.post(
+                url,
+                json={"query": "query { __typename }"},
+                headers=headers,
+                proxy=proxy,
+            ) as response:
+                await response.read()
+            return True
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            log().debug(f"Couldn't open a connection to {url}: {e!r}")
+            return False
+
+    opened = await asyncio.gather(
+        *[__open(proxies[i % len(proxies)]) for i in range(count)]
+    )
+    return sum(opened)
@@ -0,0 +1,134 @@
+"""Documents packing several independent probes into a single request."""
+
+from typing import Any, Dict, Generic, Hashable, List, Optional, Tuple, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+
+
+class BatchDocument(Generic[K]):
+    """A GraphQL document assembled from several probes.
+
+    Every probe remembers the span of text it occupies, so that errors can be attributed back to it through their `locations`.
+    """
+
+    def __init__(self, text: str = "") -> None:
+        self._text = text
+        self._spans: List[Tuple[int, int, K]] = []
+
+    @classmethod
+    def from_template(
+        cls,
+        input_document: str,
+        selections: List[Tuple[str, K]],
+    ) -> "BatchDocument[K]":
+        """Replace `FUZZ` in the input document with the given selections, keyed by their probe."""
+
+        prefix, _, suffix = input_document.partition("FUZZ")
+
+        document: BatchDocument[K] = cls(prefix)
+        for i, (selection, key) in enumerate(selections):
+            if i:
+                document.append(" ")
+            document.append(selection, key)
+        document.append(suffix)
+
+        return document
+
+    @classmethod
+    def from_templates(
+        cls,
+        selections: List[Tuple[str, str, K]],
+    ) -> "BatchDocument[K]":
+        """Merge several input documents of the same operation into one, replacing `FUZZ` in each with its selection.
+
+        All input documents must share the header returned by `operation_header`.
+        """
+
+        header = operation_header(selections[0][0])
+        if header is None:
+            raise ValueError(f"Can't merge {selections[0][0]}")
+
+        document: BatchDocument[K] = cls(header + "{")
+        for input_document, selection, key in selections:
+            if operation_header(input_document) != header:
+                raise ValueError(
+                    f"Can't merge {input_document} into a {header} document"
+                )
+
+            body = input_document.strip()[len(header) + 1 : -1]
+            prefix, _, suffix = body.partition("FUZZ")
+            document.append(prefix)
+            document.append(selection, key)
+            document.append(suffix)
+        document.append("}")
+
+        return document
+
+    def append(
+        self,
+        text: str,
+        key: Optional[K] = None,
+    ) -> None:
+        """Append text to the document, recording its span if it belongs to a probe."""
+
+        if key is not None:
+            self._spans.append((len(self._text), len(self._text) + len(text), key))
+        self._text += text
+
+    @property
+    def keys(self) -> List[K]:
+        return list(dict.fromkeys(key for _, _, key in self._spans))
+
+    def locate(self, error: Dict[str, Any]) -> Optional[K]:
+        """Find the probe an error belongs to.
+
+        The innermost span containing one of the error locations wins. A document holding a single probe owns all of its errors.
+        """
+
+        line_starts = [0] + [i + 1 for i, c in enumerate(self._text) if c == "\n"]
+
+        for location in error.get("locations") or []:
+            try:
+                line, column = int(location["line"]), int(location["column"])
+            except (KeyError, TypeError, ValueError):
+                continue
+            if not 0 < line <= len(line_starts):
+                continue
+
+            offset = line_starts[line - 1] + column - 1
+            matching = [
+                (end - start, key)
+                for start, end, key in self._spans
+                if start <= offset < end
+            ]
+            if matching:
+                return min(matching, key=lambda m: m[0])[1]
+
+        keys = self.keys
+        if len(keys) == 1:
+            return keys[0]
+
+        return None
+
+    def __str__(self) -> str:
+        return self._text
+
+
+def operation_header(input_document: str) -> Optional[str]:
+    """The text before the selection set of a document made of a single operation, or `None` if it is made of several definitions."""
+
+    document = input_document.strip()
+    start = document.find("{")
+    if start == -1 or "FUZZ" not in document:
+        return None
+
+    depth = 0
+    for i, c in enumerate(document[start:], start):
+        if c == "{":
+            depth += 1
+        elif c == "}":
+            depth -= 1
+            if not depth:
+                return document[:start] if i == len(document) - 1 else None
+
+    return None
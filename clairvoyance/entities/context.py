@@ -1,12 +1,15 @@
 import logging
 from contextvars import ContextVar
-from typing import Callable
+from typing import Callable, Optional
 
-from clairvoyance.entities.interfaces import IClient, IConfig
+from clairvoyance.entities.interfaces import IClient, IConfig, IKnowledgeBase
 
 config_ctx: ContextVar[IConfig] = ContextVar("config")
 client_ctx: ContextVar[IClient] = ContextVar("client")
 logger_ctx: ContextVar[logging.Logger] = ContextVar("logger")
+knowledge_ctx: ContextVar[Optional[IKnowledgeBase]] = ContextVar(
+    "knowledge", default=None
+)
 
 # Quick resolve the context variables using macros.
 config: Callable[..., IConfig] = (
@@ -18,3 +21,6 @@ client: Callable[..., IClient] = (
 log: Callable[..., logging.Logger] = (
     lambda: logger_ctx.get()  # pylint: disable=unnecessary-lambda
 )
+knowledge: Callable[..., Optional[IKnowledgeBase]] = (
+    lambda: knowledge_ctx.get()  # pylint: disable=unnecessary-lambda
+)
@@ -2,18 +2,44 @@
 
 import asyncio
 from abc import ABC, abstractmethod
-from typing import Dict, Optional
+from typing import Any, Counter, Dict, Iterable, List, Optional, Set
 
 import aiohttp
 
 
 class IConfig(ABC):
     _bucket_size: int
+    _alias_batch_size: int
+    _type_batch_size: int
+    _arg_typeref_hits: Counter[Optional[str]]
+    _max_errors: Optional[int]
 
     @property
     def bucket_size(self) -> int:
         return self._bucket_size
 
+    @property
+    def alias_batch_size(self) -> int:
+        return self._alias_batch_size
+
+    @property
+    def type_batch_size(self) -> int:
+        return self._type_batch_size
+
+    @property
+    def arg_typeref_hits(self) -> Counter[Optional[str]]:
+        """How many arg typerefs each probe value yielded on this server so far."""
+        return self._arg_typeref_hits
+
+    @property
+    def max_errors(self) -> Optional[int]:
+        """How many errors the server reports before aborting validation, once it has been seen doing so."""
+        return self._max_errors
+
+    @max_errors.setter
+    def max_errors(self, value: Optional[int]) -> None:
+        self._max_errors = value
+
 
 class IClient(ABC):
     _url: str
@@ -22,6 +48,17 @@ class IClient(ABC):
 
     _session: Optional[aiohttp.ClientSession]
     _semaphore: asyncio.Semaphore
+    _limits: List[asyncio.Semaphore]
+    _concurrent_requests: int
+
+    @property
+    def url(self) -> str:
+        return self._url
+
+    @property
+    def concurrent_requests(self) -> int:
+        """How many requests can be in flight at once."""
+        return self._concurrent_requests
 
     @abstractmethod
     async def post(
@@ -31,6 +68,58 @@ class IClient(ABC):
     ) -> Dict:
         pass
 
+    async def warm_up(self, count: int) -> int:  # pylint: disable=unused-argument
+        """Open up to `count` connections ahead of the requests, and return how many were opened."""
+        return 0
+
     @abstractmethod
     async def close(self) -> None:
         pass
+
+
+class IKnowledgeBase(ABC):
+    """What earlier runs learned about an endpoint.
+
+    Names and typerefs are kept by scope: a type for its fields, `Type.field` for the args of a field, or `... on Type` for the members of an abstract
+    type.
+    """
+
+    _endpoint: str
+    _ttl: Optional[float]
+
+    @abstractmethod
+    def valid_names(self, scope: Optional[str] = None) -> Set[str]:
+        pass
+
+    @abstractmethod
+    def invalid_names(self, scope: str, names: Iterable[str]) -> Set[str]:
+        pass
+
+    @abstractmethod
+    def record_names(
+        self,
+        scope: str,
+        valid: Iterable[str],
+        invalid: Iterable[str],
+    ) -> None:
+        pass
+
+    @abstractmethod
+    def typerefs(self, scope: str) -> Dict[str, Dict[str, Any]]:
+        pass
+
+    @abstractmethod
+    def record_typeref(self, scope: str, name: str, typeref: Dict[str, Any]) -> None:
+        pass
+
+    @abstractmethod
+    def forget(self, scope: str, names: Optional[Iterable[str]] = None) -> None:
+        pass
+
+    @abstractmethod
+    def reset(self) -> None:
+        pass
+
+    @abstractmethod
+    def close(self) -> None:
+        pass
@@ -1,5 +1,6 @@
+import copy
 import json
-from typing import Any, Dict, List, Optional, Set
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
 
 from clairvoyance.entities import GraphQLPrimitive
 from clairvoyance.entities.context import log
@@ -64,23 +65,99 @@ class Schema:
         name: str,
         kind: str,
     ) -> None:
-        """Adds type to schema if it's not exists already."""
+        """Adds type to schema if it's not exists already.
+
+        A leaf type seen as a field's `SCALAR` is upgraded when an argument shows it is an `ENUM`.
+        """
 
         if name not in self.types:
             typ = Type(name=name, kind=kind)
             self.types[name] = typ
+        elif kind == GraphQLKind.ENUM and self.types[name].kind == GraphQLKind.SCALAR:
+            self.types[name].kind = kind
 
     def __repr__(self) -> str:
         """String representation of the schema."""
 
-        schema = {"data": {"__schema": self._schema}}
-
-        for t in self.types.values():
-            schema["data"]["__schema"]["types"].append(t.to_json())
+        types = [t.to_json() for t in self.types.values()]
+        schema = {"data": {"__schema": {**self._schema, "types": types}}}
 
         output = json.dumps(schema, indent=4, sort_keys=True)
         return output
 
+    def merge(self, other: "Schema") -> List[str]:
+        """Adds the types, fields, args, enum values and possible types of another schema.
+
+        Where the schemas disagree, such as on a root type, a kind or a typeref, this one is kept and the conflict is returned. Leaf types known to be
+        enums and object types known to be abstract are no conflict.
+        """
+
+        conflicts: List[str] = []
+
+        for key in ["queryType", "mutationType", "subscriptionType"]:
+            ours = self._schema[key]
+            theirs = other._schema[key]  # pylint: disable=protected-access
+            if not ours:
+                self._schema[key] = theirs
+            elif theirs and ours["name"] != theirs["name"]:
+                conflicts.append(f"{key}: {ours['name']} or {theirs['name']}")
+
+        for typ in other.types.values():
+            if typ.name not in self.types:
+                self.types[typ.name] = copy.deepcopy(typ)
+                continue
+
+            ours_type = self.types[typ.name]
+            if ours_type.kind != typ.kind:
+                upgrades = [
+                    (GraphQLKind.SCALAR, GraphQLKind.ENUM),
+                    (GraphQLKind.OBJECT, GraphQLKind.INTERFACE),
+                    (GraphQLKind.OBJECT, GraphQLKind.UNION),
+                ]
+                if (ours_type.kind, typ.kind) in upgrades:
+                    ours_type.kind = typ.kind
+                elif (typ.kind, ours_type.kind) not in upgrades:
+                    conflicts.append(f"{typ.name}: {ours_type.kind} or {typ.kind}")
+
+            fields = {f.name: f for f in ours_type.fields}
+            for field in typ.fields:
+                if field.name not in fields:
+                    ours_type.fields.append(copy.deepcopy(field))
+                    continue
+
+                ours_field = fields[field.name]
+                if ours_field.type != field.type:
+                    conflicts.append(
+                        f"{typ.name}.{field.name}: {_notation(ours_field.type)} or {_notation(field.type)}"
+                    )
+                args = {a.name: a for a in ours_field.args}
+                for arg in field.args:
+                    if arg.name not in args:
+                        ours_field.args.append(copy.deepcopy(arg))
+                    elif args[arg.name].type != arg.type:
+                        conflicts.append(
+                            f"{typ.name}.{field.name}.{arg.name}: {_notation(args[arg.name].type)} or {_notation(arg.type)}"
+                        )
+
+            ours_type.enum_values += [
+                v for v in typ.enum_values if v not in ours_type.enum_values
+            ]
+            ours_type.possible_types += [
+                t for t in typ.possible_types if t not in ours_type.possible_types
+            ]
+
+        return conflicts
+
+    @property
+    def root_types(self) -> List[str]:
+        """Names of the query, mutation and subscription types, when the schema has them."""
+
+        return [
+            self._schema[key]["name"]
+            for key in ["queryType", "mutationType", "subscriptionType"]
+            if self._schema[key]
+        ]
+
     def get_path_from_root(
         self,
         name: str,
@@ -90,6 +167,8 @@ class Schema:
         The algorigthm explores the schema in a DFS manner. It uses a set to keep track of visited nodes, and a list to keep track of the path. Keeping track of
         the visited nodes is necessary to avoid infinite loops (ie. recursions in the schema). If a full iteration over the types is made without finding a
         match, it means that the schema is not connected, and the path cannot be found.
+
+        Members of interfaces and unions are reached through an inline fragment segment (`... on Member`).
         """
 
         log().debug(f"Entered get_path_from_root({name})")
@@ -98,26 +177,19 @@ class Schema:
         if name not in self.types:
             raise ValueError(f"Type '{name}' not in schema!")
 
-        roots = [
-            self._schema["queryType"]["name"] if self._schema["queryType"] else "",
-            (
-                self._schema["mutationType"]["name"]
-                if self._schema["mutationType"]
-                else ""
-            ),
-            (
-                self._schema["subscriptionType"]["name"]
-                if self._schema["subscriptionType"]
-                else ""
-            ),
-        ]
-        roots = [r for r in roots if r]
+        roots = self.root_types
 
         visited = set()
         initial_name = name
         while name not in roots:
             found = False
             for t in self.types.values():
+                key = f"{t.name}|{name}"
+                if name in t.possible_types and key not in visited:
+                    path_from_root.insert(0, f"... on {name}")
+                    visited.add(key)
+                    name = t.name
+                    found = True
                 for f in t.fields:
                     key = f"{t.name}.{f.name}"
                     if key in visited:
@@ -140,22 +212,74 @@ class Schema:
 
         return path_from_root
 
+    def get_document_for_type(
+        self,
+        name: str,
+    ) -> str:
+        """Gets a document pointing at the type, through an inline fragment on the query type if it isn't reachable from root."""
+
+        try:
+            return self.convert_path_to_document(self.get_path_from_root(name))
+        except ValueError:
+            if not self._schema["queryType"]:
+                raise
+            log().debug(f"No path from root to {name}, using an inline fragment")
+            return self.convert_path_to_document(
+                [self._schema["queryType"]["name"], f"... on {name}"]
+            )
+
+    def get_input_types_without_values(
+        self,
+        ignored: Optional[Set[str]] = None,
+    ) -> List[str]:
+        """Gets the input objects without a field and the enums without a value."""
+        ignored = ignored or set()
+
+        return [
+            t.name
+            for t in self.types.values()
+            if t.name not in ignored
+            and (
+                (t.kind == GraphQLKind.INPUT_OBJECT and not t.fields)
+                or (t.kind == GraphQLKind.ENUM and not t.enum_values)
+            )
+        ]
+
     def get_type_without_fields(
         self,
         ignored: Optional[Set[str]] = None,
     ) -> str:
         """Gets the type without a field."""
+
+        types = self.get_types_without_fields(ignored, limit=1)
+        return types[0] if types else ""
+
+    def get_types_without_fields(
+        self,
+        ignored: Optional[Set[str]] = None,
+        limit: Optional[int] = None,
+    ) -> List[str]:
+        """Gets up to `limit` types without a field."""
         ignored = ignored or set()
 
+        types: List[str] = []
         for t in self.types.values():
+            if limit is not None and len(types) >= limit:
+                break
             if (
                 not t.fields
                 and t.name not in ignored
-                and t.kind != GraphQLKind.INPUT_OBJECT
+                and t.kind
+                not in [
+                    GraphQLKind.INPUT_OBJECT,
+                    GraphQLKind.SCALAR,
+                    GraphQLKind.ENUM,
+                    GraphQLKind.UNION,
+                ]
             ):
-                return t.name
+                types.append(t.name)
 
-        return ""
+        return types
 
     def convert_path_to_document(
         self,
@@ -356,7 +480,8 @@ class Field:
         typ = field_or_arg_type_from_json(_json["type"])
 
         args = []
-        for a in _json["args"]:
+        # inputFields have no args
+        for a in _json.get("args") or []:
             args.append(InputValue.from_json(a))
 
         return cls(name, typ, args)
@@ -368,15 +493,23 @@ class Type:
         name: str = "",
         kind: str = "",
         fields: Optional[List[Field]] = None,
+        possible_types: Optional[List[str]] = None,
+        enum_values: Optional[List[str]] = None,
     ):
         self.name = name
         self.kind = kind
         self.fields: List[Field] = fields or []
+        self.possible_types: List[str] = possible_types or []
+        self.enum_values: List[str] = enum_values or []
 
     def to_json(self) -> Dict[str, Any]:
         # dirty hack
 
-        if not self.fields:
+        if not self.fields and self.kind in [
+            GraphQLKind.OBJECT,
+            GraphQLKind.INTERFACE,
+            GraphQLKind.INPUT_OBJECT,
+        ]:
             field_typeref = TypeRef(
                 name=GraphQLPrimitive.STRING,
                 kind=GraphQLKind.SCALAR,
@@ -393,6 +526,23 @@ class Type:
             "possibleTypes": None,
         }
 
+        if self.kind == GraphQLKind.ENUM:
+            output["enumValues"] = [
+                {
+                    "deprecationReason": None,
+                    "description": None,
+                    "isDeprecated": False,
+                    "name": v,
+                }
+                for v in self.enum_values
+            ]
+
+        if self.kind in [GraphQLKind.INTERFACE, GraphQLKind.UNION]:
+            output["possibleTypes"] = [
+                {"kind": GraphQLKind.OBJECT, "name": t, "ofType": None}
+                for t in self.possible_types
+            ]
+
         if self.kind in [GraphQLKind.OBJECT, GraphQLKind.INTERFACE]:
             output["fields"] = [f.to_json() for f in self.fields]
             output["inputFields"] = None
@@ -428,8 +578,64 @@ class Type:
                     continue
                 fields.append(Field.from_json(f))
 
+        possible_types = [t["name"] for t in _json.get("possibleTypes") or []]
+        enum_values = [v["name"] for v in _json.get("enumValues") or []]
+
         return cls(
             name=name,
             kind=kind,
             fields=fields,
+            possible_types=possible_types,
+            enum_values=enum_values,
         )
+
+
+def diff_schemas(
+    old: Schema,
+    new: Schema,
+) -> Dict[str, Dict[str, List[str]]]:
+    """Lists the types, fields (`Type.field`) and arguments (`Type.field.arg`) added and removed between two schemas.
+
+    Input fields and enum values count as fields of their type.
+    """
+
+    def __names(schema: Schema) -> Dict[str, Set[str]]:
+        names: Dict[str, Set[str]] = {"types": set(), "fields": set(), "args": set()}
+        for t in schema.types.values():
+            names["types"].add(t.name)
+            names["fields"].update(f"{t.name}.{f.name}" for f in t.fields)
+            names["fields"].update(f"{t.name}.{v}" for v in t.enum_values)
+            for f in t.fields:
+                names["args"].update(f"{t.name}.{f.name}.{a.name}" for a in f.args)
+        return names
+
+    before, after = __names(old), __names(new)
+    return {
+        "added": {k: sorted(after[k] - names) for k, names in before.items()},
+        "removed": {k: sorted(names - after[k]) for k, names in before.items()},
+    }
+
+
+def _notation(typeref: TypeRef) -> str:
+    """The typeref as written in SDL, such as `[User!]!`."""
+
+    notation = typeref.name
+    if typeref.non_null_item:
+        notation += "!"
+    if typeref.is_list:
+        notation = f"[{notation}]"
+    if typeref.non_null:
+        notation += "!"
+    return notation
+
+
+def merge_schemas(schemas: Sequence[Schema]) -> Tuple[Schema, List[str]]:
+    """Unites schemas, such as the outputs of the shards of a scan, listing where they disagree."""
+
+    merged = Schema(schema=json.loads(repr(schemas[0])))
+    conflicts: List[str] = []
+
+    for schema in schemas[1:]:
+        conflicts += merged.merge(schema)
+
+    return merged, conflicts
@@ -0,0 +1,273 @@
+"""On-disk memory of what earlier runs learned about each endpoint."""
+
+import hashlib
+import json
+import math
+import sqlite3
+import struct
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from clairvoyance.entities.context import knowledge_ctx
+from clairvoyance.entities.interfaces import IKnowledgeBase
+
+
+class BloomFilter:
+    """A set of up to `capacity` names, answering membership with about `error_rate` false positives but no false negatives."""
+
+    _HEADER = struct.Struct("<IId")
+
+    def __init__(
+        self,
+        capacity: int = 2**14,
+        error_rate: float = 0.01,
+        data: Optional[bytes] = None,
+        count: int = 0,
+    ) -> None:
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.count = count
+        size = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self._bits = bytearray(data or bytes(-(-size // 8)))
+        self._size = len(self._bits) * 8
+        self._hashes = max(round(self._size / capacity * math.log(2)), 1)
+
+    def _positions(self, name: str) -> Iterator[int]:
+        digest = hashlib.blake2b(name.encode(), digest_size=16).digest()
+        h1, h2 = (
+            int.from_bytes(digest[:8], "little"),
+            int.from_bytes(digest[8:], "little") | 1,
+        )
+        for i in range(self._hashes):
+            yield (h1 + i * h2) % self._size
+
+    @property
+    def full(self) -> bool:
+        return self.count >= self.capacity
+
+    def add(self, name: str) -> None:
+        if name in self:
+            return
+        for position in self._positions(name):
+            self._bits[position // 8] |= 1 << (position % 8)
+        self.count += 1
+
+    def __contains__(self, name: object) -> bool:
+        return isinstance(name, str) and all(
+            self._bits[position // 8] & (1 << (position % 8))
+            for position in self._positions(name)
+        )
+
+    def to_bytes(self) -> bytes:
+        return self._HEADER.pack(self.capacity, self.count, self.error_rate) + bytes(
+            self._bits
+        )
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "BloomFilter":
+        capacity, count, error_rate = cls._HEADER.unpack_from(data)
+        return cls(capacity, error_rate, data[cls._HEADER.size :], count)
+
+
+class RejectedNames:
+    """The names rejected in a scope, exactly while they are few and then in Bloom filters.
+
+    A full filter is followed by one twice as large with half its false positives, so that they stay under `error_rate` overall however many names
+    are stored.
+    """
+
+    EXACT_LIMIT = 1024
+
+    def __init__(self, error_rate: float = 0.01) -> None:
+        self._error_rate = error_rate
+        self._names: Set[str] = set()
+        self._filters: List[BloomFilter] = []
+
+    def add(self, name: str) -> None:
+        if name in self:
+            return
+        if not self._filters and len(self._names) < self.EXACT_LIMIT:
+            self._names.add(name)
+            return
+        if not self._filters or self._filters[-1].full:
+            last = self._filters[-1] if self._filters else None
+            self._filters.append(
+                BloomFilter(last.capacity * 2, last.error_rate / 2)
+                if last
+                else BloomFilter(self.EXACT_LIMIT * 16, self._error_rate / 2)
+            )
+        for known in self._names:
+            self._filters[-1].add(known)
+        self._names = set()
+        self._filters[-1].add(name)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._names or any(name in f for f in self._filters)
+
+    def __len__(self) -> int:
+        return len(self._names) + sum(f.count for f in self._filters)
+
+    def to_bytes(self) -> bytes:
+        if not self._filters:
+            return b"\0" + "\n".join(sorted(self._names)).encode()
+        return b"\1" + b"".join(
+            struct.pack("<I", len(data)) + data
+            for data in (f.to_bytes() for f in self._filters)
+        )
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "RejectedNames":
+        negatives = cls()
+        if data[:1] == b"\0":
+            negatives._names = set(data[1:].decode().split("\n")) - {""}
+            return negatives
+
+        offset = 1
+        while offset < len(data):
+            (length,) = struct.unpack_from("<I", data, offset)
+            offset += 4
+            negatives._filters.append(
+                BloomFilter.from_bytes(data[offset : offset + length])
+            )
+            offset += length
+        return negatives
+
+
+class KnowledgeBase(IKnowledgeBase):
+    """A SQLite store of the names confirmed and rejected on an endpoint, and of the typerefs found there.
+
+    Rejected names are kept exactly while they are few, and in Bloom filters past that, per scope. Entries older than `ttl` seconds are forgotten, the
+    rejected names of a scope going as a whole once the first ones expire.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        endpoint: str,
+        ttl: Optional[float] = None,
+    ) -> None:
+        self._endpoint = endpoint
+        self._ttl = ttl
+        self._db = sqlite3.connect(path)
+
+        with self._db:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS names (endpoint TEXT, scope TEXT, name TEXT, seen REAL, PRIMARY KEY (endpoint, scope, name))"
+            )
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS negatives (endpoint TEXT, scope TEXT, bloom BLOB, created REAL, PRIMARY KEY (endpoint, scope))"
+            )
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS typerefs (endpoint TEXT, scope TEXT, name TEXT, typeref TEXT, seen REAL, PRIMARY KEY (endpoint, scope, name))"
+            )
+            if ttl is not None:
+                expiry = time.time() - ttl
+                self._db.execute("DELETE FROM names WHERE seen < ?", (expiry,))
+                self._db.execute("DELETE FROM negatives WHERE created < ?", (expiry,))
+                self._db.execute("DELETE FROM typerefs WHERE seen < ?", (expiry,))
+
+        knowledge_ctx.set(self)
+
+    def valid_names(self, scope: Optional[str] = None) -> Set[str]:
+        """Names confirmed in the scope, or in any scope of the endpoint."""
+
+        if scope is None:
+            rows = self._db.execute(
+                "SELECT name FROM names WHERE endpoint = ?", (self._endpoint,)
+            )
+        else:
+            rows = self._db.execute(
+                "SELECT name FROM names WHERE endpoint = ? AND scope = ?",
+                (self._endpoint, scope),
+            )
+        return {name for name, in rows}
+
+    def _negatives(self, scope: str) -> Tuple[Optional[RejectedNames], float]:
+        row = self._db.execute(
+            "SELECT bloom, created FROM negatives WHERE endpoint = ? AND scope = ?",
+            (self._endpoint, scope),
+        ).fetchone()
+        return (
+            (RejectedNames.from_bytes(row[0]), row[1]) if row else (None, time.time())
+        )
+
+    def invalid_names(self, scope: str, names: Iterable[str]) -> Set[str]:
+        """The names rejected in the scope, give or take a few false positives, and leaving out the ones confirmed since."""
+
+        negatives, _ = self._negatives(scope)
+        if not negatives:
+            return set()
+        return {name for name in names if name in negatives} - self.valid_names(scope)
+
+    def record_names(
+        self,
+        scope: str,
+        valid: Iterable[str],
+        invalid: Iterable[str],
+    ) -> None:
+        now = time.time()
+        negatives, created = self._negatives(scope)
+        negatives = negatives or RejectedNames()
+        invalid = list(invalid)
+        for name in invalid:
+            negatives.add(name)
+
+        with self._db:
+            self._db.executemany(
+                "DELETE FROM names WHERE endpoint = ? AND scope = ? AND name = ?",
+                [(self._endpoint, scope, name) for name in invalid],
+            )
+            self._db.executemany(
+                "INSERT OR REPLACE INTO names VALUES (?, ?, ?, ?)",
+                [(self._endpoint, scope, name, now) for name in valid],
+            )
+            self._db.execute(
+                "INSERT OR REPLACE INTO negatives VALUES (?, ?, ?, ?)",
+                (self._endpoint, scope, negatives.to_bytes(), created),
+            )
+
+    def typerefs(self, scope: str) -> Dict[str, Dict[str, Any]]:
+        """Typerefs found in the scope, in their introspection form."""
+
+        rows = self._db.execute(
+            "SELECT name, typeref FROM typerefs WHERE endpoint = ? AND scope = ?",
+            (self._endpoint, scope),
+        )
+        return {name: json.loads(typeref) for name, typeref in rows}
+
+    def record_typeref(self, scope: str, name: str, typeref: Dict[str, Any]) -> None:
+        with self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO typerefs VALUES (?, ?, ?, ?, ?)",
+                (self._endpoint, scope, name, json.dumps(typeref), time.time()),
+            )
+
+    def forget(self, scope: str, names: Optional[Iterable[str]] = None) -> None:
+        """Forget the given names of the scope and their typerefs, or everything about the scope."""
+
+        with self._db:
+            if names is None:
+                for table in ["names", "negatives", "typerefs"]:
+                    self._db.execute(
+                        f"DELETE FROM {table} WHERE endpoint = ? AND scope = ?",
+                        (self._endpoint, scope),
+                    )
+                return
+
+            for table in ["names", "typerefs"]:
+                self._db.executemany(
+                    f"DELETE FROM {table} WHERE endpoint = ? AND scope = ? AND name = ?",
+                    [(self._endpoint, scope, name) for name in names],
+                )
+
+    def reset(self) -> None:
+        """Forget everything about the endpoint."""
+
+        with self._db:
+            for table in ["names", "negatives", "typerefs"]:
+                self._db.execute(
+                    f"DELETE FROM {table} WHERE endpoint = ?", (self._endpoint,)
+                )
+
+    def close(self) -> None:
+        self._db.close()
@@ -1,16 +1,41 @@
-# pylint: disable=anomalous-backslash-in-string, line-too-long
+# pylint: disable=anomalous-backslash-in-string, line-too-long, too-many-lines
 
 import asyncio
+import itertools
 import re
 import time
-from typing import Any, Dict, List, Optional, Set, Tuple
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    TypeVar,
+)
 
 from clairvoyance import graphql
-from clairvoyance.entities import GraphQLPrimitive
-from clairvoyance.entities.context import client, config, log
+from clairvoyance.document import BatchDocument, operation_header
+from clairvoyance.entities import GraphQLKind, GraphQLPrimitive
+from clairvoyance.entities.context import client, config, knowledge, log
 from clairvoyance.entities.errors import EndpointError
+from clairvoyance.entities.interfaces import IKnowledgeBase
 from clairvoyance.entities.oracle import FuzzingContext
 from clairvoyance.utils import track
+from clairvoyance.wordlist import (
+    CandidateModel,
+    SimilarityIndex,
+    Wordlist,
+    WordQueue,
+    as_wordlist,
+)
+
+T = TypeVar("T")
 
 # yapf: disable
 
@@ -76,6 +101,52 @@ _TYPEREF_REGEXES = {
         r"""Field ['"]""" + MAIN_REGEX + r"""['"] argument ['"]""" + MAIN_REGEX + r"""['"] of type ['"](?P<typeref>""" + MAIN_REGEX + r""")['"] is """ + REQUIRED_BUT_NOT_PROVIDED,
         r"""Expected type (?P<typeref>""" + MAIN_REGEX + r"""), found .+\.""",
     ],
+    'ENUM': [
+        r"""Enum ['"](?P<typeref>""" + MAIN_REGEX + r""")['"] cannot represent non-enum value: .+""",
+        r"""Value ['"]""" + MAIN_REGEX + r"""['"] does not exist in ['"](?P<typeref>""" + MAIN_REGEX + r""")['"] enum\.( Did you mean .+\?)?""",
+        r"""Expected type (?P<typeref>""" + MAIN_REGEX + r"""), found .+; Did you mean the enum value .+\?""",
+    ],
+}
+
+_TYPE_REGEXES = {
+    'UNKNOWN': [
+        r"""Unknown type ['"](?P<typename>""" + MAIN_REGEX + r""")['"]\.( Did you mean (?P<suggestions>.+)\?)?""",
+    ],
+    'COMPOSITE': [
+        r"""Fragment cannot be spread here as objects of type ['"]""" + MAIN_REGEX + r"""['"] can never be of type ['"](?P<typename>""" + MAIN_REGEX + r""")['"]\.""",
+    ],
+    'NON_COMPOSITE': [
+        r"""Fragment cannot condition on non composite type ['"](?P<typename>""" + MAIN_REGEX + r""")['"]\.""",
+    ],
+    'NON_INPUT': [
+        r"""Variable ['"]\$""" + MAIN_REGEX + r"""['"] cannot be non-input type ['"](?P<typename>""" + MAIN_REGEX + r""")['"]\.""",
+    ],
+    'POSSIBLE_TYPES': [
+        r"""Cannot query field ['"]""" + MAIN_REGEX + r"""['"] on type ['"](?P<typename>""" + MAIN_REGEX + r""")['"]\. Did you mean to use an inline fragment on (?P<possible_types>.+)\?""",
+    ],
+}
+
+_INPUT_REGEXES = {
+    'UNKNOWN_ENUM_VALUE': [
+        r"""Value ['"](?P<name>""" + MAIN_REGEX + r""")['"] does not exist in ['"](?P<typename>""" + MAIN_REGEX + r""")['"] enum\.( Did you mean (the enum value )?(?P<suggestions>.+)\?)?""",
+    ],
+    'UNKNOWN_INPUT_FIELD': [
+        r"""Field ['"](?P<name>""" + MAIN_REGEX + r""")['"] is not defined by type ['"]?(?P<typename>""" + MAIN_REGEX + r""")['"]?[\.;]( Did you mean (?P<suggestions>.+)\?)?""",
+    ],
+    'REQUIRED_INPUT_FIELD': [
+        r"""Field ['"](?P<typename>[_0-9A-Za-z]+)\.(?P<name>[_0-9A-Za-z]+)['"] of required type ['"](?P<typeref>""" + MAIN_REGEX + r""")['"] was not provided\.""",
+    ],
+    'SCALAR': [
+        r"""(?P<typeref>[_0-9A-Za-z]+) cannot represent (a )?non[ -].+""",
+        r"""Expected value of type ['"](?P<typeref>""" + MAIN_REGEX + r""")['"], found \{\}(; .+|\.)""",
+    ],
+    'ENUM': [
+        r"""Enum ['"](?P<typeref>""" + MAIN_REGEX + r""")['"] cannot represent non-enum value: .+""",
+    ],
+    'EXPECTED': [
+        r"""Expected value of type ['"](?P<typeref>""" + MAIN_REGEX + r""")['"], found .+""",
+        r"""Expected type (?P<typeref>""" + MAIN_REGEX + r"""), found .+""",
+    ],
 }
 
 WRONG_FIELD_EXAMPLE = 'IAmWrongField'
@@ -101,8 +172,30 @@ _GENERAL_SKIP = [
 FIELD_REGEXES = {k: [re.compile(r) for r in v] for k, v in _FIELD_REGEXES.items()}
 ARG_REGEXES = {k: [re.compile(r) for r in v] for k, v in _ARG_REGEXES.items()}
 TYPEREF_REGEXES = {k: [re.compile(r) for r in v] for k, v in _TYPEREF_REGEXES.items()}
+TYPE_REGEXES = {k: [re.compile(r) for r in v] for k, v in _TYPE_REGEXES.items()}
+INPUT_REGEXES = {k: [re.compile(r) for r in v] for k, v in _INPUT_REGEXES.items()}
 WRONG_TYPENAME = [re.compile(r) for r in _WRONG_TYPENAME]
 GENERAL_SKIP = [re.compile(r) for r in _GENERAL_SKIP]
+TOO_MANY_ERRORS_REGEX = re.compile(
+    r"""Too many validation errors, error limit reached\. Validation aborted\."""
+)
+NAME_REGEX = re.compile(r"[_A-Za-z][_0-9A-Za-z]*")
+QUOTED_NAME_REGEX = re.compile(r"""['"](?P<name>""" + MAIN_REGEX + r""")['"]""")
+# Errors an aliased field is counted to make besides its unknown args, until its own are seen: a missing sub-selection, or a required arg
+DEFAULT_ALIAS_ERRORS = 2
+
+UNKNOWN_ARG_REGEX = re.compile(
+    r"""Unknown argument ['"](?P<invalid_arg>[_A-Za-z][_0-9A-Za-z]*)['"] on field ['"][_A-Za-z][_0-9A-Za-z\.]*['"]"""
+)
+ARG_FIELD_REGEX = re.compile(r"""on field ['"](?P<field>""" + MAIN_REGEX + r""")['"]""")
+FIELD_NAME_REGEX = re.compile(r"""Field ['"](?P<field>""" + MAIN_REGEX + r""")['"]""")
+ARG_NAME_REGEX = re.compile(
+    r"""Field ['"](?P<field>"""
+    + MAIN_REGEX
+    + r""")['"] argument ['"](?P<arg>"""
+    + MAIN_REGEX
+    + r""")['"]"""
+)
 
 
 # pylint: disable=too-many-branches
@@ -151,8 +244,39 @@ def get_valid_fields(error_message: str) -> Set[str]:
     return valid_fields
 
 
+def get_possible_types(error_message: str) -> Tuple[Optional[str], Set[str]]:
+    """Fetching the members of an interface or union from an inline fragment hint."""
+
+    for regex in TYPE_REGEXES["POSSIBLE_TYPES"]:
+        match = regex.fullmatch(error_message)
+        if match:
+            return match.group("typename"), {
+                m.group("name")
+                for m in QUOTED_NAME_REGEX.finditer(match.group("possible_types"))
+            }
+
+    return None, set()
+
+
+def is_aborted(errors: List[Any]) -> bool:
+    """Whether the server stopped validating a document after too many errors, remembering how many it reported."""
+
+    for error in errors:
+        if isinstance(error, dict) and TOO_MANY_ERRORS_REGEX.fullmatch(
+            str(error.get("message"))
+        ):
+            limit = max(len(errors) - 1, 1)
+            max_errors = config().max_errors
+            if max_errors is None or limit < max_errors:
+                log().debug(f"Validation is aborted after {limit} errors")
+                config().max_errors = limit
+            return True
+
+    return False
+
+
 async def probe_valid_fields(
-    wordlist: List[str],
+    wordlist: Sequence[str],
     input_document: str,
 ) -> Set[str]:
     """Sending a wordlist to check for valid fields.
@@ -166,29 +290,94 @@ async def probe_valid_fields(
         A set of discovered valid fields.
     """
 
-    async def __probation(i: int) -> Set[str]:
-        bucket = wordlist[i : i + config().bucket_size]
-        valid_fields = set(bucket)
-        document = input_document.replace("FUZZ", " ".join(bucket))
+    valid_fields = await probe_valid_fields_batch(wordlist, [input_document])
+    return valid_fields[input_document]
+
+
+async def probe_valid_fields_batch(  # pylint: disable=too-many-locals, too-many-statements
+    wordlist: Sequence[str],
+    input_documents: List[str],
+    possible_types: Optional[Dict[str, Set[str]]] = None,
+    skip: Optional[Dict[str, Set[str]]] = None,
+    priorities: Optional[Dict[str, List[str]]] = None,
+    expand: bool = True,
+) -> Dict[str, Set[str]]:
+    """Sending a wordlist to check for valid fields at several documents at once.
+
+    Documents of the same operation are merged, so that each request carries a bucket for every one of them, and errors are attributed back to their
+    document through their locations. A bucket whose errors can't be attributed is sent again on its own for each document. Once the server is known to
+    abort validation after `max_errors` errors, merged documents are kept under that many fields.
+
+    Args:
+        wordlist: The words that would leads to discovery.
+        input_documents: The base documents, each one pointing at a different type.
+        possible_types: If given, collects the members of the abstract types hinted at by inline fragment suggestions.
+        skip: Words not to send to each document, such as the fields it is already known to have.
+        priorities: Words to send to each document first, whether they are in the wordlist or not.
+        expand: Whether to send the words derived from or close to each discovered field next, whether they are in the wordlist or not.
+
+    Returns:
+        The discovered valid fields of each document.
+    """
+
+    groups: Dict[str, List[str]] = {}
+    for input_document in input_documents:
+        header = operation_header(input_document)
+        groups.setdefault(input_document if header is None else header, []).append(
+            input_document
+        )
+
+    skip = skip or {}
+    priorities = priorities or {}
+
+    def __chunks(documents: List[str], size: int) -> List[List[str]]:
+        return [documents[j : j + size] for j in range(0, len(documents), size)]
+
+    async def __probation(  # pylint: disable=too-many-locals
+        documents: List[str], buckets: Dict[str, List[str]]
+    ) -> Dict[str, Set[str]]:
+        bucket = max(buckets.values(), key=len)
+        valid_fields = {d: set(buckets[d]) for d in documents}
+        leaves: Set[str] = set()
+        if len(documents) == 1:
+            document = BatchDocument.from_template(
+                documents[0], [(" ".join(buckets[documents[0]]), documents[0])]
+            )
+        else:
+            document = BatchDocument.from_templates(
+                [(d, " ".join(buckets[d]), d) for d in documents]
+            )
 
         start_time = time.time()
-        response = await client().post(document)
+        response = await client().post(str(document))
         total_time = time.time() - start_time
 
-        errors = response["errors"]
+        errors = response.get("errors", [])
 
         log().debug(
-            f"Sent {len(bucket)} fields, received {len(errors)} errors in {round(total_time, 2)} seconds"
+            f"Sent {len(bucket)} fields to {len(documents)} types, received {len(errors)} errors in {round(total_time, 2)} seconds"
         )
 
+        if len(documents) > 1 and is_aborted(errors):
+            size = max(
+                1, min((config().max_errors or 0) // len(bucket), len(documents) // 2)
+            )
+            merged: Dict[str, Set[str]] = {}
+            for result in await asyncio.gather(
+                *[
+                    __probation(chunk, {d: buckets[d] for d in chunk})
+                    for chunk in __chunks(documents, size)
+                ]
+            ):
+                merged.update(result)
+            return merged
+
         for error in errors:
             error_message = error["message"]
 
-            if (
-                "must not have a selection since type" in error_message
-                and "has no subfields" in error_message
-            ) or "must not have a sub selection" in error_message:
-                return set()
+            abstract_type, members = get_possible_types(error_message)
+            if abstract_type and possible_types is not None:
+                possible_types.setdefault(abstract_type, set()).update(members)
 
             # ! LEGACY CODE please keep
             # First remove field if it produced an 'Cannot query field' error
@@ -196,28 +385,81 @@ async def probe_valid_fields(
                 r"""Cannot query field [\'"](?P<invalid_field>[_A-Za-z][_0-9A-Za-z]*)[\'"]""",
                 error_message,
             )
+            # Second obtain field suggestions from error message
+            suggestions = get_valid_fields(error_message)
+
+            if not (is_leaf_error(error_message) or match or suggestions):
+                continue
+
+            owner = document.locate(error)
+            if owner is None:
+                log().debug(
+                    f"Unable to attribute '{error_message}' to one of {documents}, sending the bucket to each of them"
+                )
+                results = await asyncio.gather(
+                    *[__probation([d], {d: buckets[d]}) for d in documents]
+                )
+                return {d: result[d] for d, result in zip(documents, results)}
+
+            if is_leaf_error(error_message):
+                leaves.add(owner)
             if match:
-                valid_fields.discard(match.group("invalid_field"))
+                valid_fields[owner].discard(match.group("invalid_field"))
+            valid_fields[owner] |= suggestions
 
-            # Second obtain field suggestions from error message
-            valid_fields |= get_valid_fields(error_message)
+        for leaf in leaves:
+            valid_fields[leaf] = set()
 
         return valid_fields
 
-    # Create task list
-    tasks: List[asyncio.Task] = []
-    for i in range(0, len(wordlist), config().bucket_size):
-        tasks.append(asyncio.create_task(__probation(i)))
-
-    # Process results
-    valid_fields = set()
-    for task in track(
-        asyncio.as_completed(tasks),
-        description=f"Sending {len(tasks)} fields",
-        total=len(tasks),
+    # Words close to a discovery are likely to be fields too, and are sent next
+    wordlist = as_wordlist(wordlist)
+    index = SimilarityIndex(
+        itertools.chain(*[priorities.get(d, []) for d in input_documents], wordlist)
+    )
+    queues = {
+        d: WordQueue(
+            wordlist, index, sent=skip.get(d, set()), first=priorities.get(d, [])
+        )
+        for d in input_documents
+    }
+    valid_fields: Dict[str, Set[str]] = {d: set() for d in input_documents}
+
+    async def __worker(documents: List[str]) -> None:
+        while True:
+            buckets = {d: queues[d].take(config().bucket_size) for d in documents}
+            buckets = {d: bucket for d, bucket in buckets.items() if bucket}
+            if not buckets:
+                return
+
+            result = await __probation(list(buckets), buckets)
+            for d, fields in result.items():
+                found = fields - valid_fields[d]
+                valid_fields[d] |= fields
+                if expand:
+                    queues[d].pull(found)
+
+    # Create worker list, each one taking the next buckets when its last request is answered
+    max_errors = config().max_errors
+    workers: List[asyncio.Task] = []
+    for group in groups.values():
+        size = max(1, max_errors // config().bucket_size) if max_errors else len(group)
+        for documents in __chunks(group, size):
+            longest = max(len(queues[d]) for d in documents)
+            count = min(
+                client().concurrent_requests, -(-longest // config().bucket_size)
+            )
+            workers.extend(
+                asyncio.create_task(__worker(documents)) for _ in range(count)
+            )
+
+    buckets = sum(-(-len(queues[d]) // config().bucket_size) for d in input_documents)
+    for worker in track(
+        asyncio.as_completed(workers),
+        description=f"Sending {buckets} fields",
+        total=len(workers),
     ):
-        result = await task
-        valid_fields.update(result)
+        await worker
 
     return valid_fields
 
@@ -229,70 +471,243 @@ async def probe_valid_args(
 ) -> Set[str]:
     """Sends the wordlist as arguments and deduces its type from the error msgs received."""
 
-    valid_args = set(wordlist)
+    valid_args = await probe_valid_args_batch([(field, wordlist)], input_document)
+    return valid_args[field]
+
+
+def alias_errors(field: str, extra_errors: Optional[Dict[str, int]]) -> int:
+    """How many errors an aliased copy of a field makes besides its unknown args, such as for a missing sub-selection or required arg."""
+
+    return (extra_errors or {}).get(field, DEFAULT_ALIAS_ERRORS)
+
+
+def split_args(
+    targets: List[Tuple[str, List[str]]],
+    budget: int,
+    extra_errors: Optional[Dict[str, int]] = None,
+) -> List[List[Tuple[str, List[str]]]]:
+    """Pack argument buckets into documents of at most `budget` errors, an unknown one per arg and the ones of each alias, cutting the buckets that
+    don't fit."""
+
+    documents: List[List[Tuple[str, List[str]]]] = [[]]
+    size = 0
+    for field, bucket in targets:
+        extra = alias_errors(field, extra_errors)
+        while bucket:
+            if documents[-1] and size + extra + 1 > budget:
+                documents.append([])
+                size = 0
+            taken = bucket[: max(budget - size - extra, 1)]
+            bucket = bucket[len(taken) :]
+            documents[-1].append((field, taken))
+            size += len(taken) + extra
+    return documents
+
+
+async def probe_valid_args_batch(  # pylint: disable=too-many-locals
+    targets: List[Tuple[str, List[str]]],
+    input_document: str,
+    extra_errors: Optional[Dict[str, int]] = None,
+) -> Dict[str, Set[str]]:
+    """Sends several argument buckets in one document, each one on its own aliased copy of its field.
+
+    Errors are attributed back to their bucket using their location, or failing that the field they mention. Should the server abort validation before
+    reporting them all, the buckets are sent again at once in documents under its limit. The errors each field makes besides its unknown args are
+    counted into `extra_errors`, if given, to keep later documents under it.
+    """
 
-    document = input_document.replace(
-        "FUZZ", f'{field}({", ".join([w + ": 7" for w in wordlist])})'
+    document = BatchDocument.from_template(
+        input_document,
+        [
+            (f'alias{i}: {field}({", ".join([w + ": 7" for w in bucket])})', i)
+            for i, (field, bucket) in enumerate(targets)
+        ],
     )
+    valid_args = [set(bucket) for _, bucket in targets]
 
-    response = await client().post(document=document)
+    def __owners(error: Dict[str, Any]) -> List[int]:
+        i = document.locate(error)
+        if i is not None:
+            return [i]
 
-    if "errors" not in response:
-        return valid_args
+        field = get_arg_field(error["message"])
+        return [j for j, (f, _) in enumerate(targets) if field in (None, f)]
+
+    response = await client().post(document=str(document))
+    errors = response.get("errors", [])
+    aborted = is_aborted(errors)
+
+    if extra_errors is not None:
+        extra = [0] * len(targets)
+        last = -1
+        for error in errors:
+            i = document.locate(error) if isinstance(error, dict) else None
+            if i is None or TOO_MANY_ERRORS_REGEX.fullmatch(str(error.get("message"))):
+                continue
+            last = max(last, i)
+            if not UNKNOWN_ARG_REGEX.search(str(error.get("message"))):
+                extra[i] += 1
+        # Once aborted, the errors of the last alias reported may be cut short and the ones of the aliases after it are missing
+        for i, (field, _) in enumerate(targets[: last if aborted else None]):
+            extra_errors[field] = max(extra_errors.get(field, 0), extra[i])
+
+    if aborted:
+        # Under the limit, or in halves should the document have been under it already
+        size = sum(
+            len(bucket) + alias_errors(field, extra_errors) for field, bucket in targets
+        )
+        limit = config().max_errors or size
+        documents = split_args(
+            targets, limit if size > limit else -(-size // 2), extra_errors
+        )
+        if len(documents) > 1:
+            merged: Dict[str, Set[str]] = {field: set() for field, _ in targets}
+            for found in await asyncio.gather(
+                *[
+                    probe_valid_args_batch(d, input_document, extra_errors)
+                    for d in documents
+                ]
+            ):
+                for field, args in found.items():
+                    merged[field] |= args
+            return merged
 
-    errors = response["errors"]
     for error in errors:
         error_message = error["message"]
 
-        if (
-            "must not have a selection since type" in error_message
-            and "has no subfields" in error_message
-        ) or "must not have a sub selection" in error_message:
-            return set()
+        if is_leaf_error(error_message):
+            return {field: set() for field, _ in targets}
+
+        owners = __owners(error)
 
         # First remove arg if it produced an 'Unknown argument' error
-        match = re.search(
-            r"""Unknown argument ['"](?P<invalid_arg>[_A-Za-z][_0-9A-Za-z]*)['"] on field ['"][_A-Za-z][_0-9A-Za-z\.]*['"]""",
-            error_message,
-        )
+        match = UNKNOWN_ARG_REGEX.search(error_message)
         if match:
-            valid_args.discard(match.group("invalid_arg"))
+            for i in owners:
+                valid_args[i].discard(match.group("invalid_arg"))
 
         duplicate_arg_regex = r"""There can be only one argument named ["'](?P<arg>[_0-9a-zA-Z\.\[\]!]*)["']\.?"""
         if re.fullmatch(duplicate_arg_regex, error_message):
             match = re.fullmatch(duplicate_arg_regex, error_message)
-            valid_args.discard(match.group("arg"))  # type: ignore
+            for i in owners:
+                valid_args[i].discard(match.group("arg"))  # type: ignore
             continue
 
         # Second obtain args suggestions from error message
-        valid_args |= get_valid_args(error_message)
+        for i in owners[:1]:
+            valid_args[i] |= get_valid_args(error_message)
 
-    return valid_args
+    result: Dict[str, Set[str]] = {field: set() for field, _ in targets}
+    for (field, _), args in zip(targets, valid_args):
+        result[field] |= args
+
+    return result
 
 
 async def probe_args(
     field: str,
-    wordlist: List[str],
+    wordlist: Sequence[str],
     input_document: str,
 ) -> Set[str]:
     """Wrapper function for deducing the arg types."""
 
-    tasks: List[asyncio.Task] = []
-    for i in range(0, len(wordlist), config().bucket_size):
-        bucket = wordlist[i : i + config().bucket_size]
-        tasks.append(
-            asyncio.create_task(probe_valid_args(field, bucket, input_document))
-        )
+    valid_args = await probe_args_batch([field], wordlist, input_document)
+    return valid_args[field]
 
-    valid_args: Set[str] = set()
 
-    results = await asyncio.gather(*tasks)
-    for result in results:
-        valid_args |= result
+async def probe_args_batch(
+    fields: List[str],
+    wordlist: Sequence[str],
+    input_document: str,
+    skip: Optional[Dict[str, Set[str]]] = None,
+    priorities: Optional[Dict[str, List[str]]] = None,
+) -> Dict[str, Set[str]]:
+    """Wrapper function for deducing the args of several fields, packing `alias_batch_size` buckets per document.
+
+    Until the server is known to abort validation or not, the first document goes alone. Once it is known to abort after `max_errors` errors,
+    documents are filled up to that many, the last bucket cut short to fit. Words in `skip` aren't sent to their field, the ones in `priorities` are
+    sent to it first.
+    """
+
+    skip = skip or {}
+    priorities = priorities or {}
+    # Words close to a discovery are likely to be args too, and are sent next
+    wordlist = as_wordlist(wordlist)
+    index = SimilarityIndex(
+        itertools.chain(*[priorities.get(field, []) for field in fields], wordlist)
+    )
+    queues = {
+        field: WordQueue(
+            wordlist,
+            index,
+            sent=skip.get(field, set()),
+            first=priorities.get(field, []),
+        )
+        for field in fields
+    }
+    valid_args: Dict[str, Set[str]] = {field: set() for field in fields}
+    extra_errors: Dict[str, int] = {}
+    sent = {"buckets": 0, "documents": 0}
+
+    def __batch() -> List[Tuple[str, List[str]]]:
+        # An unknown arg is an error, and each alias makes its own
+        room = config().max_errors
+        batch: List[Tuple[str, List[str]]] = []
+        for field in fields:
+            extra = alias_errors(field, extra_errors)
+            while queues[field] and len(batch) < config().alias_batch_size:
+                if room is not None and room <= extra:
+                    return batch
+                bucket = queues[field].take(
+                    config().bucket_size
+                    if room is None
+                    else min(config().bucket_size, room - extra)
+                )
+                if not bucket:
+                    break
+                batch.append((field, bucket))
+                if room is not None:
+                    room -= len(bucket) + extra
+        return batch
+
+    async def __worker(batch: List[Tuple[str, List[str]]]) -> None:
+        while batch:
+            sent["buckets"] += len(batch)
+            sent["documents"] += 1
+            result = await probe_valid_args_batch(batch, input_document, extra_errors)
+            for field, args in result.items():
+                found = args - valid_args[field]
+                valid_args[field] |= args
+                queues[field].pull(found)
+            batch = __batch()
+
+    first = __batch() if config().max_errors is None else []
+    if first:
+        # Whether and where the server aborts validation is learned once, rather than by every worker
+        await __worker(first)
+
+    buckets = sum(-(-len(queue) // config().bucket_size) for queue in queues.values())
+    count = min(client().concurrent_requests, -(-buckets // config().alias_batch_size))
+    await asyncio.gather(*[__worker(__batch()) for _ in range(count)])
+
+    log().debug(
+        f"Sent {sent['buckets']} argument buckets in {sent['documents']} documents"
+    )
 
     return valid_args
 
 
+def get_arg_field(error_message: str) -> Optional[str]:
+    """Get the name of the field an argument error is about, if it mentions one."""
+
+    match = ARG_FIELD_REGEX.search(error_message)
+    if not match:
+        return None
+
+    # Newer servers qualify the field with its parent type (`Query.user`)
+    return match.group("field").split(".")[-1]
+
+
 def get_valid_args(error_message: str) -> Set[str]:
     """Get the type of an arg using regex."""
 
@@ -331,6 +746,15 @@ def get_valid_args(error_message: str) -> Set[str]:
     return valid_args
 
 
+def is_leaf_error(error_message: str) -> bool:
+    """Whether the error says that a selection was made on a leaf (scalar or enum) type."""
+
+    return (
+        "must not have a selection since type" in error_message
+        and "has no subfields" in error_message
+    ) or "must not have a sub selection" in error_message
+
+
 def get_typeref(
     error_message: str,
     context: FuzzingContext,
@@ -355,6 +779,11 @@ def get_typeref(
 
         elif context == FuzzingContext.ARGUMENT:
             # in the case of an argument
+            # enums name themselves before anything else
+            for regex in TYPEREF_REGEXES["ENUM"]:
+                match = re.fullmatch(regex, error_message)
+                if match:
+                    return match
             # we drop the following messages
             for regex in TYPEREF_REGEXES["FIELD"] + GENERAL_SKIP:
                 if re.fullmatch(regex, error_message):
@@ -379,13 +808,16 @@ def get_typeref(
         kind = ""
         if name in GraphQLPrimitive:
             kind = "SCALAR"
+        elif match.re in TYPEREF_REGEXES["ENUM"]:
+            kind = "ENUM"
+        elif context == FuzzingContext.FIELD and is_leaf_error(error_message):
+            # Custom scalars and enums can't be told apart from the output side
+            kind = "SCALAR"
         elif context == FuzzingContext.FIELD:
             kind = "OBJECT"
         elif context == FuzzingContext.ARGUMENT:
+            # The name is the one the server gives, whether or not it ends in `Input`
             kind = "INPUT_OBJECT"
-            name = (
-                name.removesuffix("Input") + "Input"
-            )  # Make sure `Input` is always once at the end
         else:
             log().debug(f"Unknown kind for `typeref`: '{error_message}'")
             return None
@@ -462,6 +894,81 @@ async def probe_field_type(
     return await probe_typeref(documents, FuzzingContext.FIELD)
 
 
+async def probe_field_types(
+    field_names: List[str],
+    input_document: str,
+) -> Dict[str, graphql.TypeRef]:
+    """Deduce the types of several fields, packing them with aliases into one document per probe shape.
+
+    As with `probe_field_type`, the second shape wins over the first one when both resolve a field. Fields which can't be attributed an error in a batch
+    fall back to `probe_field_type`.
+    """
+
+    typerefs: Dict[str, graphql.TypeRef] = {}
+
+    async def __probation(names: List[str], shape: str) -> Dict[str, graphql.TypeRef]:
+        document = BatchDocument.from_template(
+            input_document,
+            [
+                (f"alias{i}: " + shape.format(name), name)
+                for i, name in enumerate(names)
+            ],
+        )
+
+        found: Dict[str, graphql.TypeRef] = {}
+        response = await client().post(str(document))
+        for error in response.get("errors", []):
+            if isinstance(error, str):
+                continue
+
+            typeref = get_typeref(error["message"], FuzzingContext.FIELD)
+            if not typeref:
+                continue
+
+            match = FIELD_NAME_REGEX.match(error["message"])
+            name = match.group("field").split(".")[-1] if match else None
+            if name not in names:
+                name = document.locate(error)
+
+            if name and name not in found:
+                found[name] = typeref
+
+        return found
+
+    results = await asyncio.gather(
+        *[
+            __probation(field_names[i : i + config().bucket_size], shape)
+            for shape in ["{}", "{} {{ lol }}"]
+            for i in range(0, len(field_names), config().bucket_size)
+        ]
+    )
+    for found in results:
+        typerefs.update(found)
+
+    for name in field_names:
+        if name not in typerefs:
+            log().debug(
+                f"Unable to attribute a TypeRef to {name} in a batch, probing it on its own"
+            )
+            # Raises if the field can't be typed at all
+            typeref = await probe_field_type(name, input_document)
+            if typeref:
+                typerefs[name] = typeref
+
+    return typerefs
+
+
+ARG_TYPEREF_VALUES: List[Optional[str]] = ["42", "{}", None, '"42"', "false"]
+"""Values sent to deduce the type of an arg, `None` leaving the arg out so that it is reported as required."""
+
+
+def get_arg_typeref_values() -> List[Optional[str]]:
+    """Order the arg probe values by how often they yielded a typeref on this server, keeping the default order on ties."""
+
+    hits = config().arg_typeref_hits
+    return sorted(ARG_TYPEREF_VALUES, key=lambda value: -hits[value])
+
+
 async def probe_arg_typeref(
     field: str,
     arg: str,
@@ -469,18 +976,132 @@ async def probe_arg_typeref(
 ) -> Optional[graphql.TypeRef]:
     """Wrapper function to deduce the type of an arg."""
 
-    documents = [
-        input_document.replace("FUZZ", f"{field}({arg}: 42)"),
-        input_document.replace("FUZZ", f"{field}({arg}: {{}})"),
-        input_document.replace("FUZZ", f"{field}({arg[:-1]}: 42)"),
-        input_document.replace("FUZZ", f'{field}({arg}: "42")'),
-        input_document.replace("FUZZ", f"{field}({arg}: false)"),
+    typerefs = await probe_arg_typerefs([(field, arg)], input_document)
+    return typerefs[(field, arg)]
+
+
+async def probe_arg_typerefs(
+    targets: List[Tuple[str, str]],
+    input_document: str,
+) -> Dict[Tuple[str, str], Optional[graphql.TypeRef]]:
+    """Deduce the types of several args, packing every arg of a field and several aliased fields into one document per probe value.
+
+    Probe values are tried one after the other in the order learned on this server, each arg dropping out at the first value which yields its typeref.
+    Errors are attributed to the arg they name, or else to the arg at their location. Args of a document which got an error that could not be attributed
+    are probed again on their own.
+    """
+
+    args_by_field: Dict[str, List[str]] = {}
+    for field, arg in targets:
+        args_by_field.setdefault(field, []).append(arg)
+    fields = list(args_by_field)
+    prefix, _, suffix = input_document.partition("FUZZ")
+
+    async def __probation(
+        batch: List[str],
+        value: Optional[str],
+    ) -> Tuple[Dict[Tuple[str, str], graphql.TypeRef], Set[Tuple[str, str]]]:
+        document: BatchDocument[Tuple[str, str]] = BatchDocument(prefix)
+        for i, field in enumerate(batch):
+            document.append(f" alias{i}: {field}" if i else f"alias{i}: {field}")
+            if value is None:
+                continue
+
+            document.append("(")
+            for j, arg in enumerate(args_by_field[field]):
+                document.append(
+                    f"{arg}: {value}" if not j else f", {arg}: {value}", (field, arg)
+                )
+            document.append(")")
+        document.append(suffix)
+
+        found: Dict[Tuple[str, str], graphql.TypeRef] = {}
+        ambiguous: Set[Tuple[str, str]] = set()
+
+        response = await client().post(str(document))
+        for error in response.get("errors", []):
+            if isinstance(error, str):
+                continue
+
+            typeref = get_typeref(error["message"], FuzzingContext.ARGUMENT)
+            if not typeref:
+                continue
+
+            target: Optional[Tuple[str, str]] = None
+            match = ARG_NAME_REGEX.match(error["message"])
+            if match:
+                target = (match.group("field").split(".")[-1], match.group("arg"))
+                if target[0] not in batch or target[1] not in args_by_field[target[0]]:
+                    continue
+            else:
+                target = document.locate(error)
+
+            if target:
+                found[target] = typeref
+            else:
+                ambiguous |= {
+                    (field, arg) for field in batch for arg in args_by_field[field]
+                }
+
+        return found, ambiguous
+
+    typerefs: Dict[Tuple[str, str], Optional[graphql.TypeRef]] = {
+        target: None for target in targets
+    }
+    ambiguous: Set[Tuple[str, str]] = set()
+
+    # Most productive values first, stopping for each arg at the first one which yields its typeref
+    for value in get_arg_typeref_values():
+        pending = [field for field in fields if args_by_field[field]]
+        if not pending:
+            break
+
+        results = await asyncio.gather(
+            *[
+                __probation(pending[i : i + config().alias_batch_size], value)
+                for i in range(0, len(pending), config().alias_batch_size)
+            ]
+        )
+        for found, unattributed in results:
+            found = {
+                target: typeref
+                for target, typeref in found.items()
+                if not typerefs[target]
+            }
+            config().arg_typeref_hits[value] += len(found)
+            typerefs.update(found)
+            ambiguous |= unattributed
+
+        for field in pending:
+            args_by_field[field] = [
+                arg for arg in args_by_field[field] if not typerefs[(field, arg)]
+            ]
+
+    retry = [
+        target for target in targets if not typerefs[target] and target in ambiguous
     ]
+    if len(targets) > 1 and retry:
+        log().debug(
+            f"Unable to attribute a TypeRef to {retry} in a batch, probing them on their own"
+        )
+        for target, typeref in zip(
+            retry,
+            await asyncio.gather(
+                *[probe_arg_typerefs([target], input_document) for target in retry]
+            ),
+        ):
+            typerefs[target] = typeref[target]
 
-    return await probe_typeref(documents, FuzzingContext.ARGUMENT)
+    return typerefs
 
 
 async def probe_typename(input_document: str) -> str:
+    typename, _ = await probe_type(input_document)
+    return typename
+
+
+async def probe_type(input_document: str) -> Tuple[str, str]:
+    """Get the name of the type at `FUZZ`, and whether it is a leaf (`SCALAR`) or not (`OBJECT`)."""
 
     document = input_document.replace("FUZZ", WRONG_FIELD_EXAMPLE)
 
@@ -490,7 +1111,7 @@ async def probe_typename(input_document: str) -> str:
             f"""Unable to get typename from {document}.
                       Field Suggestion might not be enabled on this endpoint. Using default "Query"""
         )
-        return "Query"
+        return "Query", GraphQLKind.OBJECT
 
     errors = response["errors"]
 
@@ -508,9 +1129,14 @@ async def probe_typename(input_document: str) -> str:
             f"""Unkwon error in `probe_typename`: "{errors}" does not match any known regexes.
                     Field Suggestion might not be enabled on this endpoint. Using default "Query"""
         )
-        return "Query"
+        return "Query", GraphQLKind.OBJECT
+
+    typename = (
+        match.group("typename").replace("[", "").replace("]", "").replace("!", "")
+    )
+    kind = GraphQLKind.SCALAR if is_leaf_error(match.string) else GraphQLKind.OBJECT
 
-    return match.group("typename").replace("[", "").replace("]", "").replace("!", "")
+    return typename, kind
 
 
 async def fetch_root_typenames() -> Dict[str, Optional[str]]:
@@ -538,33 +1164,650 @@ async def fetch_root_typenames() -> Dict[str, Optional[str]]:
     return typenames
 
 
-async def explore_field(
-    field_name: str,
+def capitalized(wordlist: Wordlist) -> Iterator[str]:
+    """The words of the wordlist as type names, leaving out the ones which are in it already capitalized."""
+
+    for word in wordlist:
+        name = word[:1].upper() + word[1:]
+        if name and (name == word or name not in wordlist):
+            yield name
+
+
+def in_wordlist(name: str, wordlist: Wordlist) -> bool:
+    """Whether the type name was sent along with the capitalized wordlist."""
+
+    return name in wordlist or name[:1].lower() + name[1:] in wordlist
+
+
+def batched(words: Iterable[str], size: int) -> Iterator[List[str]]:
+    """Cut the words into buckets as they are asked for."""
+
+    words = iter(words)
+    bucket = list(itertools.islice(words, size))
+    while bucket:
+        yield bucket
+        bucket = list(itertools.islice(words, size))
+
+
+async def drain(
+    buckets: Iterable[T],
+    probe: Callable[[T], Awaitable[None]],
+) -> None:
+    """Probe the buckets with as many workers as requests can be in flight, each one taking the next bucket when its last probe is done.
+
+    Buckets are only produced as they are taken, so that no more than one per worker is held at once.
+    """
+
+    buckets = iter(buckets)
+
+    async def __worker() -> None:
+        for bucket in buckets:
+            await probe(bucket)
+
+    await asyncio.gather(*[__worker() for _ in range(client().concurrent_requests)])
+
+
+async def probe_types(
+    wordlist: Sequence[str],
+    input_document: str = "query { FUZZ }",
+) -> Set[str]:
+    """Enumerate the composite types of the schema by spreading inline fragments on guessed type names.
+
+    Unknown type names are answered with suggestions of close existing ones, which are probed in turn. Known types are told apart by the error their
+    fragment gets: only object, interface and union types are returned, the other ones being reachable through field and argument types anyway.
+    """
+
+    wordlist = as_wordlist(wordlist)
+    seen: Set[str] = set()
+    suggested: List[str] = []
+    composite: Set[str] = set()
+
+    async def __probation(bucket: List[str]) -> None:
+        document = input_document.replace(
+            "FUZZ", " ".join(f"... on {name} {{ __typename }}" for name in bucket)
+        )
+
+        suggestions: Set[str] = set()
+        response = await client().post(document)
+        for error in response.get("errors", []):
+            if isinstance(error, str):
+                continue
+
+            error_message = error["message"]
+            for regex in TYPE_REGEXES["COMPOSITE"]:
+                match = regex.fullmatch(error_message)
+                # Introspection types such as __Type aren't part of the schema
+                if match and not match.group("typename").startswith("__"):
+                    composite.add(match.group("typename"))
+
+            for regex in TYPE_REGEXES["NON_COMPOSITE"]:
+                match = regex.fullmatch(error_message)
+                if match:
+                    log().debug(
+                        f"Skip {match.group('typename')} because it is not a composite type"
+                    )
+
+            for regex in TYPE_REGEXES["UNKNOWN"]:
+                match = regex.fullmatch(error_message)
+                if match and match.group("suggestions"):
+                    suggestions |= {
+                        m.group("name")
+                        for m in QUOTED_NAME_REGEX.finditer(match.group("suggestions"))
+                    }
+
+        for name in sorted(suggestions):
+            if name.startswith("__"):
+                continue
+            if name not in seen and not in_wordlist(name, wordlist):
+                seen.add(name)
+                suggested.append(name)
+
+    total = -(-len(wordlist) // config().bucket_size)
+    await drain(
+        track(
+            batched(capitalized(wordlist), config().bucket_size),
+            description=f"Sending {total} types",
+            total=total,
+        ),
+        __probation,
+    )
+    while suggested:
+        candidates, suggested = suggested, []
+        await drain(batched(candidates, config().bucket_size), __probation)
+
+    log().debug(f"Enumerated types: {composite}")
+    return composite
+
+
+INTROSPECTION_WRAPPERS = ["query {{ {} }}", "query {{ ... {{ {} }} }}"]
+"""Operation shapes tried for introspection lookups, the second one hiding them in an inline fragment."""
+
+INTROSPECTION_SEPARATORS = [" ", " #\n"]
+"""Text between a meta field and its arguments, the second one defeating filters which expect `__type(`."""
+
+_TYPEREF_SELECTION = "kind name ofType { kind name ofType { kind name ofType { kind name ofType { kind name } } } }"
+_TYPE_SELECTION = (
+    "kind name possibleTypes { name } interfaces { name } enumValues(includeDeprecated: true) { name }"
+    + f" fields(includeDeprecated: true) {{ name args {{ name type {{ {_TYPEREF_SELECTION} }} }} type {{ {_TYPEREF_SELECTION} }} }}"
+    + f" inputFields {{ name type {{ {_TYPEREF_SELECTION} }} }}"
+)
+
+
+def get_referenced_types(typ: Dict[str, Any]) -> Set[str]:
+    """Names of the types an introspected type refers to through its fields, args, members and interfaces."""
+
+    refs: List[Dict[str, Any]] = list(typ.get("possibleTypes") or [])
+    refs += typ.get("interfaces") or []
+    for field in (typ.get("fields") or []) + (typ.get("inputFields") or []):
+        refs.append(field["type"])
+        refs += [arg["type"] for arg in field.get("args") or []]
+
+    names: Set[str] = set()
+    for ref in refs:
+        while ref.get("ofType"):
+            ref = ref["ofType"]
+        if ref.get("name"):
+            names.add(ref["name"])
+
+    return names
+
+
+async def probe_introspection_shape(
+    typename: str,
+) -> Optional[Tuple[str, str]]:
+    """Look for a shape of `__type` lookup the server answers, as a wrapper from `INTROSPECTION_WRAPPERS` and a separator from `INTROSPECTION_SEPARATORS`."""
+
+    for wrapper in INTROSPECTION_WRAPPERS:
+        for separator in INTROSPECTION_SEPARATORS:
+            document = wrapper.format(
+                f'leak: __type{separator}(name: "{typename}") {{ name }}'
+            )
+            response = await client().post(document)
+            if (response.get("data") or {}).get("leak"):
+                log().debug(f"__type lookups are answered for {document}")
+                return wrapper, separator
+
+    return None
+
+
+async def probe_partial_introspection(
+    wordlist: Sequence[str],
+    schema: graphql.Schema,
+) -> int:
+    """Fetch complete type definitions from `__type` lookups, if the server answers them even though `__schema` is blocked.
+
+    Dozens of aliased lookups are packed into each document. Candidate names are taken from `__schema { types { name } }` if it is open too, or else from
+    the types already in the schema and the capitalized wordlist. Types referenced by the fetched ones are looked up in turn, and every fetched type
+    replaces its entry in the schema.
+
+    Returns:
+        The number of fetched types, 0 meaning that nothing leaks.
+    """
+
+    roots = [t.name for t in schema.types.values() if t.kind == GraphQLKind.OBJECT]
+    shape = await probe_introspection_shape(roots[0]) if roots else None
+    if not shape:
+        log().debug("No partial introspection leak found")
+        return 0
+
+    wrapper, separator = shape
+
+    response = await client().post(
+        wrapper.format(f"leak: __schema{separator}{{ types {{ name }} }}")
+    )
+    leaked = (response.get("data") or {}).get("leak") or {}
+    wordlist = as_wordlist(wordlist)
+    seen: Set[str] = set(schema.types)
+    candidates: Iterable[str]
+    total = len(schema.types)
+    guessed = not leaked.get("types")
+    if not guessed:
+        seen = {t["name"] for t in leaked["types"]}
+        candidates = sorted(seen)
+        total = len(seen)
+    else:
+        # The wordlist is only read as buckets are sent
+        known = list(schema.types)
+        candidates = itertools.chain(
+            known, (c for c in capitalized(wordlist) if c not in known)
+        )
+        total += len(wordlist)
+
+    fetched = 0
+    referenced: List[str] = []
+
+    async def __probation(bucket: List[str]) -> None:
+        nonlocal fetched
+
+        document = wrapper.format(
+            " ".join(
+                f'alias{i}: __type{separator}(name: "{name}") {{ {_TYPE_SELECTION} }}'
+                for i, name in enumerate(bucket)
+            )
+        )
+
+        response = await client().post(document)
+        data = response.get("data") or {}
+        for i, name in enumerate(bucket):
+            typ = data.get(f"alias{i}")
+            if not typ:
+                continue
+
+            try:
+                schema.types[name] = graphql.Type.from_json(typ)
+            except (KeyError, TypeError, ValueError) as e:
+                log().debug(f"Unable to use the leaked definition of {name}: {e}")
+                continue
+            fetched += 1
+
+            for ref in get_referenced_types(typ):
+                if ref not in seen and not (guessed and in_wordlist(ref, wordlist)):
+                    seen.add(ref)
+                    referenced.append(ref)
+
+    size = config().bucket_size
+    while candidates:
+        await drain(
+            track(
+                batched((c for c in candidates if not c.startswith("__")), size),
+                description=f"Sending {-(-total // size)} __type lookups",
+                total=-(-total // size),
+            ),
+            __probation,
+        )
+        candidates, referenced = referenced, []
+        total = len(candidates)
+
+    log().info(f"Fetched {fetched} types through partial introspection")
+    return fetched
+
+
+def get_typeref_from_string(
+    typeref: str,
+    kind: str,
+) -> graphql.TypeRef:
+    """Build a TypeRef from its SDL notation (`[Int!]!`)."""
+
+    is_list = "[" in typeref and "]" in typeref
+    return graphql.TypeRef(
+        name=typeref.replace("!", "").replace("[", "").replace("]", ""),
+        kind=kind,
+        is_list=is_list,
+        non_null_item=is_list and "!]" in typeref,
+        non_null=typeref.endswith("!"),
+    )
+
+
+async def probe_input_values(  # pylint: disable=too-many-statements
+    wordlist: Sequence[str],
+    types: Dict[str, str],
+    skip: Optional[Dict[str, Set[str]]] = None,
+    priorities: Optional[Dict[str, List[str]]] = None,
+) -> Dict[str, Set[str]]:
+    """Sending a wordlist to check for the fields of input objects and the values of enums.
+
+    Each type gets a variable whose default value packs a bucket of candidates: a list of enum values, or an object with a `null` field for each
+    candidate. Default values are validated even though the variables are never used, so that no path to the types is needed. Candidates are kept unless
+    rejected, suggestions are added, and the type named by each error tells which variable it belongs to.
+
+    Args:
+        wordlist: The words that would leads to discovery.
+        types: The `ENUM` and `INPUT_OBJECT` types to explore, with their kind.
+        skip: Words not to send to each type.
+        priorities: Words to send to each type first, whether they are in the wordlist or not.
+
+    Returns:
+        The discovered fields or values of each type.
+    """
+
+    skip = skip or {}
+    priorities = priorities or {}
+
+    def __words(name: str) -> Iterator[str]:
+        first = dict.fromkeys(priorities.get(name, []))
+        rest = (w for w in wordlist if w not in first)
+        for w in itertools.chain(first, rest):
+            if (
+                NAME_REGEX.fullmatch(w)
+                and w not in ["true", "false", "null"]
+                and w not in skip.get(name, set())
+            ):
+                yield w
+
+    # Buckets are cut from the wordlist as they are sent, so that it is never copied
+    streams = {name: __words(name) for name in types}
+
+    def __chunks(typenames: List[str], size: int) -> List[List[str]]:
+        return [typenames[j : j + size] for j in range(0, len(typenames), size)]
+
+    async def __probation(
+        typenames: List[str], buckets: Dict[str, List[str]]
+    ) -> Dict[str, Set[str]]:
+        bucket = max(buckets.values(), key=len)
+        valid_values = {name: set(buckets[name]) for name in typenames}
+
+        definitions = []
+        for j, name in enumerate(typenames):
+            if types[name] == GraphQLKind.ENUM:
+                definitions.append(f"$v{j}: [{name}] = [{', '.join(buckets[name])}]")
+            else:
+                fields = ", ".join(f"{w}: null" for w in buckets[name])
+                definitions.append(f"$v{j}: {name} = {{{fields}}}")
+        document = f"query ({', '.join(definitions)}) {{ __typename }}"
+
+        response = await client().post(document)
+        errors = response.get("errors", [])
+
+        if len(typenames) > 1 and is_aborted(errors):
+            size = max(
+                1, min((config().max_errors or 0) // len(bucket), len(typenames) // 2)
+            )
+            merged: Dict[str, Set[str]] = {}
+            for result in await asyncio.gather(
+                *[
+                    __probation(chunk, {name: buckets[name] for name in chunk})
+                    for chunk in __chunks(typenames, size)
+                ]
+            ):
+                merged.update(result)
+            return merged
+
+        for error in errors:
+            if isinstance(error, str):
+                continue
+
+            error_message = error["message"]
+            for regex in TYPE_REGEXES["UNKNOWN"] + TYPE_REGEXES["NON_INPUT"]:
+                match = regex.fullmatch(error_message)
+                if match and match.group("typename") in valid_values:
+                    log().debug(f"Skip {match.group('typename')}: {error_message}")
+                    valid_values[match.group("typename")] = set()
+
+            for regex in (
+                INPUT_REGEXES["UNKNOWN_ENUM_VALUE"]
+                + INPUT_REGEXES["UNKNOWN_INPUT_FIELD"]
+                + INPUT_REGEXES["REQUIRED_INPUT_FIELD"]
+            ):
+                match = regex.fullmatch(error_message)
+                if not match or match.group("typename") not in valid_values:
+                    continue
+
+                values = valid_values[match.group("typename")]
+                if regex in INPUT_REGEXES["REQUIRED_INPUT_FIELD"]:
+                    values.add(match.group("name"))
+                    continue
+
+                values.discard(match.group("name"))
+                if match.group("suggestions"):
+                    values |= {
+                        m.group("name")
+                        for m in QUOTED_NAME_REGEX.finditer(match.group("suggestions"))
+                    }
+
+        return valid_values
+
+    max_errors = config().max_errors
+    typenames = list(types)
+    size = max(1, max_errors // config().bucket_size) if max_errors else len(typenames)
+
+    valid_values: Dict[str, Set[str]] = {name: set() for name in types}
+
+    async def __worker(typenames: List[str]) -> None:
+        while True:
+            buckets = {
+                name: list(itertools.islice(streams[name], config().bucket_size))
+                for name in typenames
+            }
+            buckets = {name: bucket for name, bucket in buckets.items() if bucket}
+            if not buckets:
+                return
+
+            for name, values in (await __probation(list(buckets), buckets)).items():
+                valid_values[name] |= values
+
+    # Create worker list, each one taking the next buckets when its last request is answered
+    longest = len(wordlist) + max([len(p) for p in priorities.values()] + [0])
+    count = min(client().concurrent_requests, -(-longest // config().bucket_size))
+    workers: List[asyncio.Task] = []
+    for chunk in __chunks(typenames, size) if typenames else []:
+        workers.extend(asyncio.create_task(__worker(chunk)) for _ in range(count))
+
+    for worker in track(
+        asyncio.as_completed(workers),
+        description=f"Sending {longest * len(typenames)} input values",
+        total=len(workers),
+    ):
+        await worker
+
+    return valid_values
+
+
+async def probe_input_field_typerefs(
+    fields: Dict[str, List[str]],
+) -> Dict[Tuple[str, str], graphql.TypeRef]:
+    """Deduce the types of the fields of input objects, packing them all into the default values of one document per probe value.
+
+    `{}` is rejected by scalars and enums, which name themselves, and `42` by input objects. `null` is then rejected by non-null fields with their full
+    type, lists included. Errors are attributed to their field through their location.
+    """
+
+    async def __probation(
+        targets: List[Tuple[str, str]],
+        value: str,
+    ) -> Dict[Tuple[str, str], Tuple[str, str]]:
+        """Send `value` to every target, returning the typeref strings and kinds found for them."""
+
+        by_type: Dict[str, List[str]] = {}
+        for typename, field in targets:
+            by_type.setdefault(typename, []).append(field)
+
+        document: BatchDocument[Tuple[str, str]] = BatchDocument("query (")
+        for j, (typename, names) in enumerate(by_type.items()):
+            document.append(
+                f"$v{j}: {typename} = {{" if not j else f", $v{j}: {typename} = {{"
+            )
+            for k, name in enumerate(names):
+                document.append(f"{name}: " if not k else f", {name}: ")
+                document.append(value, (typename, name))
+            document.append("}")
+        document.append(") { __typename }")
+
+        found: Dict[Tuple[str, str], Tuple[str, str]] = {}
+        response = await client().post(str(document))
+        for error in response.get("errors", []):
+            if isinstance(error, str):
+                continue
+
+            target = document.locate(error)
+            if not target:
+                continue
+
+            for kind, regexes in [
+                (GraphQLKind.ENUM, INPUT_REGEXES["ENUM"]),
+                (GraphQLKind.SCALAR, INPUT_REGEXES["SCALAR"]),
+                (GraphQLKind.INPUT_OBJECT, INPUT_REGEXES["EXPECTED"]),
+            ]:
+                match = next(
+                    (m for m in (r.fullmatch(error["message"]) for r in regexes) if m),
+                    None,
+                )
+                if match:
+                    found[target] = (match.group("typeref"), kind)
+                    break
+
+        return found
+
+    targets = [
+        (typename, field) for typename, names in fields.items() for field in names
+    ]
+    typerefs: Dict[Tuple[str, str], graphql.TypeRef] = {}
+
+    for value in ["{}", "42"]:
+        pending = [target for target in targets if target not in typerefs]
+        if not pending:
+            break
+
+        for target, (typeref, kind) in (await __probation(pending, value)).items():
+            if kind == GraphQLKind.INPUT_OBJECT and value != "42":
+                continue
+            typerefs[target] = get_typeref_from_string(typeref, kind)
+
+    typed = [target for target in targets if target in typerefs]
+    if typed:
+        for target, (typeref, _) in (await __probation(typed, "null")).items():
+            typerefs[target] = get_typeref_from_string(typeref, typerefs[target].kind)
+
+    return typerefs
+
+
+def known_names(kb: IKnowledgeBase, scope: str) -> List[str]:
+    """Names confirmed in the scope on earlier runs, or anywhere on the endpoint while the scope has none."""
+
+    return sorted(kb.valid_names(scope) or kb.valid_names())
+
+
+async def explore_input_types(
+    wordlist: Sequence[str],
+    schema: graphql.Schema,
+    typenames: List[str],
+) -> None:
+    """Fill in the fields of input objects and the values of enums of the schema."""
+
+    types = {name: schema.types[name].kind for name in typenames}
+
+    # Values confirmed on earlier runs go first, the ones rejected don't go at all
+    kb = knowledge()
+    skip: Dict[str, Set[str]] = {}
+    priorities: Dict[str, List[str]] = {}
+    if kb:
+        for name in typenames:
+            priorities[name] = known_names(kb, name)
+            skip[name] = kb.invalid_names(
+                name, itertools.chain(priorities[name], wordlist)
+            )
+    values = await probe_input_values(wordlist, types, skip, priorities)
+    log().debug(f"Input values: {values}")
+    if kb:
+        for name in typenames:
+            kb.record_names(
+                name,
+                values[name],
+                (
+                    w
+                    for w in itertools.chain(priorities[name], wordlist)
+                    if w not in skip[name] and w not in values[name]
+                ),
+            )
+
+    fields = {
+        name: sorted(values[name])
+        for name in typenames
+        if types[name] == GraphQLKind.INPUT_OBJECT
+    }
+    typerefs = await probe_input_field_typerefs(fields)
+
+    for name in typenames:
+        typ = schema.types[name]
+        if typ.kind == GraphQLKind.ENUM:
+            typ.enum_values = sorted(values[name])
+            continue
+
+        for field in fields[name]:
+            typeref = typerefs.get((name, field))
+            if not typeref:
+                log().debug(
+                    f"Skip input field {name}.{field} because its TypeRef is unknown"
+                )
+                continue
+
+            typ.fields.append(graphql.Field(field, typeref))
+            schema.add_type(typeref.name, typeref.kind)
+
+
+async def explore_fields(  # pylint: disable=too-many-locals
+    field_names: List[str],
     input_document: str,
-    wordlist: List[str],
+    wordlist: Sequence[str],
     typename: str,
-) -> Tuple[graphql.Field, List[graphql.InputValue]]:
-    """Perform exploration on a field."""
+) -> List[graphql.Field]:
+    """Perform exploration on the fields of a type, sharing argument probes between them.
+
+    Typerefs and args found on earlier runs are taken from the knowledge base, when there is one, and what is found here is recorded into it.
+    """
+
+    kb = knowledge()
+    cached = kb.typerefs(typename) if kb else {}
+    typerefs = await probe_field_types(
+        [name for name in field_names if name not in cached], input_document
+    )
+    for name in field_names:
+        if name in cached:
+            typerefs[name] = graphql.field_or_arg_type_from_json(cached[name])
+        elif kb and name in typerefs:
+            kb.record_typeref(typename, name, typerefs[name].to_json())
+
+    fields = [
+        graphql.Field(field_name, typerefs[field_name]) for field_name in field_names
+    ]
+
+    probed: List[graphql.Field] = []
+    for field in fields:
+        if field.type.kind in [GraphQLKind.SCALAR, GraphQLKind.ENUM]:
+            log().debug(
+                f'Skip probe_args() for "{field.name}" of type "{field.type.name}"'
+            )
+        else:
+            probed.append(field)
+
+    # Args confirmed on earlier runs go first, the ones rejected don't go at all
+    skip: Dict[str, Set[str]] = {}
+    priorities: Dict[str, List[str]] = {}
+    if kb:
+        for field in probed:
+            scope = f"{typename}.{field.name}"
+            priorities[field.name] = known_names(kb, scope)
+            skip[field.name] = kb.invalid_names(
+                scope, itertools.chain(priorities[field.name], wordlist)
+            )
 
-    typeref = await probe_field_type(
-        field_name,
+    arg_names = await probe_args_batch(
+        [field.name for field in probed],
+        wordlist,
         input_document,
+        skip,
+        priorities,
     )
 
-    args = []
-    field = graphql.Field(field_name, typeref)
-    if field.type.name in GraphQLPrimitive:
-        log().debug(f'Skip probe_args() for "{field.name}" of type "{field.type.name}"')
-    else:
-        arg_names = await probe_args(
-            field.name,
-            wordlist,
-            input_document,
+    targets: List[Tuple[str, str]] = []
+    cached_args: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    for field in probed:
+        log().debug(f"{typename}.{field.name}.args = {arg_names[field.name]}")
+        scope = f"{typename}.{field.name}"
+        if kb:
+            kb.record_names(
+                scope,
+                arg_names[field.name],
+                (
+                    w
+                    for w in itertools.chain(priorities[field.name], wordlist)
+                    if w not in skip[field.name] and w not in arg_names[field.name]
+                ),
+            )
+            for arg_name, typeref in kb.typerefs(scope).items():
+                cached_args[(field.name, arg_name)] = typeref
+        targets.extend(
+            (field.name, arg_name)
+            for arg_name in arg_names[field.name]
+            if (field.name, arg_name) not in cached_args
         )
 
-        log().debug(f"{typename}.{field_name}.args = {arg_names}")
-        for arg_name in arg_names:
-            arg_typeref = await probe_arg_typeref(field.name, arg_name, input_document)
+    arg_typerefs = await probe_arg_typerefs(targets, input_document)
+    for target, typeref in cached_args.items():
+        arg_typerefs[target] = graphql.field_or_arg_type_from_json(typeref)
+
+    for field in probed:
+        for arg_name in arg_names[field.name]:
+            arg_typeref = arg_typerefs.get((field.name, arg_name))
 
             if not arg_typeref:
                 log().debug(
@@ -572,21 +1815,211 @@ async def explore_field(
                 )
                 continue
 
-            arg = graphql.InputValue(arg_name, arg_typeref)
+            if kb and (field.name, arg_name) not in cached_args:
+                kb.record_typeref(
+                    f"{typename}.{field.name}", arg_name, arg_typeref.to_json()
+                )
+            field.args.append(graphql.InputValue(arg_name, arg_typeref))
 
-            field.args.append(arg)
-            args.append(arg)
+    return fields
 
-    return field, args
 
+async def confirm_fields(
+    schema: graphql.Schema,
+    typenames: Dict[str, str],
+) -> Dict[str, Set[str]]:
+    """Send the fields the schema already has for the type at each document in batches, removing the ones the server no longer accepts.
 
-async def clairvoyance(
-    wordlist: List[str],
+    Returns:
+        The confirmed fields of each document whose type has known fields, along with the ones suggested in the errors.
+    """
+
+    known: Dict[str, Set[str]] = {
+        document: {f.name for f in schema.types[typename].fields}
+        for document, typename in typenames.items()
+        if typename in schema.types and schema.types[typename].fields
+    }
+    if not known:
+        return {}
+
+    candidates = sorted(set().union(*known.values()))
+    confirmed = await probe_valid_fields_batch(
+        candidates,
+        list(known),
+        skip={document: set(candidates) - names for document, names in known.items()},
+        expand=False,
+    )
+    for document, names in known.items():
+        stale = names - confirmed[document]
+        if stale:
+            log().info(
+                f"Removed {stale} from {typenames[document]}, which no longer has them"
+            )
+            typ = schema.types[typenames[document]]
+            typ.fields = [f for f in typ.fields if f.name not in stale]
+
+    return confirmed
+
+
+async def is_unknown_type(
+    typename: str,
+    document: str,
+    schema: graphql.Schema,
+) -> bool:
+    """Whether the server says the type is unknown when its known fields are sent through its document."""
+
+    fields = " ".join(f.name for f in schema.types[typename].fields) or "__typename"
+    response = await client().post(document.replace("FUZZ", fields))
+    for error in response.get("errors", []):
+        if not isinstance(error, dict):
+            continue
+        for regex in TYPE_REGEXES["UNKNOWN"]:
+            match = regex.fullmatch(str(error.get("message")))
+            if match and match.group("typename") == typename:
+                return True
+
+    return False
+
+
+async def verify_schema(  # pylint: disable=too-many-locals
+    wordlist: Sequence[str],
+    schema: graphql.Schema,
+) -> Set[str]:
+    """Check a previously obtained schema against the server, and return the types that changed since.
+
+    Known fields are confirmed in batches, and so are the arguments of each type's fields, so that an unchanged schema only costs a handful of requests.
+    Stale fields are removed, fields whose arguments changed are explored again, and types that no longer exist are dropped. Fields inside an inline
+    fragment on an unknown type aren't validated, so types reached through one are confirmed to exist first, and only dropped once their fields sent
+    through their document are rejected for an unknown type. Types whose document changed along the way are checked again.
+
+    Input objects and enums are kept as they are.
+    """
+
+    changed: Set[str] = set()
+    seen: Set[Tuple[str, str]] = set()
+
+    while True:
+        documents: Dict[str, str] = {}
+        for typ in list(schema.types.values()):
+            if not typ.fields or typ.kind not in [
+                GraphQLKind.OBJECT,
+                GraphQLKind.INTERFACE,
+            ]:
+                continue
+            document = schema.get_document_for_type(typ.name)
+            if (typ.name, document) not in seen:
+                seen.add((typ.name, document))
+                documents[document] = typ.name
+        if not documents:
+            break
+
+        fragments = [
+            name for document, name in documents.items() if "... on " in document
+        ]
+        existing = await probe_types(fragments) if fragments else set()
+        unconfirmed = {
+            document: name
+            for document, name in documents.items()
+            if name in fragments and name not in existing
+        }
+        gone = await asyncio.gather(
+            *[
+                is_unknown_type(name, document, schema)
+                for document, name in unconfirmed.items()
+            ]
+        )
+        missing = {name for name, g in zip(unconfirmed.values(), gone) if g}
+        for name in unconfirmed.values():
+            if name in missing:
+                log().info(f"Removed {name}, which no longer exists")
+                del schema.types[name]
+            else:
+                log().warning(f"Kept {name}, which couldn't be confirmed to exist")
+        documents = {d: name for d, name in documents.items() if name not in missing}
+
+        known = {
+            document: {f.name for f in schema.types[name].fields}
+            for document, name in documents.items()
+        }
+        confirmed = await confirm_fields(schema, documents)
+        for document, names in confirmed.items():
+            if names != known[document]:
+                changed.add(documents[document])
+
+        # Fields still returning a type that no longer exists must return another one now
+        refresh: Dict[str, Set[str]] = {}
+        for typ in schema.types.values():
+            typ.possible_types = [t for t in typ.possible_types if t not in missing]
+            for field in typ.fields:
+                if field.type.name in missing:
+                    refresh.setdefault(typ.name, set()).add(field.name)
+
+        async def __args(document: str) -> Dict[str, Set[str]]:
+            targets = [
+                (f.name, [a.name for a in f.args])
+                for f in schema.types[documents[document]].fields
+                if f.args
+            ]
+            if not targets:
+                return {}
+            return await probe_valid_args_batch(targets, document)
+
+        found = await asyncio.gather(*[__args(document) for document in documents])
+        for document, args in zip(documents, found):
+            typ = schema.types[documents[document]]
+            for field in typ.fields:
+                if field.name in args and args[field.name] != {
+                    a.name for a in field.args
+                }:
+                    log().info(f"Arguments of {typ.name}.{field.name} changed")
+                    refresh.setdefault(typ.name, set()).add(field.name)
+
+        async def __refresh(typename: str) -> List[graphql.Field]:
+            kb = knowledge()
+            if kb:
+                kb.forget(typename, refresh[typename])
+                for name in refresh[typename]:
+                    kb.forget(f"{typename}.{name}")
+            return await explore_fields(
+                sorted(refresh[typename]),
+                schema.get_document_for_type(typename),
+                wordlist,
+                typename,
+            )
+
+        explored = await asyncio.gather(*[__refresh(typename) for typename in refresh])
+        for typename, fields in zip(refresh, explored):
+            typ = schema.types[typename]
+            typ.fields = [f for f in typ.fields if f.name not in refresh[typename]]
+            for field in fields:
+                for arg in field.args:
+                    schema.add_type(arg.type.name, arg.type.kind)
+                typ.fields.append(field)
+                schema.add_type(field.type.name, field.type.kind)
+            changed.add(typename)
+
+    return changed
+
+
+async def clairvoyance(  # pylint: disable=too-many-locals, too-many-statements
+    wordlist: Sequence[str],
     input_document: str,
     input_schema: Optional[Dict[str, Any]] = None,
+    input_documents: Optional[List[str]] = None,
+    candidates: Optional[CandidateModel] = None,
+    field_wordlist: Optional[Sequence[str]] = None,
+    owns: Optional[Callable[[str], bool]] = None,
 ) -> str:
+    """Explore the type at `input_document`, and the ones at `input_documents` in the same requests.
+
+    If given, `candidates` tells which fields to try first on each type, and learns from the ones found. Fields are brute-forced with `field_wordlist`
+    if given, args and the rest with `wordlist`. Fields found that `owns` is false of are left out, as something else explores them.
+    """
+
+    field_wordlist = wordlist if field_wordlist is None else field_wordlist
 
-    log().debug(f"input_document = {input_document}")
+    documents = [input_document] + (input_documents or [])
+    log().debug(f"input_documents = {documents}")
 
     if not input_schema:
         root_typenames = await fetch_root_typenames()
@@ -598,37 +2031,136 @@ async def clairvoyance(
     else:
         schema = graphql.Schema(schema=input_schema)
 
-    typename = await probe_typename(input_document)
-    log().debug(f"__typename = {typename}")
-
-    valid_fields = await probe_valid_fields(
-        wordlist,
-        input_document,
-    )
-    log().debug(f"{typename}.fields = {valid_fields}")
+    typenames: Dict[str, str] = {}
+    types = await asyncio.gather(*[probe_type(document) for document in documents])
+    for document, (typename, kind) in zip(documents, types):
+        log().debug(f"__typename = {typename}")
+
+        if kind == GraphQLKind.SCALAR:
+            log().debug(f"Skip {typename} because it is a leaf type")
+            schema.add_type(typename, kind)
+            if schema.types[typename].kind == GraphQLKind.OBJECT:
+                schema.types[typename].kind = kind
+        elif typename not in typenames.values():
+            typenames[document] = typename
+
+    # Fields the input schema already has are confirmed in batches instead of being swept and explored again
+    confirmed = await confirm_fields(schema, typenames)
+    known = {
+        document: {f.name for f in schema.types[typenames[document]].fields}
+        for document in confirmed
+    }
 
-    tasks: List[asyncio.Task] = []
-    for field_name in valid_fields:
-        tasks.append(
-            asyncio.create_task(
-                explore_field(
-                    field_name,
-                    input_document,
-                    wordlist,
+    # Fields confirmed on earlier runs go first, the ones rejected don't go at all
+    skip = {document: set(names) for document, names in known.items()}
+    kb = knowledge()
+    confirmed_names: Dict[str, List[str]] = {}
+    if kb:
+        for document, typename in typenames.items():
+            confirmed_names[document] = known_names(kb, typename)
+            skip.setdefault(document, set()).update(
+                kb.invalid_names(
                     typename,
+                    itertools.chain(confirmed_names[document], field_wordlist),
                 )
             )
+
+    # Members are hinted at by the errors of rejected words, which may no longer be sent
+    possible_types: Dict[str, Set[str]] = {}
+    if kb:
+        for typename in typenames.values():
+            members = kb.valid_names(f"... on {typename}")
+            if members:
+                possible_types[typename] = members
+
+    # Likely fields of each type go before the wordlist, whether they are in it or not
+    priorities: Dict[str, List[str]] = {}
+    for document, typename in typenames.items():
+        priorities[document] = (
+            candidates.candidates(typename, known.get(document, set()))
+            if candidates
+            else []
+        ) + confirmed_names.get(document, [])
+
+    valid_fields = await probe_valid_fields_batch(
+        field_wordlist,
+        list(typenames),
+        possible_types,
+        skip=skip,
+        priorities=priorities,
+    )
+    for document, names in known.items():
+        # Suggestions may name known fields again
+        valid_fields[document] = (valid_fields[document] | confirmed[document]) - names
+
+    if candidates:
+        for document, typename in typenames.items():
+            candidates.observe(
+                typename, valid_fields[document] | known.get(document, set())
+            )
+
+    if kb:
+        for document, typename in typenames.items():
+            kb.record_names(
+                typename,
+                valid_fields[document] | known.get(document, set()),
+                (
+                    w
+                    for w in itertools.chain(
+                        dict.fromkeys(priorities[document]), field_wordlist
+                    )
+                    if w not in skip.get(document, set())
+                    and w not in valid_fields[document]
+                ),
+            )
+        for typename, members in possible_types.items():
+            kb.record_names(f"... on {typename}", members, [])
+
+    if owns:
+        for document in typenames:
+            valid_fields[document] = {f for f in valid_fields[document] if owns(f)}
+
+    async def __explore(document: str) -> List[graphql.Field]:
+        typename = typenames[document]
+        log().debug(f"{typename}.fields = {valid_fields[document]}")
+
+        return await explore_fields(
+            list(valid_fields[document]),
+            document,
+            wordlist,
+            typename,
         )
 
-    for task in track(
-        asyncio.as_completed(tasks),
-        description=f"Processing {len(tasks)} responses",
-        total=len(tasks),
-    ):
-        field, args = await task
-        for arg in args:
-            schema.add_type(arg.type.name, "INPUT_OBJECT")
-        schema.types[typename].fields.append(field)
-        schema.add_type(field.type.name, "OBJECT")
+    results = await asyncio.gather(*[__explore(document) for document in typenames])
+    for document, fields in zip(typenames, results):
+        typename = typenames[document]
+        schema.add_type(typename, GraphQLKind.OBJECT)
+        for field in fields:
+            for arg in field.args:
+                schema.add_type(arg.type.name, arg.type.kind)
+            schema.types[typename].fields.append(field)
+            schema.add_type(field.type.name, field.type.kind)
+
+    # Only abstract types suggest inline fragments, and only interfaces have fields
+    for typename, members in possible_types.items():
+        log().debug(f"{typename}.possibleTypes = {members}")
+        schema.add_type(typename, GraphQLKind.OBJECT)
+        for member in sorted(members):
+            schema.add_type(member, GraphQLKind.OBJECT)
+            if member not in schema.types[typename].possible_types:
+                schema.types[typename].possible_types.append(member)
+        schema.types[typename].kind = (
+            GraphQLKind.INTERFACE
+            if schema.types[typename].fields
+            else GraphQLKind.UNION
+        )
+
+    # Hints suggest interfaces along with objects, but only the latter are possible types
+    for typ in schema.types.values():
+        typ.possible_types = [
+            t
+            for t in typ.possible_types
+            if t in schema.types and schema.types[t].kind == GraphQLKind.OBJECT
+        ]
 
     return repr(schema)
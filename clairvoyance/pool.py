@@ -0,0 +1,262 @@
+"""Pools of egress points, such as proxies or credentials, that requests are spread over."""
+
+import asyncio
+import contextlib
+import json
+import time
+from typing import AsyncIterator, Dict, Generic, List, Optional, TypeVar
+from urllib.parse import urlparse
+
+from clairvoyance.entities.context import log
+
+ROUND_ROBIN = "round-robin"
+LEAST_LOADED = "least-loaded"
+POLICIES = [ROUND_ROBIN, LEAST_LOADED]
+
+T = TypeVar("T")
+
+
+class TokenBucket:  # pylint: disable=too-few-public-methods
+    """`rate` requests per second on average, in bursts of up to `burst`."""
+
+    def __init__(self, rate: float, burst: Optional[float] = None) -> None:
+        self._rate = rate
+        self._burst = burst or max(rate, 1)
+        self._tokens = self._burst
+        self._updated = time.monotonic()
+
+    async def take(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(
+            self._burst, self._tokens + (now - self._updated) * self._rate
+        )
+        self._updated = now
+        # Taken ahead, so that the ones waiting leave one after the other
+        self._tokens -= 1
+        if self._tokens < 0:
+            await asyncio.sleep(-self._tokens / self._rate)
+
+
+class Member(Generic[T]):  # pylint: disable=too-many-instance-attributes
+    """A member of a pool, with its limits and how it has been doing.
+
+    Members are parked for the `cooldown` of their pool unless they have their own.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        value: T,
+        name: Optional[str] = None,
+        weight: int = 1,
+        concurrency: Optional[int] = None,
+        rate: Optional[float] = None,
+        cooldown: Optional[float] = None,
+    ) -> None:
+        self.value = value
+        self.name = name or str(value)
+        if weight < 1:
+            raise ValueError(f"The weight of {self.name} isn't a positive integer")
+        self.weight = weight
+        self.concurrency = concurrency
+        self.bucket = TokenBucket(rate) if rate else None
+        self.cooldown = cooldown
+
+        self.in_flight = 0
+        self.sent = 0
+        # In a row, and how many times it was parked since it last did well
+        self.failures = 0
+        self.parked = 0
+        self.parked_until = 0.0
+        # For the weighted round-robin
+        self.current_weight = 0
+
+    @property
+    def available(self) -> bool:
+        return self.parked_until <= time.time() and (
+            self.concurrency is None or self.in_flight < self.concurrency
+        )
+
+    def __repr__(self) -> str:
+        return self.name
+
+
+class Pool(Generic[T]):
+    """Members to spread requests over, by weighted round-robin or to the least loaded, within the concurrency and rate of each.
+
+    Members failing `max_failures` times in a row, throttled or rejected are parked for `cooldown` seconds, twice as long each time they are parked again,
+    while the others take their requests.
+    """
+
+    def __init__(
+        self,
+        members: List[Member[T]],
+        policy: str = ROUND_ROBIN,
+        cooldown: float = 60,
+        max_failures: int = 3,
+    ) -> None:
+        if not members:
+            raise ValueError("A pool needs members")
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown policy {policy}, use one of {POLICIES}")
+        self.members = members
+        self.policy = policy
+        self._cooldown = cooldown
+        self._max_failures = max_failures
+        # Made on first use, in the loop requests are sent from
+        self._changed: Optional[asyncio.Condition] = None
+
+    def _choose(self) -> Optional[Member[T]]:
+        available = [m for m in self.members if m.available]
+        if not available:
+            return None
+
+        if self.policy == LEAST_LOADED:
+            return min(available, key=lambda m: (m.in_flight / m.weight, m.failures))
+
+        # Smooth weighted round-robin: members take turns in proportion to their weights, without bursts
+        for member in available:
+            member.current_weight += member.weight
+        chosen = max(available, key=lambda m: m.current_weight)
+        chosen.current_weight -= sum(m.weight for m in available)
+        return chosen
+
+    @contextlib.asynccontextmanager
+    async def use(self) -> AsyncIterator[Member[T]]:
+        """Take a member for a request, waiting until one is available."""
+
+        if not self._changed:
+            self._changed = asyncio.Condition()
+        changed = self._changed
+
+        async with changed:
+            member = self._choose()
+            while not member:
+                now = time.time()
+                parked = [m.parked_until for m in self.members if m.parked_until > now]
+                try:
+                    # Until a request is done, or the first parked member is back
+                    await asyncio.wait_for(
+                        changed.wait(), min(parked) - now if parked else None
+                    )
+                except asyncio.TimeoutError:
+                    pass
+                member = self._choose()
+            member.in_flight += 1
+
+        try:
+            if member.bucket:
+                await member.bucket.take()
+            member.sent += 1
+            yield member
+        finally:
+            async with changed:
+                member.in_flight -= 1
+                changed.notify_all()
+
+    def succeeded(self, member: Member[T]) -> None:
+        member.failures = 0
+        member.parked = 0
+
+    def failed(self, member: Member[T]) -> None:
+        member.failures += 1
+        if member.failures >= self._max_failures:
+            self._park(member)
+
+    def throttled(self, member: Member[T], retry_after: Optional[float] = None) -> None:
+        self._park(member, retry_after)
+
+    def rejected(self, member: Member[T]) -> None:
+        """Park a member the endpoint turned down, such as a credential that expired."""
+
+        self._park(member)
+
+    def _park(self, member: Member[T], delay: Optional[float] = None) -> None:
+        if member.parked_until > time.time():
+            # Requests sent before it was parked fail too
+            member.failures = 0
+            return
+
+        delay = delay or (member.cooldown or self._cooldown) * 2 ** min(
+            member.parked, 6
+        )
+        log().warning(f"Parking {member} for {delay:.0f} seconds")
+        member.parked += 1
+        member.failures = 0
+        member.parked_until = time.time() + delay
+
+
+def load_proxies(path: str, policy: str = ROUND_ROBIN) -> Pool[str]:
+    """Read a pool of proxies from a file, one URL per line, each optionally followed by `weight=<int>`, `concurrency=<int>`, `rate=<float>` (requests
+    per second) and `cooldown=<float>` (seconds)."""
+
+    members: List[Member[str]] = []
+    with open(path, "r", encoding="utf-8") as f:
+        for i, line in enumerate(f, 1):
+            fields = line.split()
+            if not fields or fields[0].startswith("#"):
+                continue
+
+            url, *options = fields
+            settings = dict(option.partition("=")[::2] for option in options)
+            try:
+                proxy = urlparse(url)
+                members.append(
+                    Member(
+                        url,
+                        # Without the credentials, which don't go to the logs
+                        name=f"{proxy.scheme}://{proxy.hostname}:{proxy.port}",
+                        weight=int(settings.pop("weight", 1)),
+                        concurrency=(
+                            int(settings.pop("concurrency"))
+                            if "concurrency" in settings
+                            else None
+                        ),
+                        rate=(
+                            float(settings.pop("rate")) if "rate" in settings else None
+                        ),
+                        cooldown=(
+                            float(settings.pop("cooldown"))
+                            if "cooldown" in settings
+                            else None
+                        ),
+                    )
+                )
+            except ValueError as e:
+                raise ValueError(f"{path}:{i}: {e}") from e
+            if settings:
+                raise ValueError(f"{path}:{i}: unknown options {sorted(settings)}")
+
+    return Pool(members, policy)
+
+
+def load_credentials(path: str, policy: str = ROUND_ROBIN) -> Pool[Dict[str, str]]:
+    """Read a pool of credentials from a file, one JSON object per line with the `headers` to send, and optionally a `name` for the logs, a `weight`,
+    a `concurrency`, a `rate` (requests per second) and a `cooldown` (seconds)."""
+
+    members: List[Member[Dict[str, str]]] = []
+    with open(path, "r", encoding="utf-8") as f:
+        for i, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+
+            try:
+                credential = json.loads(line)
+                if not isinstance(credential, dict) or not isinstance(
+                    credential.get("headers"), dict
+                ):
+                    raise ValueError("a credential needs headers")
+                members.append(
+                    Member(
+                        credential["headers"],
+                        # Never the headers, which don't go to the logs
+                        name=credential.get("name", f"credential {len(members) + 1}"),
+                        weight=credential.get("weight", 1),
+                        concurrency=credential.get("concurrency"),
+                        rate=credential.get("rate"),
+                        cooldown=credential.get("cooldown"),
+                    )
+                )
+            except ValueError as e:
+                raise ValueError(f"{path}:{i}: {e}") from e
+
+    return Pool(members, policy)
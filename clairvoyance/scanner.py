@@ -0,0 +1,340 @@
+import asyncio
+import contextvars
+import functools
+import json
+import logging
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    TypeVar,
+)
+
+from clairvoyance import graphql, oracle
+from clairvoyance.config import Config
+from clairvoyance.entities import GraphQLKind, GraphQLPrimitive
+from clairvoyance.entities.context import (
+    client_ctx,
+    config_ctx,
+    knowledge_ctx,
+    log,
+    logger_ctx,
+)
+from clairvoyance.entities.errors import EndpointError
+from clairvoyance.entities.interfaces import IClient, IConfig, IKnowledgeBase
+from clairvoyance.wordlist import (
+    CandidateModel,
+    Shard,
+    as_wordlist,
+    load_default_wordlist,
+)
+
+T = TypeVar("T")
+
+
+class Scanner:
+    """Blind introspection of the endpoint of a client.
+
+    A scanner doesn't depend on the context it is used from: each call runs in a task of its own, where `client()`, `config()`, `log()` and
+    `knowledge()` resolve to the scanner's objects, so that many scanners can run at once in the same event loop.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        client: IClient,
+        config: Optional[IConfig] = None,
+        wordlist: Optional[Sequence[str]] = None,
+        logger: Optional[logging.Logger] = None,
+        knowledge: Optional[IKnowledgeBase] = None,
+        candidates: Optional[CandidateModel] = None,
+    ) -> None:
+        self.client = client
+        # Made aside, as a new config sets itself in the current context
+        self.config = config or contextvars.copy_context().run(Config)
+        self.wordlist = wordlist or load_default_wordlist()
+        self.logger = logger or logging.getLogger("clairvoyance")
+        self.knowledge = knowledge
+        self.candidates = candidates
+
+    async def _run(self, coroutine: Awaitable[T]) -> T:
+        async def __run() -> T:
+            client_ctx.set(self.client)
+            config_ctx.set(self.config)
+            logger_ctx.set(self.logger)
+            knowledge_ctx.set(self.knowledge)
+            return await coroutine
+
+        # A task runs in a copy of the current context, so what it sets stays its own
+        return await asyncio.ensure_future(__run())
+
+    async def scan(
+        self,
+        input_document: Optional[str] = None,
+        input_schema: Optional[Dict[str, Any]] = None,
+        enumerate_types: bool = False,
+        verify: bool = False,
+        output_path: Optional[str] = None,
+        progress: Optional[Callable[[str], None]] = None,
+        shard: Optional[Shard] = None,
+    ) -> graphql.Schema:
+        """Brute-force the schema from `input_document` on, starting from `input_schema` if given.
+
+        With `verify`, only the types of `input_schema` that changed are brute-forced again. As the schema grows, it is written to `output_path` and
+        passed to `progress`. With a `shard`, the root types are brute-forced with the shard's words only, and only the other types of the shard's names
+        are explored. Types found by one shard for another are explored by that shard on the next round, from the merge of the outputs.
+        """
+
+        return await self._run(
+            self._scan(
+                input_document,
+                input_schema,
+                enumerate_types,
+                verify,
+                output_path,
+                progress,
+                shard,
+            )
+        )
+
+    async def start(
+        self,
+        input_document: Optional[str] = None,
+        enumerate_types: bool = False,
+    ) -> graphql.Schema:
+        """The schema a scan starts from: the root types, and whatever the endpoint leaks through partial introspection."""
+
+        return await self._run(self._start(input_document, enumerate_types))
+
+    async def _start(
+        self,
+        input_document: Optional[str],
+        enumerate_types: bool,
+    ) -> graphql.Schema:
+        s = await self._roots(None)
+        await self._leak(
+            s, self.wordlist, input_document or "query { FUZZ }", enumerate_types
+        )
+        return graphql.Schema(schema=json.loads(repr(s)))
+
+    async def _roots(self, input_schema: Optional[Dict[str, Any]]) -> graphql.Schema:
+        """The input schema, or the root types of the endpoint, once it's known to answer."""
+
+        # Empty responses would pass every word as valid
+        if not await self.client.post("query { __typename }"):
+            raise EndpointError(f"{self.client.url} doesn't answer GraphQL requests")
+
+        if input_schema:
+            return graphql.Schema(schema=input_schema)
+        root_typenames = await oracle.fetch_root_typenames()
+        return graphql.Schema(
+            query_type=root_typenames["queryType"],
+            mutation_type=root_typenames["mutationType"],
+            subscription_type=root_typenames["subscriptionType"],
+        )
+
+    async def _leak(
+        self,
+        s: graphql.Schema,
+        words: Sequence[str],
+        input_document: str,
+        enumerate_types: bool,
+    ) -> int:
+        """Add the types named like the words if asked, and the ones partial introspection leaks, to the schema; the number of leaked types is returned."""
+
+        if enumerate_types:
+            for typename in await oracle.probe_types(words, input_document):
+                s.add_type(typename, GraphQLKind.OBJECT)
+        return await oracle.probe_partial_introspection(words, s)
+
+    async def explore_type(self, name: str, schema: graphql.Schema) -> graphql.Schema:
+        """Brute-force the fields of the type `name` of `schema`, and return the schema with them."""
+
+        return await self.explore_types([name], schema)
+
+    async def explore_types(
+        self,
+        names: List[str],
+        schema: graphql.Schema,
+        shard: Optional[Shard] = None,
+    ) -> graphql.Schema:
+        """Brute-force the fields of the types `names` of `schema` in the same requests, and return the schema with them.
+
+        With a `shard`, fields are brute-forced with the shard's words only, and only the ones the shard owns are explored.
+        """
+
+        return await self._run(self._explore_types(names, schema, shard))
+
+    async def _explore_types(
+        self,
+        names: List[str],
+        schema: graphql.Schema,
+        shard: Optional[Shard],
+    ) -> graphql.Schema:
+        wordlist = as_wordlist(self.wordlist)
+        documents = [schema.get_document_for_type(name) for name in names]
+        explored = await oracle.clairvoyance(
+            wordlist,
+            input_document=documents[0],
+            input_schema=json.loads(repr(schema)),
+            input_documents=documents[1:],
+            candidates=self.candidates,
+            field_wordlist=shard.words(wordlist) if shard else None,
+            owns=functools.partial(shard.owns, wordlist=wordlist) if shard else None,
+        )
+        return graphql.Schema(schema=json.loads(explored))
+
+    async def explore_input_types(
+        self, names: List[str], schema: graphql.Schema
+    ) -> graphql.Schema:
+        """Find the fields of the input objects and the values of the enums `names` of `schema`, and return the schema with them."""
+
+        return await self._run(self._explore_input_types(names, schema))
+
+    async def _explore_input_types(
+        self, names: List[str], schema: graphql.Schema
+    ) -> graphql.Schema:
+        s = graphql.Schema(schema=json.loads(repr(schema)))
+        await oracle.explore_input_types(self.wordlist, s, names)
+        return graphql.Schema(schema=json.loads(repr(s)))
+
+    async def _scan(  # pylint: disable=too-many-locals, too-many-branches, too-many-statements
+        self,
+        input_document: Optional[str],
+        input_schema: Optional[Dict[str, Any]],
+        enumerate_types: bool,
+        verify: bool,
+        output_path: Optional[str],
+        progress: Optional[Callable[[str], None]],
+        shard: Optional[Shard],
+    ) -> graphql.Schema:
+        wordlist = as_wordlist(self.wordlist)
+        # Names are guessed by all shards at once, each with its own words
+        shard_words = shard.words(wordlist) if shard else wordlist
+        root_wordlist: Optional[Sequence[str]] = None
+        owns: Optional[Callable[[str], bool]] = None
+        resumed = input_schema is not None
+
+        def write(schema: str) -> None:
+            if output_path:
+                with open(output_path, "w", encoding="utf-8") as f:
+                    f.write(schema)
+            if progress:
+                progress(schema)
+
+        input_document = input_document or "query { FUZZ }"
+        ignored = set(e.value for e in GraphQLPrimitive)
+        explored_inputs: Set[str] = set()
+
+        def disown(s: graphql.Schema) -> None:
+            """Leave the types of other shards to them, once they find them or from a merge of the outputs."""
+
+            if shard:
+                ignored.update(
+                    t for t in s.get_types_without_fields(ignored) if t not in shard
+                )
+                explored_inputs.update(
+                    t
+                    for t in s.get_input_types_without_values(explored_inputs)
+                    if t not in shard
+                )
+
+        def next_documents(s: graphql.Schema) -> List[str]:
+            disown(s)
+            _next = s.get_types_without_fields(
+                ignored, limit=self.config.type_batch_size
+            )
+            ignored.update(_next)
+            return [s.get_document_for_type(t) for t in _next]
+
+        s = await self._roots(input_schema)
+
+        if verify:
+            assert input_schema, "Verifying needs an input schema"
+
+            # Only brute-force around the types that changed since the input schema
+            changed = await oracle.verify_schema(wordlist, s)
+            schema = repr(s)
+            input_schema = json.loads(schema)
+            s = graphql.Schema(schema=input_schema)
+
+            documents = [
+                s.get_document_for_type(t)
+                for t in changed
+                if t in s.types and (not shard or t in shard)
+            ]
+            documents += next_documents(s)
+            write(schema)
+        else:
+            leaked = await self._leak(s, shard_words, input_document, enumerate_types)
+            schema = repr(s)
+            input_schema = json.loads(schema)
+            s = graphql.Schema(schema=input_schema)
+
+            if leaked:
+                # Only explore what the leaks left out
+                documents = next_documents(s)
+                write(schema)
+            else:
+                # Every root operation type is a starting point of its own
+                roots = [r for r in s.root_types if not s.types[r].fields]
+                ignored.update(roots)
+                documents = list(
+                    dict.fromkeys(
+                        [input_document] + [s.get_document_for_type(r) for r in roots]
+                    )
+                )
+                if shard:
+                    root_wordlist = shard_words
+                    # Suggestions name the fields of other shards too
+                    owns = functools.partial(shard.owns, wordlist=wordlist)
+                    if resumed:
+                        # The first round swept the root types that have fields
+                        documents = [s.get_document_for_type(r) for r in roots]
+
+        iterations = 1
+        # The input types an earlier round left are explored even with no other type to brute-force
+        while True:
+            if documents:
+                log().info(f"Iteration {iterations}")
+                iterations += 1
+                schema = await oracle.clairvoyance(
+                    wordlist,
+                    input_document=documents[0],
+                    input_schema=input_schema,
+                    input_documents=documents[1:],
+                    candidates=self.candidates,
+                    field_wordlist=root_wordlist,
+                    owns=owns,
+                )
+                write(schema)
+                input_schema = json.loads(schema)
+                s = graphql.Schema(schema=input_schema)
+
+            # Only the root types are shared by the words of all shards
+            root_wordlist = None
+            owns = None
+
+            # Input types found along the way, and the ones their fields lead to
+            disown(s)
+            inputs = s.get_input_types_without_values(explored_inputs)
+            while inputs:
+                explored_inputs.update(inputs)
+                await oracle.explore_input_types(wordlist, s, inputs)
+                disown(s)
+                inputs = s.get_input_types_without_values(explored_inputs)
+
+                schema = repr(s)
+                write(schema)
+                input_schema = json.loads(schema)
+                s = graphql.Schema(schema=input_schema)
+
+            documents = next_documents(s)
+            if not documents:
+                break
+
+        return s
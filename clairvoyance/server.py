@@ -0,0 +1,322 @@
+import asyncio
+import copy
+import itertools
+import json
+import logging
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import aiohttp
+from aiohttp import web
+
+from clairvoyance import graphql
+from clairvoyance.client import Client, Limits
+from clairvoyance.config import Config
+from clairvoyance.connections import ConnectionStats, open_session
+from clairvoyance.knowledge import KnowledgeBase
+from clairvoyance.scanner import Scanner
+from clairvoyance.wordlist import learn_candidates, load_default_wordlist
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+
+class Job:  # pylint: disable=too-many-instance-attributes
+    """A scan of one target, and the schema found so far."""
+
+    def __init__(self, target: Dict[str, Any], priority: int = 0) -> None:
+        self.id = uuid.uuid4().hex
+        self.target = target
+        self.priority = priority
+        self.status = QUEUED
+        self.schema: Optional[str] = None
+        self.error: Optional[str] = None
+        self.created = time.time()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.task: Optional["asyncio.Future[Any]"] = None
+        self._listeners: List["asyncio.Queue[Dict[str, Any]]"] = []
+
+    @property
+    def done(self) -> bool:
+        return self.status in (DONE, FAILED, CANCELLED)
+
+    def state(self, schema: bool = False) -> Dict[str, Any]:
+        """What the API tells about the job, with the schema if asked."""
+
+        state = {
+            "id": self.id,
+            "url": self.target["url"],
+            "priority": self.priority,
+            "status": self.status,
+            "error": self.error,
+            "created": self.created,
+            "started": self.started,
+            "finished": self.finished,
+        }
+        if schema:
+            state["schema"] = json.loads(self.schema) if self.schema else None
+        return state
+
+    def update(self, **changes: Any) -> None:
+        """Change the job, and tell the ones listening to it."""
+
+        for name, value in changes.items():
+            setattr(self, name, value)
+        if self._listeners:
+            event = self.state(schema="schema" in changes)
+            for listener in self._listeners:
+                listener.put_nowait(event)
+
+    def listen(self) -> "asyncio.Queue[Dict[str, Any]]":
+        listener: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue()
+        self._listeners.append(listener)
+        return listener
+
+    def unlisten(self, listener: "asyncio.Queue[Dict[str, Any]]") -> None:
+        self._listeners.remove(listener)
+
+
+class ScanServer:  # pylint: disable=too-many-instance-attributes
+    """Scan jobs submitted over a local HTTP API, by priority, with the wordlist, candidate model and connection pool loaded once.
+
+    `POST /jobs` takes a target like the ones of `--targets` with an optional `priority` (higher first), but with the `input_schema` itself rather than
+    a path and without `delta`. `GET /jobs` and `GET /jobs/{id}` tell how jobs are doing, `GET /jobs/{id}/events` streams their status and schema as
+    JSON lines, and `DELETE /jobs/{id}` cancels one.
+    """
+
+    # Made on startup, in the loop the server runs in
+    _queue: "asyncio.PriorityQueue[Tuple[int, int, Job]]"
+    _limits: Limits
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        logger: logging.Logger,
+        wordlist: Sequence[str],
+        jobs: Optional[int] = None,
+        headers: Optional[Dict[str, str]] = None,
+        input_document: Optional[str] = None,
+        host_concurrent_requests: Optional[int] = None,
+        total_concurrent_requests: Optional[int] = None,
+        corpus: Optional[List[str]] = None,
+        disable_ssl_verify: Optional[bool] = None,
+        **options: Any,
+    ) -> None:
+        self._logger = logger
+        self._wordlist = wordlist or load_default_wordlist()
+        self._workers = jobs or 4
+        self._headers = headers or {}
+        self._input_document = input_document
+        self._candidates = learn_candidates(corpus or [])
+        self._disable_ssl_verify = disable_ssl_verify or False
+        self._options = options
+        self._host_concurrent_requests = host_concurrent_requests
+        self._total_concurrent_requests = total_concurrent_requests
+
+        self._jobs: Dict[str, Job] = {}
+        self._order = itertools.count()
+        self._tasks: List["asyncio.Future[None]"] = []
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._stats = ConnectionStats()
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.add_routes(
+            [
+                web.post("/jobs", self.submit),
+                web.get("/jobs", self.list_jobs),
+                web.get("/jobs/{id}", self.get_job),
+                web.get("/jobs/{id}/events", self.stream_job),
+                web.delete("/jobs/{id}", self.cancel_job),
+            ]
+        )
+        app.on_startup.append(self._start)
+        app.on_cleanup.append(self._stop)
+        return app
+
+    async def _start(self, _: web.Application) -> None:
+        self._queue = asyncio.PriorityQueue()
+        self._limits = Limits(
+            self._host_concurrent_requests, self._total_concurrent_requests
+        )
+        # Connections stay open across jobs, so that a job to a known host starts without a handshake
+        self._session = open_session(
+            self._limits.total_concurrent_requests,
+            limit_per_host=self._limits.host_concurrent_requests,
+            keepalive_timeout=self._options.get("keepalive_timeout"),
+            dns_ttl=self._options.get("dns_ttl"),
+            disable_ssl_verify=self._disable_ssl_verify,
+            stats=self._stats,
+        )
+        self._tasks = [
+            asyncio.ensure_future(self._work()) for _ in range(self._workers)
+        ]
+
+    async def _stop(self, _: web.Application) -> None:
+        for job in self._jobs.values():
+            if job.task:
+                job.task.cancel()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._session:
+            await self._session.close()
+            self._logger.info(f"Sent {self._stats}")
+
+    def _job(self, request: web.Request) -> Job:
+        job = self._jobs.get(request.match_info["id"])
+        if not job:
+            raise web.HTTPNotFound(text="No such job")
+        return job
+
+    async def submit(self, request: web.Request) -> web.Response:
+        try:
+            target = await request.json()
+        except json.JSONDecodeError:
+            raise web.HTTPBadRequest(  # pylint: disable=raise-missing-from
+                text="A job is a JSON object"
+            )
+        if not isinstance(target, dict) or not target.get("url"):
+            raise web.HTTPBadRequest(text="A job needs a url")
+        if "delta" in target:
+            raise web.HTTPBadRequest(text="Jobs don't take a delta")
+        if "input_schema" in target:
+            # The schema itself rather than the path of a file, which the server may not see
+            try:
+                graphql.Schema(schema=target["input_schema"])
+            except (AttributeError, KeyError, TypeError):
+                raise web.HTTPBadRequest(  # pylint: disable=raise-missing-from
+                    text="A job's input_schema is a schema as clairvoyance outputs it"
+                )
+
+        job = Job(target, priority=int(target.pop("priority", 0)))
+        self._jobs[job.id] = job
+        self._queue.put_nowait((-job.priority, next(self._order), job))
+        self._logger.info(f"Queued job {job.id} on {job.target['url']}")
+        return web.json_response(job.state(), status=201)
+
+    async def list_jobs(self, _: web.Request) -> web.Response:
+        return web.json_response([job.state() for job in self._jobs.values()])
+
+    async def get_job(self, request: web.Request) -> web.Response:
+        return web.json_response(self._job(request).state(schema=True))
+
+    async def stream_job(self, request: web.Request) -> web.StreamResponse:
+        job = self._job(request)
+        response = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+        await response.prepare(request)
+
+        listener = job.listen()
+        try:
+            event = job.state(schema=True)
+            while True:
+                await response.write(json.dumps(event).encode() + b"\n")
+                if event["status"] in (DONE, FAILED, CANCELLED):
+                    break
+                event = await listener.get()
+        finally:
+            job.unlisten(listener)
+
+        await response.write_eof()
+        return response
+
+    async def cancel_job(self, request: web.Request) -> web.Response:
+        job = self._job(request)
+        if job.task:
+            job.task.cancel()
+        elif not job.done:
+            # Its worker skips it
+            job.update(status=CANCELLED, finished=time.time())
+        return web.json_response(job.state())
+
+    async def _work(self) -> None:
+        while True:
+            _, _, job = await self._queue.get()
+            if job.done:
+                continue
+
+            job.task = asyncio.ensure_future(self._scan(job))
+            # Waiting doesn't cancel the job along with the worker
+            await asyncio.wait([job.task])
+            job.task = None
+            if not job.done:
+                # Cancelled before it started
+                job.update(status=CANCELLED, finished=time.time())
+
+    async def _scan(self, job: Job) -> None:
+        target = job.target
+        job.update(status=RUNNING, started=time.time())
+        self._logger.info(f"Starting job {job.id} on {target['url']}")
+
+        client = Client(
+            target["url"],
+            headers={**self._headers, **target.get("headers", {})},
+            concurrent_requests=self._options.get("concurrent_requests"),
+            proxy=self._options.get("proxy"),
+            proxies=self._options.get("proxies"),
+            credentials=self._options.get("credentials"),
+            max_retries=self._options.get("max_retries"),
+            backoff=self._options.get("backoff"),
+            limits=self._limits.of(target["url"]),
+            session=self._session,
+        )
+        kb = None
+        if self._options.get("knowledge_base"):
+            kb = KnowledgeBase(
+                self._options["knowledge_base"],
+                target["url"],
+                ttl=self._options.get("knowledge_ttl"),
+            )
+        scanner = Scanner(
+            client,
+            Config(),
+            wordlist=self._wordlist,
+            logger=self._logger,
+            knowledge=kb,
+            candidates=copy.deepcopy(self._candidates),
+        )
+
+        try:
+            if self._options.get("warmup"):
+                await client.warm_up(self._options["warmup"])
+            schema = await scanner.scan(
+                target.get("document", self._input_document),
+                target.get("input_schema"),
+                enumerate_types=self._options.get("enumerate_types", False),
+                progress=lambda schema: job.update(schema=schema),
+            )
+        except asyncio.CancelledError:
+            job.update(status=CANCELLED, finished=time.time())
+            self._logger.info(f"Cancelled job {job.id}")
+        except Exception as e:  # pylint: disable=broad-except
+            job.update(status=FAILED, error=repr(e), finished=time.time())
+            self._logger.error(f"Job {job.id} on {target['url']} failed: {e!r}")
+        else:
+            job.update(status=DONE, schema=repr(schema), finished=time.time())
+            self._logger.info(f"Finished job {job.id}")
+        finally:
+            await client.close()
+            if kb:
+                kb.close()
+
+
+def serve(
+    address: str,
+    logger: logging.Logger,
+    wordlist: Sequence[str],
+    **kwargs: Any,
+) -> None:
+    """Run a scan server on `[host:]port` until interrupted."""
+
+    host, _, port = address.rpartition(":")
+    server = ScanServer(logger, wordlist, **kwargs)
+    web.run_app(
+        server.app(),
+        host=host or "127.0.0.1",
+        port=int(port),
+        print=None,
+    )
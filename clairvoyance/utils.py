@@ -5,6 +5,9 @@ from typing import Any, Iterable, List
 
 from rich.progress import track as rich_track
 
+from clairvoyance.pool import POLICIES, ROUND_ROBIN
+from clairvoyance.wordlist import Shard
+
 
 class Tracker:
     __enabled = False
@@ -87,8 +90,12 @@ def parse_args(args: List[str]) -> argparse.Namespace:
         "-w",
         "--wordlist",
         metavar="<file>",
-        type=argparse.FileType("r"),
-        help="This wordlist will be used for all brute force effots (fields, arguments and so on)",
+        help="This wordlist will be used for all brute force effots (fields, arguments and so on), one word per line or compiled with --compile-wordlist",
+    )
+    parser.add_argument(
+        "--compile-wordlist",
+        metavar="<file>",
+        help="Compile the wordlist, de-duplicated, validated and ranked by --corpus, into a memory-mapped file to pass to -w on later runs",
     )
     parser.add_argument(
         "-wv",
@@ -96,6 +103,13 @@ def parse_args(args: List[str]) -> argparse.Namespace:
         action="store_true",
         help="Validate the wordlist items match name Regex",
     )
+    parser.add_argument(
+        "--corpus",
+        metavar="<path>",
+        action="append",
+        default=[],
+        help="Schema, such as an earlier output, or directory of schemas to rank the wordlist by; can be given several times",
+    )
     parser.add_argument(
         "-x",
         "--proxy",
@@ -103,12 +117,56 @@ def parse_args(args: List[str]) -> argparse.Namespace:
         type=str,
         help="Define a proxy to use for all requests. For more info, read https://docs.aiohttp.org/en/stable/client_advanced.html?highlight=proxy",
     )
+    parser.add_argument(
+        "--proxies",
+        metavar="<file>",
+        help="Spread requests over the proxies of this file, one URL per line optionally followed by weight=<int>, concurrency=<int> and rate=<float> "
+        "(requests per second); failing or throttled proxies are left alone for a while",
+    )
+    parser.add_argument(
+        "--proxy-policy",
+        choices=POLICIES,
+        default=ROUND_ROBIN,
+        help="How to pick the proxy of each request from --proxies: weighted round-robin, or the one with the fewest requests in flight per weight "
+        "(default round-robin)",
+    )
+    parser.add_argument(
+        "--credentials",
+        metavar="<file>",
+        help="Spread requests over the credentials of this file, one JSON object per line with the headers to add to -H, see README.md; "
+        "throttled or rejected credentials are left alone for a while",
+    )
+    parser.add_argument(
+        "--credential-policy",
+        choices=POLICIES,
+        default=ROUND_ROBIN,
+        help="How to pick the credential of each request from --credentials, like --proxy-policy (default round-robin)",
+    )
     parser.add_argument(
         "-k",
         "--no-ssl",
         action="store_true",
         help="Disable SSL verification",
     )
+    parser.add_argument(
+        "--keepalive",
+        metavar="<seconds>",
+        type=float,
+        help="How long idle connections are kept open for the next requests (default 15)",
+    )
+    parser.add_argument(
+        "--dns-ttl",
+        metavar="<seconds>",
+        type=int,
+        help="How long resolved hostnames are cached, 0 not to cache them (default 10)",
+    )
+    parser.add_argument(
+        "--warmup",
+        metavar="<int>",
+        type=int,
+        default=0,
+        help="Open up to this many connections, at most -c, before the scan sends requests, so that handshakes don't slow it down",
+    )
     parser.add_argument(
         "-m",
         "--max-retries",
@@ -131,14 +189,100 @@ def parse_args(args: List[str]) -> argparse.Namespace:
         help="Select a speed profile. fast mod will set lot of workers to provide you quick result"
         + " but if the server as some rate limit you may want to use slow mod.",
     )
+    parser.add_argument(
+        "-et",
+        "--enumerate-types",
+        action="store_true",
+        help="Enumerate type names through inline fragments before exploring fields, to reach types no known field returns",
+    )
+    parser.add_argument(
+        "--delta",
+        metavar="<file>",
+        help="Verify the input schema in bulk, brute-force only the types that changed, and write the added and removed names to this file",
+    )
+    parser.add_argument(
+        "--kb",
+        metavar="<file>",
+        help="SQLite knowledge base remembering the names confirmed and rejected on each endpoint, and the typerefs found there, across runs",
+    )
+    parser.add_argument(
+        "--kb-ttl",
+        metavar="<days>",
+        type=float,
+        default=7,
+        help="Forget what the knowledge base learned more than this many days ago (default 7)",
+    )
+    parser.add_argument(
+        "--kb-reset",
+        action="store_true",
+        help="Forget everything the knowledge base knows about the endpoint before starting",
+    )
+    parser.add_argument(
+        "--targets",
+        metavar="<file>",
+        help='Scan many endpoints at once in this process: one JSON object per line, such as {"url": ..., "output": ..., "headers": {...}, '
+        + '"document": ..., "input_schema": ..., "delta": ...}, headers and document defaulting to the command line ones',
+    )
+    parser.add_argument(
+        "--host-concurrent-requests",
+        metavar="<int>",
+        type=int,
+        help="Number of concurrent requests to send to a host across --targets or --serve jobs (default 50)",
+    )
+    parser.add_argument(
+        "--total-concurrent-requests",
+        metavar="<int>",
+        type=int,
+        help="Number of concurrent requests to send in total across --targets or --serve jobs (default 200)",
+    )
+    parser.add_argument(
+        "--shard",
+        metavar="<i/N>",
+        type=Shard.parse,
+        help="Only do the i-th of N parts of the scan, so that N machines can share it and --merge their outputs",
+    )
+    parser.add_argument(
+        "--merge",
+        metavar="<file>",
+        nargs="+",
+        help="Merge these outputs, such as the ones of the --shard parts of a scan, into one schema, and list the conflicts",
+    )
+    parser.add_argument(
+        "--queue",
+        metavar="<file>",
+        help="Share the scan with the other workers of this SQLite work queue, on this machine or others, see README.md",
+    )
+    parser.add_argument(
+        "--serve",
+        metavar="<[host:]port>",
+        help="Serve a local HTTP API taking scan jobs, see README.md",
+    )
+    parser.add_argument(
+        "--jobs",
+        metavar="<int>",
+        type=int,
+        help="Number of jobs to run at once with --serve (default 4)",
+    )
     parser.add_argument(
         "--progress",
         action="store_true",
         help="Enable progress bar",
     )
-    parser.add_argument("url")
+    parser.add_argument("url", nargs="?")
 
     parsed_args = parser.parse_args(args)
+    if not (
+        parsed_args.url
+        or parsed_args.targets
+        or parsed_args.serve
+        or parsed_args.merge
+        or parsed_args.compile_wordlist
+    ):
+        parser.error(
+            "the following arguments are required: url, --targets, --serve, --merge or --compile-wordlist"
+        )
+    if parsed_args.proxy and parsed_args.proxies:
+        parser.error("-x/--proxy and --proxies don't go together")
     if parsed_args.profile == "slow":
         set_slow_config(parsed_args)
 
@@ -0,0 +1,672 @@
+"""Storage and ordering of wordlists, and candidates beyond them, by how likely each word is to be a name of the target schema."""
+
+import array
+import bisect
+import collections
+import importlib
+import itertools
+import json
+import math
+import mmap
+import os
+import re
+import struct
+import sys
+import zlib
+from pathlib import Path
+from typing import (
+    Any,
+    Container,
+    Counter,
+    DefaultDict,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+    overload,
+)
+
+# NumPy speeds the similarity index up when it is installed, but isn't required
+numpy: Any = None
+try:
+    numpy = importlib.import_module("numpy")
+except ImportError:  # pragma: no cover
+    pass
+
+
+def load_default_wordlist() -> List[str]:
+    wl = Path(__file__).parent / "wordlist.txt"
+    with open(wl, "r", encoding="utf-8") as f:
+        return [w.strip() for w in f.readlines() if w.strip()]
+
+
+def split_name(name: str) -> List[str]:
+    """Lowercase words of a camelCase, PascalCase or snake_case name."""
+
+    return [t.lower() for t in re.findall(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|[0-9]+", name)]
+
+
+def schema_names(schema: Dict[str, Any]) -> Set[str]:
+    """Names of the fields, args, input fields and enum values of an introspection result, leaving out the introspection types."""
+
+    names: Set[str] = set()
+    for typ in schema["data"]["__schema"]["types"]:
+        if typ["name"].startswith("__"):
+            continue
+
+        for field in (typ.get("fields") or []) + (typ.get("inputFields") or []):
+            if field["name"] != "dummy":
+                names.add(field["name"])
+            names.update(arg["name"] for arg in field.get("args") or [])
+        names.update(value["name"] for value in typ.get("enumValues") or [])
+
+    return names
+
+
+def read_corpus(paths: Iterable[str]) -> Iterator[Dict[str, Any]]:
+    """Introspection results found at the paths, which are files, such as earlier outputs, or directories of them."""
+
+    for path in paths:
+        files = (
+            sorted(Path(path).glob("**/*.json"))
+            if Path(path).is_dir()
+            else [Path(path)]
+        )
+        for file in files:
+            with open(file, "r", encoding="utf-8") as f:
+                try:
+                    schema = json.load(f)
+                except ValueError:
+                    continue
+            if isinstance(schema, dict) and isinstance(
+                (schema.get("data") or {}).get("__schema"), dict
+            ):
+                yield schema
+
+
+def learn_frequencies(paths: Iterable[str]) -> Counter[str]:
+    """Count in how many schemas of the corpus each name appears."""
+
+    frequencies: Counter[str] = collections.Counter()
+    for schema in read_corpus(paths):
+        frequencies.update(schema_names(schema))
+
+    return frequencies
+
+
+def rank(
+    wordlist: Iterable[str],
+    frequencies: Counter[str],
+) -> List[str]:
+    """De-duplicate the wordlist, most frequent names first.
+
+    Words are ordered deterministically: ties, and words the corpus never saw, keep their order in the wordlist.
+    """
+
+    words = list(dict.fromkeys(wordlist))
+    return sorted(words, key=lambda w: -frequencies[w])
+
+
+NAME_REGEX = re.compile(r"[_A-Za-z][_0-9A-Za-z]*")
+
+# Compiled wordlist layout: header, word offsets into the blob, word ids in lexicographic order, blob of ASCII names
+_MAGIC = b"CVWORDS1"
+_HEADER = struct.Struct("<8sQ")
+_OFFSET = struct.Struct("<Q")
+_ID = struct.Struct("<I")
+
+
+class Wordlist(Sequence[str]):
+    """Words to send, in order, which can tell the position of one of them."""
+
+    def __init__(self, words: Iterable[str] = ()) -> None:
+        self._words = list(words)
+        self._positions: Optional[Dict[str, int]] = None
+
+    def __len__(self) -> int:
+        return len(self._words)
+
+    @overload
+    def __getitem__(self, i: int) -> str: ...
+
+    @overload
+    def __getitem__(self, i: slice) -> List[str]: ...
+
+    def __getitem__(self, i: Union[int, slice]) -> Union[str, List[str]]:
+        if isinstance(i, slice):
+            return [self._get(j) for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("wordlist index out of range")
+        return self._get(i)
+
+    def _get(self, i: int) -> str:
+        return self._words[i]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._words)
+
+    def __contains__(self, word: object) -> bool:
+        return isinstance(word, str) and self.position(word) is not None
+
+    def position(self, word: str) -> Optional[int]:
+        """The position of the first occurrence of the word, `None` if it isn't in the wordlist."""
+
+        if self._positions is None:
+            self._positions = {}
+            for i, w in enumerate(self._words):
+                self._positions.setdefault(w, i)
+        return self._positions.get(word)
+
+    def close(self) -> None:
+        pass
+
+
+class CompiledWordlist(Wordlist):
+    """A wordlist compiled by `compile_wordlist`, read straight from the memory-mapped file.
+
+    Words are only decoded when asked for, and positions are found by a binary search of the sorted ids, so the size of the wordlist doesn't matter.
+    """
+
+    def __init__(self, path: str) -> None:  # pylint: disable=super-init-not-called
+        self._file = open(path, "rb")  # pylint: disable=consider-using-with
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, self._count = _HEADER.unpack_from(self._map)
+        if magic != _MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a compiled wordlist")
+        self._ids = _HEADER.size + _OFFSET.size * (self._count + 1)
+        self._blob = self._ids + _ID.size * self._count
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _bytes(self, i: int) -> bytes:
+        start, end = struct.unpack_from(
+            "<QQ", self._map, _HEADER.size + _OFFSET.size * i
+        )
+        return self._map[self._blob + start : self._blob + end]
+
+    def _get(self, i: int) -> str:
+        return self._bytes(i).decode("ascii")
+
+    def __iter__(self) -> Iterator[str]:
+        for i in range(self._count):
+            yield self._bytes(i).decode("ascii")
+
+    def position(self, word: str) -> Optional[int]:
+        key = word.encode("ascii", "replace")
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            (i,) = _ID.unpack_from(self._map, self._ids + _ID.size * middle)
+            found = self._bytes(i)
+            if found == key:
+                return int(i)
+            if found < key:
+                low = middle + 1
+            else:
+                high = middle
+        return None
+
+    def close(self) -> None:
+        if not self._map.closed:
+            self._map.close()
+        self._file.close()
+
+
+def compile_wordlist(
+    words: Iterable[str],
+    path: str,
+) -> int:
+    """Write the words, stripped, de-duplicated and left out unless they are valid names, to a file to open with `CompiledWordlist`.
+
+    Returns:
+        The number of words written.
+    """
+
+    unique: Dict[str, None] = {}
+    for word in words:
+        word = word.strip()
+        if NAME_REGEX.fullmatch(word) and not word.startswith("__"):
+            unique.setdefault(word)
+    names = [w.encode("ascii") for w in unique]
+
+    offsets = array.array("Q", [0])
+    for name in names:
+        offsets.append(offsets[-1] + len(name))
+    ids = array.array("I", sorted(range(len(names)), key=names.__getitem__))
+    if sys.byteorder != "little":  # pragma: no cover
+        offsets.byteswap()
+        ids.byteswap()
+
+    # Written aside first, so that a run reading the previous version never sees half a file
+    temporary = f"{path}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, len(names)))
+        f.write(offsets.tobytes())
+        f.write(ids.tobytes())
+        for name in names:
+            f.write(name)
+    os.replace(temporary, path)
+
+    return len(names)
+
+
+def open_wordlist(path: str) -> Wordlist:
+    """Open a compiled wordlist, or read a text one, with one word per line."""
+
+    with open(path, "rb") as f:
+        compiled = f.read(len(_MAGIC)) == _MAGIC
+    if compiled:
+        return CompiledWordlist(path)
+
+    with open(path, "r", encoding="utf-8") as f:
+        return Wordlist(dict.fromkeys(w.strip() for w in f if w.strip()))
+
+
+def as_wordlist(words: Sequence[str]) -> Wordlist:
+    """The words as a `Wordlist`, without copying them if they already are one."""
+
+    return words if isinstance(words, Wordlist) else Wordlist(words)
+
+
+class CandidateModel:
+    """Which fields go with which types, learned from a corpus of schemas and from the types found during the scan.
+
+    The candidates for a type are the fields of the types sharing a word with its name, and the fields found along with the ones it is known to have, the
+    most frequent first.
+    """
+
+    def __init__(self) -> None:
+        self._by_word: DefaultDict[str, Counter[str]] = collections.defaultdict(
+            collections.Counter
+        )
+        self._by_field: DefaultDict[str, Counter[str]] = collections.defaultdict(
+            collections.Counter
+        )
+        self._observed: Set[Tuple[str, str]] = set()
+
+    def _add(self, typename: str, fields: Set[str], others: Set[str]) -> None:
+        for word in split_name(typename):
+            self._by_word[word].update(fields)
+        for field in fields:
+            self._by_field[field].update(others - {field})
+            for other in others - fields:
+                self._by_field[other][field] += 1
+
+    def learn(self, schema: Dict[str, Any]) -> None:
+        """Learn from the object and interface types of an introspection result."""
+
+        for typ in schema["data"]["__schema"]["types"]:
+            if typ["name"].startswith("__") or typ["kind"] not in [
+                "OBJECT",
+                "INTERFACE",
+            ]:
+                continue
+
+            fields = {
+                f["name"] for f in typ.get("fields") or [] if f["name"] != "dummy"
+            }
+            self._add(typ["name"], fields, fields)
+
+    def observe(self, typename: str, fields: Iterable[str]) -> None:
+        """Learn from fields found on a type during the scan, each one counting once however often it is seen."""
+
+        fields = set(fields)
+        known = {f for t, f in self._observed if t == typename}
+        new = fields - known
+        self._observed |= {(typename, f) for f in new}
+        self._add(typename, new, known | new)
+
+    def candidates(
+        self,
+        typename: str,
+        known: Iterable[str] = (),
+        limit: int = 128,
+    ) -> List[str]:
+        """Up to `limit` likely fields of the type, besides the known ones, the most likely first."""
+
+        known = set(known)
+        scores: Counter[str] = collections.Counter()
+        for word in split_name(typename):
+            scores.update(self._by_word.get(word, {}))
+        for field in known:
+            scores.update(self._by_field.get(field, {}))
+
+        ranked = sorted(
+            (name for name in scores if name not in known),
+            key=lambda name: (-scores[name], name),
+        )
+        return ranked[:limit]
+
+
+def learn_candidates(corpus: Iterable[str]) -> CandidateModel:
+    """A candidate model learned from the schemas of a corpus."""
+
+    candidates = CandidateModel()
+    for corpus_schema in read_corpus(corpus):
+        candidates.learn(corpus_schema)
+    return candidates
+
+
+def ngrams(word: str, n: int = 3) -> Set[str]:
+    """Character n-grams of a word, its ends included."""
+
+    padded = f"^{word.lower()}$"
+    return {padded[i : i + n] for i in range(max(1, len(padded) - n + 1))}
+
+
+class SimilarityIndex:  # pylint: disable=too-few-public-methods
+    """Character n-gram vectors of words, to find the ones closest to a name by cosine similarity.
+
+    With NumPy installed, n-grams are hashed into `dimensions` columns and every word is compared at once. Otherwise an inverted index of the n-grams
+    only visits the words sharing one with the name. Only the first `limit` words are indexed, so that a huge wordlist costs no more than its top.
+    """
+
+    def __init__(
+        self,
+        words: Iterable[str],
+        n: int = 3,
+        dimensions: int = 1024,
+        limit: int = 2**14,
+    ) -> None:
+        self._words = list(dict.fromkeys(itertools.islice(words, limit)))
+        self._n = n
+        self._dimensions = dimensions
+        self._grams = [ngrams(w, n) for w in self._words]
+
+        self._postings: DefaultDict[str, List[int]] = collections.defaultdict(list)
+        if numpy is not None:
+            self._vectors = self._vectorize(self._grams)
+        else:
+            for i, grams in enumerate(self._grams):
+                for gram in grams:
+                    self._postings[gram].append(i)
+
+    def _vectorize(self, grams: List[Set[str]]) -> Any:
+        rows = [i for i, g in enumerate(grams) for _ in g]
+        columns = [
+            zlib.crc32(gram.encode()) % self._dimensions for g in grams for gram in g
+        ]
+        vectors = numpy.zeros((len(grams), self._dimensions), dtype=numpy.float32)
+        vectors[rows, columns] = 1.0
+        norms = numpy.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / numpy.maximum(norms, 1e-9)
+
+    def nearest(
+        self,
+        names: Iterable[str],
+        k: int = 8,
+        threshold: float = 0.5,
+        among: Optional[Container[str]] = None,
+    ) -> List[str]:
+        """Up to `k` words, other than the names, at least `threshold` similar to one of them, the closest first.
+
+        Only words in `among` are returned, when given.
+        """
+
+        names = list(names)
+        if not names or not self._words:
+            return []
+
+        order: List[Tuple[float, int]] = []
+        if numpy is not None:
+            similarities = (
+                self._vectors
+                @ self._vectorize([ngrams(name, self._n) for name in names]).T
+            ).max(axis=1)
+            candidates = numpy.flatnonzero(similarities >= threshold)
+            order = sorted(
+                zip((-similarities[candidates]).tolist(), candidates.tolist())
+            )
+        else:
+            best: Dict[int, float] = {}
+            for name in names:
+                grams = ngrams(name, self._n)
+                shared: Counter[int] = collections.Counter(
+                    i for gram in grams for i in self._postings.get(gram, [])
+                )
+                for i, count in shared.items():
+                    similarity = count / math.sqrt(len(grams) * len(self._grams[i]))
+                    if similarity >= threshold and similarity > best.get(i, 0):
+                        best[i] = similarity
+            order = sorted((-similarity, i) for i, similarity in best.items())
+
+        excluded = set(names)
+        nearest: List[str] = []
+        for _, i in order:
+            word = self._words[i]
+            if word in excluded or (among is not None and word not in among):
+                continue
+            nearest.append(word)
+            if len(nearest) >= k:
+                break
+
+        return nearest
+
+
+VERBS = ("get", "list", "create", "update", "delete", "set")
+
+
+def pluralize(word: str) -> str:
+    """Plural of an English noun, following the regular rules."""
+
+    if re.search(r"[^aeiou]y$", word):
+        return word[:-1] + "ies"
+    if re.search(r"(s|x|z|ch|sh)$", word):
+        return word + "es"
+    return word + "s"
+
+
+def singularize(word: str) -> str:
+    """Singular of an English noun, or the noun itself if it doesn't look plural."""
+
+    if word.endswith("ies") and len(word) > 4:
+        return word[:-3] + "y"
+    if re.search(r"(ss|x|z|ch|sh)es$", word):
+        return word[:-2]
+    if re.search(r"[^su]s$", word) and not word.endswith("is") and len(word) > 2:
+        return word[:-1]
+    return word
+
+
+def mutations(name: str) -> List[str]:
+    """Names likely to come along with a confirmed one, in its case style.
+
+    A verb prefix is swapped for the other ones (`createOrder` gives `updateOrder`, `deleteOrder`, `order` and `orders`), the noun is made plural or
+    singular, and a `By` suffix is added or its key made plural (`orderById` gives `orders` and `orderByIds`). The name in the other case style is
+    tried too.
+    """
+
+    tokens = split_name(name)
+    if not tokens or name.startswith("__"):
+        return []
+
+    def render(words: List[str], snake: bool) -> str:
+        if snake:
+            return "_".join(words)
+        rendered = words[0] + "".join(w.capitalize() for w in words[1:])
+        return rendered[0].upper() + rendered[1:] if name[0].isupper() else rendered
+
+    def number(words: List[str], plural: bool) -> List[str]:
+        if words[-1].isdigit():
+            return words
+        singular = singularize(words[-1])
+        return words[:-1] + [pluralize(singular) if plural else singular]
+
+    verb = tokens[0] if tokens[0] in VERBS and len(tokens) > 1 else None
+    rest = tokens[1:] if verb else tokens
+    by = rest.index("by") if "by" in rest[1:-1] else None
+    noun, key = (rest[:by], rest[by + 1 :]) if by else (rest, [])
+
+    variants = [number(noun, False), number(noun, True)]
+    if verb:
+        suffix = ["by"] + key if key else []
+        variants += [[v] + number(noun, False) + suffix for v in VERBS if v != "list"]
+        variants.append(["list"] + number(noun, True) + suffix)
+    elif key:
+        variants += [
+            noun + ["by"] + number(key, False),
+            noun + ["by"] + number(key, True),
+        ]
+    elif number(noun, False)[-1] != "id":
+        variants.append(number(noun, False) + ["by", "id"])
+
+    snake = "_" in name.strip("_")
+    candidates = [render(v, snake) for v in variants]
+    if len(tokens) > 1:
+        candidates.append(render(tokens, not snake))
+
+    return [c for c in dict.fromkeys(candidates) if c.lower() != name.lower()]
+
+
+class WordQueue:
+    """Words left to send to a target, streamed in order from a wordlist, except for the ones given `first` and the ones derived from or close to a
+    discovery, which are pulled forward.
+
+    A word is never taken twice, nor are the ones `sent` already. Only the words taken out of order are remembered, so that memory doesn't grow with the
+    wordlist.
+    """
+
+    def __init__(
+        self,
+        words: Sequence[str],
+        index: Optional[SimilarityIndex] = None,
+        pull: int = 8,
+        sent: Container[str] = frozenset(),
+        first: Iterable[str] = (),
+    ) -> None:
+        self._words = as_wordlist(words)
+        self._next = 0
+        self._sent = sent
+        self._taken: Set[str] = set()
+        self._front: Deque[str] = collections.deque(first)
+        self._index = index
+        self._pull = pull
+
+    def __contains__(self, word: object) -> bool:
+        """Whether the word may still be taken."""
+
+        if not isinstance(word, str) or word in self._taken or word in self._sent:
+            return False
+        position = self._words.position(word)
+        return position is None or position >= self._next
+
+    def take(self, n: int) -> List[str]:
+        """Take the next `n` words."""
+
+        taken: List[str] = []
+        while len(taken) < n:
+            if self._front:
+                word = self._front.popleft()
+                if word not in self:
+                    continue
+                self._taken.add(word)
+            elif self._next < len(self._words):
+                word = self._words[self._next]
+                self._next += 1
+                if word in self._taken or word in self._sent:
+                    continue
+            else:
+                break
+            taken.append(word)
+
+        return taken
+
+    def pull(self, names: Iterable[str]) -> None:
+        """Move the mutations of the names, then the words left which are the closest to them, to the front."""
+
+        names = list(names)
+        self._taken.update(names)
+
+        for name in names:
+            self._front.extend(m for m in mutations(name) if m in self)
+
+        if self._index and names:
+            self._front.extend(
+                self._index.nearest(names, k=self._pull * len(names), among=self)
+            )
+
+    def __len__(self) -> int:
+        """At most how many words are left."""
+
+        return len(self._front) + len(self._words) - self._next
+
+
+class Shard:
+    """The `index`th of `count` disjoint parts of all names, numbered from 1, the same on every machine."""
+
+    def __init__(self, index: int, count: int) -> None:
+        if not 0 < index <= count:
+            raise ValueError(f"There is no shard {index}/{count}")
+        self.index = index
+        self.count = count
+
+    @classmethod
+    def parse(cls, spec: str) -> "Shard":
+        """The shard of `i/N`."""
+
+        index, _, count = spec.partition("/")
+        return cls(int(index), int(count))
+
+    def __contains__(self, name: object) -> bool:
+        # A checksum rather than hash(), which is salted per process
+        return (
+            isinstance(name, str)
+            and zlib.crc32(name.encode()) % self.count == self.index - 1
+        )
+
+    def __repr__(self) -> str:
+        return f"{self.index}/{self.count}"
+
+    def words(self, wordlist: Sequence[str]) -> Wordlist:
+        """The words of the wordlist in this shard, in order."""
+
+        return ShardWordlist(as_wordlist(wordlist), self)
+
+    def owns(self, name: str, wordlist: Wordlist) -> bool:
+        """Whether the shard explores a name found along the way: the shard sending it does, or every shard if none sends it."""
+
+        return name in self or name not in wordlist
+
+
+class ShardWordlist(Wordlist):
+    """The words of a wordlist in a shard, read from the wordlist as they are asked for.
+
+    Only their positions in the wordlist are kept, so that a compiled wordlist stays memory-mapped.
+    """
+
+    def __init__(  # pylint: disable=super-init-not-called
+        self, words: Wordlist, shard: Shard
+    ) -> None:
+        self._base = words
+        self._shard = shard
+        self._indices = array.array("I", (i for i, w in enumerate(words) if w in shard))
+
+    def __len__(self) -> int:
+        return len(self._indices)
+
+    def _get(self, i: int) -> str:
+        return self._base[self._indices[i]]
+
+    def __iter__(self) -> Iterator[str]:
+        for i in self._indices:
+            yield self._base[i]
+
+    def position(self, word: str) -> Optional[int]:
+        if word not in self._shard:
+            return None
+        i = self._base.position(word)
+        if i is None:
+            return None
+        j = bisect.bisect_left(self._indices, i)
+        return j if j < len(self._indices) and self._indices[j] == i else None
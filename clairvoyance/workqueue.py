@@ -0,0 +1,255 @@
+"""A scan shared by workers on one or several machines through a SQLite file."""
+
+import asyncio
+import contextlib
+import json
+import sqlite3
+import time
+import uuid
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+from clairvoyance import graphql
+from clairvoyance.entities import GraphQLPrimitive
+from clairvoyance.entities.errors import EndpointError
+from clairvoyance.scanner import Scanner
+from clairvoyance.wordlist import Shard
+
+PENDING = "pending"
+LEASED = "leased"
+DONE = "done"
+FAILED = "failed"
+
+START = "start"
+FIELDS = "fields"
+INPUTS = "inputs"
+
+
+class Unit:  # pylint: disable=too-few-public-methods
+    """A part of a scan: finding the root types, brute-forcing the fields of a type, or exploring an input type.
+
+    The fields of root types are brute-forced in parts, each with the words of one `Shard`.
+    """
+
+    def __init__(self, id_: int, kind: str, name: str, part: str) -> None:
+        self.id = id_
+        self.kind = kind
+        self.name = name
+        self.part = Shard.parse(part) if part else None
+
+    def __repr__(self) -> str:
+        return f"{self.kind} {self.name} {self.part or ''}".strip()
+
+
+class WorkQueue:
+    """The units of a scan and the schema they found, in a SQLite file that workers lease units from.
+
+    Leases expire unless renewed, so that the units of a worker that died go to the others. Units failing `attempts` times are given up. Every unit
+    done is merged into the schema at once, and the types it found become units of their own.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        lease_time: float = 300,
+        parts: int = 16,
+        attempts: int = 3,
+    ) -> None:
+        self.worker = uuid.uuid4().hex
+        self.lease_time = lease_time
+        self._parts = parts
+        self._attempts = attempts
+        # Transactions are begun by hand, see _transaction()
+        self._db = sqlite3.connect(path, timeout=60, isolation_level=None)
+
+        with self._transaction():
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS units (id INTEGER PRIMARY KEY, kind TEXT, name TEXT, part TEXT, "
+                "status TEXT, worker TEXT, expires REAL, attempts INTEGER, UNIQUE (kind, name, part))"
+            )
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS schema (id INTEGER PRIMARY KEY CHECK (id = 1), schema TEXT)"
+            )
+            # Whichever worker comes first, the scan starts once
+            self._add([(START, "", "")])
+
+    @contextlib.contextmanager
+    def _transaction(self) -> Iterator[None]:
+        # Taking the write lock from the start, so that no two workers lease the same unit
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+        self._db.execute("COMMIT")
+
+    def _add(self, units: Sequence[Tuple[str, str, str]]) -> None:
+        self._db.executemany(
+            "INSERT OR IGNORE INTO units (kind, name, part, status, attempts) VALUES (?, ?, ?, ?, 0)",
+            [(kind, name, part, PENDING) for kind, name, part in units],
+        )
+
+    def lease(self, limit: int = 1) -> List[Unit]:
+        """Lease up to `limit` units of the same kind and part, to be done in the same requests."""
+
+        now = time.time()
+        available = "(status = ? OR (status = ? AND expires < ?)) AND attempts < ?"
+        parameters = (PENDING, LEASED, now, self._attempts)
+        with self._transaction():
+            first = self._db.execute(
+                f"SELECT kind, part FROM units WHERE {available} ORDER BY id LIMIT 1",
+                parameters,
+            ).fetchone()
+            if not first:
+                return []
+
+            rows = self._db.execute(
+                f"SELECT id, kind, name, part FROM units WHERE {available} AND kind = ? AND part = ? ORDER BY id LIMIT ?",
+                (*parameters, *first, limit),
+            ).fetchall()
+            self._db.executemany(
+                "UPDATE units SET status = ?, worker = ?, expires = ?, attempts = attempts + 1 WHERE id = ?",
+                [(LEASED, self.worker, now + self.lease_time, row[0]) for row in rows],
+            )
+        return [Unit(*row) for row in rows]
+
+    def renew(self, units: Sequence[Unit]) -> None:
+        """Keep the lease of units that take long."""
+
+        with self._transaction():
+            self._db.executemany(
+                "UPDATE units SET expires = ? WHERE id = ? AND worker = ? AND status = ?",
+                [
+                    (time.time() + self.lease_time, u.id, self.worker, LEASED)
+                    for u in units
+                ],
+            )
+
+    def release(self, units: Sequence[Unit]) -> None:
+        """Give units back to be tried again, unless they failed too often."""
+
+        with self._transaction():
+            self._db.executemany(
+                "UPDATE units SET status = CASE WHEN attempts < ? THEN ? ELSE ? END, worker = NULL WHERE id = ? AND status = ?",
+                [(self._attempts, PENDING, FAILED, u.id, LEASED) for u in units],
+            )
+
+    def complete(
+        self, units: Sequence[Unit], schema: graphql.Schema
+    ) -> Tuple[graphql.Schema, List[str]]:
+        """Merge what units found into the schema, and add units for the types to explore.
+
+        Returns:
+            The schema so far, and where the units disagreed with it.
+        """
+
+        with self._transaction():
+            merged = self.schema()
+            conflicts = merged.merge(schema) if merged else []
+            merged = merged or schema
+
+            # Units that found nothing aren't done again, as their type stays known
+            roots = merged.root_types
+            ignored = set(e.value for e in GraphQLPrimitive)
+            self._add(
+                [
+                    (FIELDS, t, f"{i}/{self._parts}" if t in roots else "")
+                    for t in merged.get_types_without_fields(ignored)
+                    for i in range(1, (self._parts if t in roots else 1) + 1)
+                ]
+                + [(INPUTS, t, "") for t in merged.get_input_types_without_values()]
+            )
+            self._db.executemany(
+                "UPDATE units SET status = ? WHERE id = ?",
+                [(DONE, u.id) for u in units],
+            )
+            # After the types without fields are known, as they get a dummy one
+            self._db.execute(
+                "INSERT OR REPLACE INTO schema VALUES (1, ?)", (repr(merged),)
+            )
+        return merged, conflicts
+
+    def schema(self) -> Optional[graphql.Schema]:
+        """The schema found so far, if the scan started."""
+
+        row = self._db.execute("SELECT schema FROM schema").fetchone()
+        return graphql.Schema(schema=json.loads(row[0])) if row else None
+
+    def finished(self) -> bool:
+        """Whether no unit is left to do or being done."""
+
+        (left,) = self._db.execute(
+            "SELECT COUNT(*) FROM units WHERE status = ? OR (status = ? AND (expires >= ? OR attempts < ?))",
+            (PENDING, LEASED, time.time(), self._attempts),
+        ).fetchone()
+        return not left
+
+    def close(self) -> None:
+        self._db.close()
+
+
+async def work(
+    scanner: Scanner,
+    queue: WorkQueue,
+    input_document: Optional[str] = None,
+    enumerate_types: bool = False,
+    output_path: Optional[str] = None,
+    poll: float = 5,
+) -> graphql.Schema:
+    """Do units of the queue with the scanner until there are none left, here or on other workers, and return the schema they found."""
+
+    logger = scanner.logger
+
+    async def __renew(units: List[Unit]) -> None:
+        while True:
+            await asyncio.sleep(queue.lease_time / 3)
+            queue.renew(units)
+
+    async def __do(units: List[Unit]) -> graphql.Schema:
+        kind, names = units[0].kind, [u.name for u in units]
+        if kind == START:
+            return await scanner.start(input_document, enumerate_types)
+
+        schema = queue.schema()
+        assert schema, "Units are only added along with the schema"
+        if kind == INPUTS:
+            return await scanner.explore_input_types(names, schema)
+        return await scanner.explore_types(names, schema, shard=units[0].part)
+
+    while True:
+        units = queue.lease(scanner.config.type_batch_size)
+        if not units:
+            if queue.finished():
+                break
+            # Other workers are still at it, and may find more
+            await asyncio.sleep(poll)
+            continue
+
+        logger.info(f"Doing {', '.join(map(repr, units))}")
+        renewing = asyncio.ensure_future(__renew(units))
+        try:
+            found = await __do(units)
+        except Exception as e:  # pylint: disable=broad-except
+            logger.error(f"Failed {', '.join(map(repr, units))}: {e!r}")
+            queue.release(units)
+            continue
+        finally:
+            renewing.cancel()
+
+        merged, conflicts = queue.complete(units, found)
+        for conflict in conflicts:
+            logger.warning(f"Conflicting {conflict}, keeping the first")
+        if output_path:
+            with open(output_path, "w", encoding="utf-8") as f:
+                f.write(repr(merged))
+
+    schema = queue.schema()
+    if not schema:
+        raise EndpointError(
+            f"The scan of {scanner.client.url} never started, see the errors of the workers"
+        )
+    if output_path:
+        # With what the other workers found since
+        with open(output_path, "w", encoding="utf-8") as f:
+            f.write(repr(schema))
+    return schema
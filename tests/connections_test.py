@@ -0,0 +1,62 @@
+import logging
+import unittest
+
+import aiounittest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from clairvoyance.client import Client
+from clairvoyance.connections import ConnectionStats, open_session, warm_up
+from clairvoyance.entities.context import logger_ctx
+
+logger_ctx.set(logging.getLogger("clairvoyance"))
+
+
+async def typename(_: web.Request) -> web.Response:
+    return web.json_response({"data": {"__typename": "Query"}})
+
+
+class TestConnections(
+    aiounittest.AsyncTestCase
+):  # pylint: disable=attribute-defined-outside-init
+    async def start(self) -> None:
+        app = web.Application()
+        app.router.add_post("/graphql", typename)
+        self.server = TestServer(app)
+        await self.server.start_server()
+        self.url = str(self.server.make_url("/graphql"))
+
+    async def test_warm_up(self) -> None:
+        await self.start()
+        stats = ConnectionStats()
+        session = open_session(4, stats=stats)
+        try:
+            # No more connections than the session is sized to
+            self.assertEqual(await warm_up(session, self.url, 6), 6)
+            self.assertEqual(stats.opened, 4)
+
+            await warm_up(session, self.url, 4)
+            self.assertEqual((stats.opened, stats.reused), (4, 6))
+            self.assertEqual(repr(stats), "10 requests over 4 connections (60% reused)")
+        finally:
+            await session.close()
+            await self.server.close()
+
+    async def test_client(self) -> None:
+        await self.start()
+        client = Client(self.url, concurrent_requests=2)
+        try:
+            self.assertEqual(await client.warm_up(10), 2)
+            self.assertEqual(
+                await client.post("query { __typename }"),
+                {"data": {"__typename": "Query"}},
+            )
+            assert client.stats
+            self.assertEqual((client.stats.opened, client.stats.reused), (2, 1))
+        finally:
+            await client.close()
+            await self.server.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+
+from clairvoyance.document import BatchDocument, operation_header
+
+
+class TestBatchDocument(unittest.TestCase):
+    def test_from_template(self) -> None:
+        document = BatchDocument.from_template(
+            "query { FUZZ }",
+            [("a: user", "user"), ("b: order", "order")],
+        )
+
+        self.assertEqual(str(document), "query { a: user b: order }")
+        self.assertEqual(document.keys, ["user", "order"])
+
+    def test_locate(self) -> None:
+        document = BatchDocument.from_template(
+            "query { FUZZ }",
+            [("a: user", "user"), ("b: order", "order")],
+        )
+
+        got = document.locate({"message": "", "locations": [{"line": 1, "column": 18}]})
+        self.assertEqual(got, "order")
+
+        got = document.locate({"message": "", "locations": [{"line": 1, "column": 1}]})
+        self.assertIsNone(got)
+
+    def test_locate_innermost(self) -> None:
+        document: BatchDocument[str] = BatchDocument("query {\n")
+        document.append("a: user(", "user")
+        document.append("id: 42", "user.id")
+        document.append(")", "user")
+        document.append("\n}")
+
+        got = document.locate({"message": "", "locations": [{"line": 2, "column": 13}]})
+        self.assertEqual(got, "user.id")
+
+    def test_locate_single_probe(self) -> None:
+        document = BatchDocument.from_template("query { FUZZ }", [("a: user", "user")])
+
+        got = document.locate({"message": ""})
+        self.assertEqual(got, "user")
+
+    def test_from_templates(self) -> None:
+        document = BatchDocument.from_templates(
+            [
+                ("query { user { FUZZ } }", "a", "User"),
+                ("query { order { FUZZ } }", "a", "Order"),
+            ]
+        )
+
+        self.assertEqual(str(document), "query { user { a }  order { a } }")
+
+        got = document.locate({"message": "", "locations": [{"line": 1, "column": 29}]})
+        self.assertEqual(got, "Order")
+
+    def test_operation_header(self) -> None:
+        self.assertEqual(operation_header("query { user { FUZZ } }"), "query ")
+        self.assertEqual(operation_header("mutation M { FUZZ }"), "mutation M ")
+        self.assertIsNone(operation_header("query { FUZZ } fragment F on User { id }"))
+        self.assertIsNone(operation_header("query { user }"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -31,6 +31,159 @@ class TestSchema(unittest.TestCase):
         got = self.schema.get_type_without_fields()
         self.assertEqual(got, want)
 
+    def test_get_type_without_fields_skips_leaves(self) -> None:
+        schema = graphql.Schema(query_type="Query")
+        schema.types["Query"].fields.append(
+            graphql.Field("createdAt", graphql.TypeRef("DateTime", "SCALAR"))
+        )
+        schema.add_type("DateTime", "SCALAR")
+        schema.add_type("Status", "ENUM")
+
+        self.assertEqual(schema.get_type_without_fields(), "")
+
+    def test_get_types_without_fields(self) -> None:
+        schema = graphql.Schema(query_type="Query")
+        for name in ["User", "Order", "Product"]:
+            schema.add_type(name, "OBJECT")
+
+        self.assertEqual(
+            schema.get_types_without_fields({"Order"}, limit=2), ["Query", "User"]
+        )
+
+    def test_get_path_through_possible_types(self) -> None:
+        schema = graphql.Schema(query_type="Query")
+        schema.types["Query"].fields.append(
+            graphql.Field("search", graphql.TypeRef("SearchResult", "UNION"))
+        )
+        schema.types["SearchResult"] = graphql.Type(
+            "SearchResult", "UNION", possible_types=["User"]
+        )
+        schema.add_type("User", "OBJECT")
+
+        self.assertEqual(
+            schema.get_document_for_type("User"),
+            "query { search { ... on User { FUZZ } } }",
+        )
+        self.assertEqual(
+            schema.types["SearchResult"].to_json()["possibleTypes"],
+            [{"kind": "OBJECT", "name": "User", "ofType": None}],
+        )
+
+    def test_root_types(self) -> None:
+        schema = graphql.Schema(query_type="Query", subscription_type="Subscription")
+
+        self.assertEqual(schema.root_types, ["Query", "Subscription"])
+        self.assertEqual(
+            schema.get_document_for_type("Subscription"), "subscription { FUZZ }"
+        )
+
+    def test_get_document_for_unreachable_type(self) -> None:
+        schema = graphql.Schema(query_type="Query")
+        schema.add_type("Orphan", "OBJECT")
+
+        self.assertEqual(
+            schema.get_document_for_type("Orphan"),
+            "query { ... on Orphan { FUZZ } }",
+        )
+
+    def test_get_input_types_without_values(self) -> None:
+        schema = graphql.Schema(query_type="Query")
+        schema.add_type("Status", "ENUM")
+        schema.add_type("Role", "ENUM")
+        schema.types["Role"].enum_values = ["ADMIN"]
+        schema.add_type("UserFilter", "INPUT_OBJECT")
+
+        self.assertEqual(
+            schema.get_input_types_without_values({"UserFilter"}), ["Status"]
+        )
+
+        got = graphql.Type.from_json(schema.types["Role"].to_json())
+        self.assertEqual(got.enum_values, ["ADMIN"])
+
+    def test_add_type_upgrades_scalar_to_enum(self) -> None:
+        schema = graphql.Schema(query_type="Query")
+        schema.add_type("Status", "SCALAR")
+        schema.add_type("Status", "ENUM")
+        schema.add_type("Status", "SCALAR")
+
+        self.assertEqual(schema.types["Status"].kind, "ENUM")
+        self.assertEqual(schema.types["Status"].to_json()["enumValues"], [])
+
+    def test_diff_schemas(self) -> None:
+        old = graphql.Schema(query_type="Query")
+        old.types["Query"].fields.append(
+            graphql.Field(
+                "user",
+                graphql.TypeRef("User", "OBJECT"),
+                [graphql.InputValue("id", graphql.TypeRef("ID", "SCALAR"))],
+            )
+        )
+        old.add_type("User", "OBJECT")
+        old.types["User"].fields.append(
+            graphql.Field("email", graphql.TypeRef("String", "SCALAR"))
+        )
+        new = graphql.Schema(schema=json.loads(repr(old)))
+        new.types["Query"].fields[0].args = []
+        new.types["User"].fields = []
+        new.add_type("Status", "ENUM")
+        new.types["Status"].enum_values = ["ACTIVE"]
+
+        self.assertEqual(
+            graphql.diff_schemas(old, new),
+            {
+                "added": {"args": [], "fields": ["Status.ACTIVE"], "types": ["Status"]},
+                "removed": {
+                    "args": ["Query.user.id"],
+                    "fields": ["User.email"],
+                    "types": [],
+                },
+            },
+        )
+
+    def test_merge_schemas(self) -> None:
+        first = graphql.Schema(query_type="Query")
+        first.types["Query"].fields.append(
+            graphql.Field(
+                "user",
+                graphql.TypeRef("User", "OBJECT"),
+                [graphql.InputValue("id", graphql.TypeRef("ID", "SCALAR"))],
+            )
+        )
+        first.add_type("User", "OBJECT")
+        first.add_type("Status", "SCALAR")
+        second = graphql.Schema(query_type="Query", mutation_type="Mutation")
+        second.types["Query"].fields.append(
+            graphql.Field(
+                "user",
+                graphql.TypeRef("User", "OBJECT", non_null=True),
+                [graphql.InputValue("name", graphql.TypeRef("String", "SCALAR"))],
+            )
+        )
+        second.add_type("User", "OBJECT")
+        second.types["User"].fields.append(
+            graphql.Field("email", graphql.TypeRef("String", "SCALAR"))
+        )
+        second.add_type("Status", "ENUM")
+        second.types["Status"].enum_values = ["ACTIVE"]
+
+        merged, conflicts = graphql.merge_schemas([first, second])
+
+        self.assertEqual(conflicts, ["Query.user: User or User!"])
+        self.assertEqual(
+            json.loads(repr(merged))["data"]["__schema"]["mutationType"],
+            {"name": "Mutation"},
+        )
+        self.assertEqual(
+            [a.name for a in merged.types["Query"].fields[0].args], ["id", "name"]
+        )
+        self.assertEqual([f.name for f in merged.types["User"].fields], ["email"])
+        self.assertEqual(merged.types["Status"].kind, "ENUM")
+        self.assertEqual(merged.types["Status"].enum_values, ["ACTIVE"])
+        # The schemas merged are left as they were
+        self.assertEqual(first.types["Status"].kind, "SCALAR")
+        # Writing the schema out doesn't add its types again
+        self.assertEqual(repr(merged), repr(merged))
+
     def test_convert_path_to_document(self) -> None:
         path = ["Query", "homes", "paymentSubscriptions"]
         want = "query { homes { paymentSubscriptions { FUZZ } } }"
@@ -0,0 +1,131 @@
+import os
+import tempfile
+import unittest
+
+from clairvoyance.entities.context import knowledge, knowledge_ctx
+from clairvoyance.knowledge import BloomFilter, KnowledgeBase, RejectedNames
+from clairvoyance.oracle import known_names
+
+
+class TestBloomFilter(unittest.TestCase):
+    def test_membership(self) -> None:
+        bloom = BloomFilter(capacity=100)
+        for i in range(100):
+            bloom.add(f"word{i}")
+
+        got = BloomFilter.from_bytes(bloom.to_bytes())
+
+        self.assertTrue(got.full)
+        self.assertTrue(all(f"word{i}" in got for i in range(100)))
+        self.assertLess(sum(f"other{i}" in got for i in range(1000)), 30)
+
+
+class TestRejectedNames(unittest.TestCase):
+    def test_exact_while_few(self) -> None:
+        negatives = RejectedNames()
+        for i in range(100):
+            negatives.add(f"word{i}")
+
+        got = RejectedNames.from_bytes(negatives.to_bytes())
+
+        self.assertEqual(len(got), 100)
+        self.assertTrue(all(f"word{i}" in got for i in range(100)))
+        self.assertFalse(any(f"other{i}" in got for i in range(10000)))
+
+    def test_growth(self) -> None:
+        negatives = RejectedNames()
+        for i in range(20000):
+            negatives.add(f"word{i}")
+
+        got = RejectedNames.from_bytes(negatives.to_bytes())
+
+        self.assertTrue(all(f"word{i}" in got for i in range(20000)))
+        self.assertLess(sum(f"other{i}" in got for i in range(10000)), 100)
+
+
+class TestKnowledgeBase(unittest.TestCase):
+    def setUp(self) -> None:
+        fd, self.path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+
+    def tearDown(self) -> None:
+        knowledge_ctx.set(None)
+        os.remove(self.path)
+
+    def test_names(self) -> None:
+        kb = KnowledgeBase(self.path, "http://a/graphql")
+        kb.record_names("Query", ["user"], ["lol", "user2"])
+        kb.record_names("Query", ["user2"], [])
+        kb.close()
+
+        kb = KnowledgeBase(self.path, "http://a/graphql")
+        self.assertIs(knowledge(), kb)
+        self.assertEqual(kb.valid_names("Query"), {"user", "user2"})
+        self.assertEqual(
+            kb.invalid_names("Query", ["user", "user2", "lol", "x"]), {"lol"}
+        )
+        self.assertEqual(kb.invalid_names("User", ["lol"]), set())
+
+        other = KnowledgeBase(self.path, "http://b/graphql")
+        self.assertEqual(other.valid_names("Query"), set())
+        kb.close()
+        other.close()
+
+    def test_many_rejected_names(self) -> None:
+        kb = KnowledgeBase(self.path, "http://a/graphql")
+        for i in range(0, 60000, 20000):
+            kb.record_names("Query", [], [f"word{j}" for j in range(i, i + 20000)])
+
+        unseen = [f"other{i}" for i in range(1000)]
+        self.assertLess(len(kb.invalid_names("Query", unseen)), 10)
+        self.assertEqual(len(kb.invalid_names("Query", ["word0", "word59999"])), 2)
+        kb.close()
+
+    def test_known_names(self) -> None:
+        kb = KnowledgeBase(self.path, "http://a/graphql")
+        kb.record_names("User", ["id", "name"], [])
+        kb.record_names("Order", ["total"], [])
+
+        self.assertEqual(kb.valid_names(), {"id", "name", "total"})
+        # a type's own names, and the endpoint's only while it has none
+        self.assertEqual(known_names(kb, "Order"), ["total"])
+        self.assertEqual(known_names(kb, "Item"), ["id", "name", "total"])
+        kb.close()
+
+    def test_rejected_names_are_no_longer_valid(self) -> None:
+        kb = KnowledgeBase(self.path, "http://a/graphql")
+        kb.record_names("Query", ["user", "order"], [])
+        kb.record_names("Query", ["user"], ["order"])
+
+        self.assertEqual(kb.valid_names("Query"), {"user"})
+        kb.close()
+
+    def test_typerefs(self) -> None:
+        kb = KnowledgeBase(self.path, "http://a/graphql")
+        typeref = {"kind": "OBJECT", "name": "User", "ofType": None}
+        kb.record_typeref("Query", "user", typeref)
+        kb.record_typeref("Query.user", "id", typeref)
+
+        self.assertEqual(kb.typerefs("Query"), {"user": typeref})
+
+        kb.forget("Query", ["user"])
+        self.assertEqual(kb.typerefs("Query"), {})
+        self.assertEqual(kb.typerefs("Query.user"), {"id": typeref})
+
+        kb.reset()
+        self.assertEqual(kb.typerefs("Query.user"), {})
+        kb.close()
+
+    def test_ttl(self) -> None:
+        kb = KnowledgeBase(self.path, "http://a/graphql")
+        kb.record_names("Query", ["user"], ["lol"])
+        kb.close()
+
+        kb = KnowledgeBase(self.path, "http://a/graphql", ttl=3600)
+        self.assertEqual(kb.valid_names("Query"), {"user"})
+        kb.close()
+
+        kb = KnowledgeBase(self.path, "http://a/graphql", ttl=-1)
+        self.assertEqual(kb.valid_names("Query"), set())
+        self.assertEqual(kb.invalid_names("Query", ["lol"]), set())
+        kb.close()
@@ -1,15 +1,112 @@
+# pylint: disable=too-many-lines
+
 import asyncio
+import json
 import logging
+import re
 import subprocess
 import time
 import unittest
+from typing import Callable, Dict, List, Optional
 
 import aiounittest
 
 from clairvoyance import graphql, oracle
 from clairvoyance.client import Client
-from clairvoyance.entities.context import client
+from clairvoyance.config import Config
+from clairvoyance.entities.context import client, client_ctx
+from clairvoyance.entities.errors import EndpointError
+from clairvoyance.entities.interfaces import IClient
 from clairvoyance.entities.oracle import FuzzingContext
+from clairvoyance.scanner import Scanner
+
+
+class FakeClient(IClient):
+    """Answer documents with a function instead of a server, recording them."""
+
+    def __init__(self, respond: Callable[[str], Dict]) -> None:
+        self.documents: List[str] = []
+        self._respond = respond
+        self._url = "http://localhost/graphql"
+        self._concurrent_requests = 50
+
+        client_ctx.set(self)
+
+    async def post(
+        self,
+        document: Optional[str],
+        retries: int = 0,
+    ) -> Dict:
+        self.documents.append(document or "")
+        return self._respond(document or "")
+
+    async def close(self) -> None:
+        pass
+
+
+def unknown_args_server(
+    args: Dict[str, List[str]], subfields: bool = False, required: int = 0
+) -> Callable[[str], Dict]:
+    """Reject every argument not listed for its field, pointing at it like graphql-js does.
+
+    With `subfields`, the fields are of an object type and each one without a selection is an error too, as is each of their first `required` args
+    that is missing.
+    """
+
+    def respond(document: str) -> Dict:
+        errors = []
+        for match in re.finditer(r"\w+: (?P<field>\w+)\((?P<args>[^)]*)\)", document):
+            field = match.group("field")
+            location = [{"line": 1, "column": match.start() + 1}]
+            if subfields:
+                errors.append(
+                    {
+                        "message": f'Field "{field}" of type "Object" must have a selection of subfields.',
+                        "locations": location,
+                    }
+                )
+            for name in args[field][:required]:
+                if f"{name}: 7" not in match.group("args").split(", "):
+                    errors.append(
+                        {
+                            "message": f'Field "{field}" argument "{name}" of type "ID!" is required, but it was not provided.',
+                            "locations": location,
+                        }
+                    )
+            offset = match.start("args")
+            for arg in match.group("args").split(", "):
+                name = arg.split(":")[0]
+                field = match.group("field")
+                if name not in args[field]:
+                    errors.append(
+                        {
+                            "message": f'Unknown argument "{name}" on field "Query.{field}".',
+                            "locations": [{"line": 1, "column": offset + 1}],
+                        }
+                    )
+                offset += len(arg) + 2
+        return {"errors": errors}
+
+    return respond
+
+
+def capped(
+    respond: Callable[[str], Dict], max_errors: int = 100
+) -> Callable[[str], Dict]:
+    """Abort validation after `max_errors` errors, like graphql-js does."""
+
+    def wrapper(document: str) -> Dict:
+        response = respond(document)
+        errors = response.get("errors", [])
+        if len(errors) > max_errors:
+            response["errors"] = errors[:max_errors] + [
+                {
+                    "message": "Too many validation errors, error limit reached. Validation aborted."
+                }
+            ]
+        return response
+
+    return wrapper
 
 
 class TestGetValidFields(unittest.TestCase):
@@ -90,6 +187,723 @@ class TestGetValidArgs(unittest.TestCase):
         self.assertEqual(got, want)
 
 
+class TestProbeValidFieldsBatch(aiounittest.AsyncTestCase):
+    fields = {"user": ["email"], "order": ["total"]}
+
+    def respond(self, document: str) -> Dict:
+        errors = []
+        for match in re.finditer(r"(?P<field>\w+) { (?P<words>[^{}]*) }", document):
+            offset = match.start("words")
+            for word in match.group("words").split(" "):
+                if word not in self.fields[match.group("field")]:
+                    errors.append(
+                        {
+                            "message": f'Cannot query field "{word}" on type "{match.group("field")}".',
+                            "locations": [{"line": 1, "column": offset + 1}],
+                        }
+                    )
+                offset += len(word) + 1
+        return {"errors": errors}
+
+    async def test_probe_valid_fields_batch(self) -> None:
+        Config()
+        fake = FakeClient(self.respond)
+
+        got = await oracle.probe_valid_fields_batch(
+            ["id", "email", "total"],
+            ["query { user { FUZZ } }", "query { order { FUZZ } }"],
+        )
+
+        self.assertEqual(
+            got,
+            {
+                "query { user { FUZZ } }": {"email"},
+                "query { order { FUZZ } }": {"total"},
+            },
+        )
+        # the wordlist, then the mutations of email and total
+        self.assertEqual(len(fake.documents), 2)
+        self.assertIn("user { emails emailById }", fake.documents[1])
+
+    async def test_aborted_validation(self) -> None:
+        config = Config()
+        fake = FakeClient(capped(self.respond))
+
+        got = await oracle.probe_valid_fields_batch(
+            [f"word{i}" for i in range(60)] + ["email", "total"],
+            ["query { user { FUZZ } }", "query { order { FUZZ } }"],
+        )
+
+        self.assertEqual(
+            got,
+            {
+                "query { user { FUZZ } }": {"email"},
+                "query { order { FUZZ } }": {"total"},
+            },
+        )
+        self.assertEqual(config.max_errors, 100)
+        # the merged document, then one for each type, then the mutations of email and total
+        self.assertEqual(len(fake.documents), 4)
+
+    async def test_priorities(self) -> None:
+        Config()
+        fake = FakeClient(self.respond)
+
+        got = await oracle.probe_valid_fields_batch(
+            ["id", "email"],
+            ["query { user { FUZZ } }", "query { order { FUZZ } }"],
+            priorities={"query { order { FUZZ } }": ["total", "id"]},
+        )
+
+        self.assertEqual(
+            got,
+            {
+                "query { user { FUZZ } }": {"email"},
+                "query { order { FUZZ } }": {"total"},
+            },
+        )
+        self.assertIn("order { total id email }", fake.documents[0])
+
+    async def test_skip(self) -> None:
+        Config()
+        fake = FakeClient(self.respond)
+
+        got = await oracle.probe_valid_fields_batch(
+            ["id", "email", "total"],
+            ["query { user { FUZZ } }", "query { order { FUZZ } }"],
+            skip={"query { user { FUZZ } }": {"email", "total"}},
+        )
+
+        self.assertEqual(
+            got,
+            {
+                "query { user { FUZZ } }": set(),
+                "query { order { FUZZ } }": {"total"},
+            },
+        )
+        self.assertNotIn("user { email", fake.documents[0])
+        self.assertIn("user { id }", fake.documents[0])
+
+    async def test_similar_words_first(self) -> None:
+        config = Config()
+        config._bucket_size = 2  # pylint: disable=protected-access
+        fake = FakeClient(self.respond)
+        fake._concurrent_requests = 1  # pylint: disable=protected-access
+
+        got = await oracle.probe_valid_fields_batch(
+            ["id", "email", "name", "avatar", "emailAddress", "total"],
+            ["query { user { FUZZ } }"],
+        )
+
+        self.assertEqual(got, {"query { user { FUZZ } }": {"email"}})
+        self.assertIn("user { emails emailById }", fake.documents[1])
+        self.assertIn("user { emailAddress name }", fake.documents[2])
+
+
+class TestVerifySchema(aiounittest.AsyncTestCase):
+    @staticmethod
+    def respond(document: str) -> Dict:
+        if "on Orphan" in document:
+            return {"errors": [{"message": 'Unknown type "Orphan".'}]}
+
+        errors = [
+            {
+                "message": 'Cannot query field "email" on type "User".',
+                "locations": [{"line": 1, "column": m.start() + 1}],
+            }
+            for m in re.finditer(r"\bemail\b", document)
+        ]
+        return {"errors": errors} if errors else {"data": {}}
+
+    async def test_verify_schema(self) -> None:
+        Config()
+        FakeClient(self.respond)
+        schema = graphql.Schema(query_type="Query")
+        schema.types["Query"].fields.append(
+            graphql.Field("me", graphql.TypeRef("User", "OBJECT"))
+        )
+        schema.add_type("User", "OBJECT")
+        schema.types["User"].fields.extend(
+            [
+                graphql.Field("id", graphql.TypeRef("ID", "SCALAR")),
+                graphql.Field("email", graphql.TypeRef("String", "SCALAR")),
+            ]
+        )
+        schema.add_type("Orphan", "OBJECT")
+        schema.types["Orphan"].fields.append(
+            graphql.Field("secret", graphql.TypeRef("String", "SCALAR"))
+        )
+
+        changed = await oracle.verify_schema(["name"], schema)
+
+        self.assertEqual(changed, {"User"})
+        self.assertNotIn("Orphan", schema.types)
+        self.assertEqual([f.name for f in schema.types["User"].fields], ["id"])
+
+    async def test_keep_unconfirmed_type(self) -> None:
+        Config()
+        # the server fails to answer about Orphan, which is neither confirmed nor gone
+        fake = FakeClient(
+            lambda document: {} if "on Orphan" in document else {"data": {}}
+        )
+        schema = graphql.Schema(query_type="Query")
+        schema.types["Query"].fields.append(
+            graphql.Field("me", graphql.TypeRef("String", "SCALAR"))
+        )
+        schema.add_type("Orphan", "OBJECT")
+        schema.types["Orphan"].fields.append(
+            graphql.Field("secret", graphql.TypeRef("String", "SCALAR"))
+        )
+
+        with self.assertLogs("clairvoyance", logging.WARNING) as logs:
+            await oracle.verify_schema(["name"], schema)
+
+        self.assertIn("Orphan", schema.types)
+        self.assertIn("query { ... on Orphan { secret } }", fake.documents)
+        self.assertIn("Kept Orphan", logs.output[0])
+
+
+class TestProbeTypes(aiounittest.AsyncTestCase):
+    def test_get_possible_types(self) -> None:
+        got = oracle.get_possible_types(
+            'Cannot query field "id" on type "SearchResult". Did you mean to use an inline fragment on "Node", "Launch", or "User"?'
+        )
+        self.assertEqual(got, ("SearchResult", {"Node", "Launch", "User"}))
+
+        got = oracle.get_possible_types('Cannot query field "id" on type "Query".')
+        self.assertEqual(got, (None, set()))
+
+    async def test_probe_types(self) -> None:
+        Config()
+
+        def respond(document: str) -> Dict:
+            errors = []
+            for name in re.findall(r"\.\.\. on (\w+)", document):
+                if name in ["User", "Orphan", "__Type", "__Field"]:
+                    message = f'Fragment cannot be spread here as objects of type "Query" can never be of type "{name}".'
+                elif name == "Status":
+                    message = (
+                        f'Fragment cannot condition on non composite type "{name}".'
+                    )
+                elif name == "Use":
+                    message = 'Unknown type "Use". Did you mean "User" or "UserStatus"?'
+                elif name == "Orph":
+                    message = 'Unknown type "Orph". Did you mean "Orphan"?'
+                elif name == "Type":
+                    message = 'Unknown type "Type". Did you mean "__Type"?'
+                else:
+                    message = f'Unknown type "{name}".'
+                errors.append({"message": message})
+            return {"errors": errors}
+
+        fake = FakeClient(respond)
+
+        got = await oracle.probe_types(
+            ["use", "status", "orph", "foo", "type", "__Field"]
+        )
+
+        self.assertEqual(got, {"User", "Orphan"})
+        # the guesses, then the suggestions but for introspection types
+        self.assertEqual(len(fake.documents), 2)
+        self.assertIn("... on UserStatus { __typename }", fake.documents[1])
+        self.assertNotIn("__Type", fake.documents[1])
+
+
+class TestPartialIntrospection(aiounittest.AsyncTestCase):
+    types = {
+        "Query": {
+            "kind": "OBJECT",
+            "name": "Query",
+            "fields": [
+                {
+                    "name": "user",
+                    "args": [
+                        {
+                            "name": "filter",
+                            "type": {
+                                "kind": "INPUT_OBJECT",
+                                "name": "UserFilter",
+                                "ofType": None,
+                            },
+                        }
+                    ],
+                    "type": {"kind": "OBJECT", "name": "User", "ofType": None},
+                }
+            ],
+        },
+        "User": {
+            "kind": "OBJECT",
+            "name": "User",
+            "fields": [
+                {
+                    "name": "id",
+                    "args": [],
+                    "type": {
+                        "kind": "NON_NULL",
+                        "name": None,
+                        "ofType": {"kind": "SCALAR", "name": "ID", "ofType": None},
+                    },
+                }
+            ],
+        },
+        "UserFilter": {
+            "kind": "INPUT_OBJECT",
+            "name": "UserFilter",
+            "inputFields": [
+                {
+                    "name": "email",
+                    "type": {"kind": "SCALAR", "name": "String", "ofType": None},
+                }
+            ],
+        },
+    }
+
+    def respond(self, document: str) -> Dict:
+        if "__schema" in document:
+            return {"errors": [{"message": "Introspection is disabled"}]}
+
+        data = {}
+        for alias, name in re.findall(r'(\w+): __type #\n\(name: "(\w+)"\)', document):
+            data[alias] = self.types.get(name)
+        return {"data": data}
+
+    def test_get_referenced_types(self) -> None:
+        got = oracle.get_referenced_types(self.types["Query"])
+        self.assertEqual(got, {"User", "UserFilter"})
+
+    async def test_probe_partial_introspection(self) -> None:
+        Config()
+        fake = FakeClient(self.respond)
+        schema = graphql.Schema(query_type="Query")
+
+        got = await oracle.probe_partial_introspection(["foo"], schema)
+
+        self.assertEqual(got, 3)
+        self.assertEqual(schema.types["User"].fields[0].name, "id")
+        self.assertEqual(schema.types["UserFilter"].kind, "INPUT_OBJECT")
+        self.assertEqual(schema.types["UserFilter"].fields[0].name, "email")
+        # both shapes, __schema, then the known names and Foo, then User and UserFilter
+        self.assertEqual(len(fake.documents), 5)
+
+    async def test_nothing_leaks(self) -> None:
+        Config()
+        FakeClient(lambda _: {"errors": [{"message": "Introspection is disabled"}]})
+        schema = graphql.Schema(query_type="Query")
+
+        got = await oracle.probe_partial_introspection(["foo"], schema)
+
+        self.assertEqual(got, 0)
+        self.assertEqual(schema.types["Query"].fields, [])
+
+
+class TestScanner(aiounittest.AsyncTestCase):
+    async def test_concurrent_scans(self) -> None:
+        def leaking(types: Dict[str, Dict]) -> Callable[[str], Dict]:
+            def respond(document: str) -> Dict:
+                if "__schema" in document:
+                    return {"errors": [{"message": "Introspection is disabled"}]}
+                data = {}
+                for alias, name in re.findall(
+                    r'(\w+): __type #\n\(name: "(\w+)"\)', document
+                ):
+                    data[alias] = types.get(name)
+                return {"data": data}
+
+            return respond
+
+        other = {
+            "Query": {
+                "kind": "OBJECT",
+                "name": "Query",
+                "fields": [
+                    {
+                        "name": "version",
+                        "args": [],
+                        "type": {"kind": "SCALAR", "name": "String", "ofType": None},
+                    }
+                ],
+            }
+        }
+        one = Scanner(
+            FakeClient(leaking(TestPartialIntrospection.types)), wordlist=["foo"]
+        )
+        two = Scanner(FakeClient(leaking(other)), wordlist=["foo"])
+        outer = FakeClient(lambda _: {})
+        input_schema = json.loads(repr(graphql.Schema(query_type="Query")))
+
+        got = await asyncio.gather(
+            one.scan(input_schema=input_schema), two.scan(input_schema=input_schema)
+        )
+
+        self.assertEqual([f.name for f in got[0].types["User"].fields], ["id"])
+        self.assertEqual([f.name for f in got[1].types["Query"].fields], ["version"])
+        self.assertNotIn("User", got[1].types)
+        # the scans didn't touch the context they were started from
+        self.assertIs(client(), outer)
+        self.assertEqual(outer.documents, [])
+
+    async def test_endpoint_does_not_answer(self) -> None:
+        fake = FakeClient(lambda _: {})
+
+        with self.assertRaises(EndpointError):
+            await Scanner(fake, wordlist=["foo"]).scan()
+
+        self.assertEqual(len(fake.documents), 1)
+
+
+class TestProbeInputTypes(aiounittest.AsyncTestCase):
+    # field -> (type, kind)
+    fields = {
+        "site": ("String!", "SCALAR"),
+        "limit": ("Int", "SCALAR"),
+        "tags": ("[String!]!", "SCALAR"),
+        "status": ("Status", "ENUM"),
+        "nested": ("LaunchFilter", "INPUT_OBJECT"),
+    }
+
+    def respond_values(self, document: str) -> Dict:
+        errors = []
+        for typename, value in re.findall(
+            r"\$v\d+: \[?(\w+)\]? = (\[[^\]]*\]|{[^}]*})", document
+        ):
+            if typename == "Status":
+                for name in value.strip("[]").split(", "):
+                    if name not in ["ACTIVE", "INACTIVE"]:
+                        suggestion = (
+                            ' Did you mean the enum value "ACTIVE"?'
+                            if name == "active"
+                            else ""
+                        )
+                        errors.append(
+                            {
+                                "message": f'Value "{name}" does not exist in "Status" enum.{suggestion}'
+                            }
+                        )
+            elif typename == "BookInput":
+                for name in re.findall(r"(\w+): null", value):
+                    if name not in self.fields:
+                        errors.append(
+                            {
+                                "message": f'Field "{name}" is not defined by type "BookInput".'
+                            }
+                        )
+                if "site: null" not in value:
+                    errors.append(
+                        {
+                            "message": 'Field "BookInput.site" of required type "String!" was not provided.'
+                        }
+                    )
+            else:
+                errors.append({"message": f'Unknown type "{typename}".'})
+        return {"errors": errors}
+
+    def respond_typerefs(self, document: str) -> Dict:
+        errors = []
+        for match in re.finditer(r"(?P<field>\w+): (?P<value>{}|42|null)", document):
+            typeref, kind = self.fields[match.group("field")]
+            name = typeref.strip("[]!")
+            value = match.group("value")
+
+            message = None
+            if value == "null" and typeref.endswith("!"):
+                message = f'Expected value of type "{typeref}", found null.'
+            elif value == "{}" and kind == "ENUM":
+                message = f'Enum "{name}" cannot represent non-enum value: {{}}.'
+            elif value == "{}" and kind == "SCALAR":
+                message = f"{name} cannot represent a non {name.lower()} value: {{}}"
+            elif value == "42" and kind == "INPUT_OBJECT":
+                message = f'Expected value of type "{name}", found 42.'
+
+            if message:
+                errors.append(
+                    {
+                        "message": message,
+                        "locations": [{"line": 1, "column": match.start("value") + 1}],
+                    }
+                )
+        return {"errors": errors}
+
+    async def test_probe_input_values(self) -> None:
+        Config()
+        fake = FakeClient(self.respond_values)
+
+        got = await oracle.probe_input_values(
+            ["active", "foo", "limit", "tags", "true", "x-y"],
+            {"Status": "ENUM", "BookInput": "INPUT_OBJECT", "Unknown": "ENUM"},
+        )
+
+        self.assertEqual(
+            got,
+            {
+                "Status": {"ACTIVE"},
+                "BookInput": {"site", "limit", "tags"},
+                "Unknown": set(),
+            },
+        )
+        self.assertEqual(len(fake.documents), 1)
+        self.assertNotIn("true", fake.documents[0])
+
+    async def test_probe_input_field_typerefs(self) -> None:
+        Config()
+        fake = FakeClient(self.respond_typerefs)
+
+        got = await oracle.probe_input_field_typerefs({"BookInput": list(self.fields)})
+
+        self.assertEqual(
+            got,
+            {
+                ("BookInput", "site"): graphql.TypeRef(
+                    "String", "SCALAR", non_null=True
+                ),
+                ("BookInput", "limit"): graphql.TypeRef("Int", "SCALAR"),
+                ("BookInput", "tags"): graphql.TypeRef(
+                    "String", "SCALAR", is_list=True, non_null_item=True, non_null=True
+                ),
+                ("BookInput", "status"): graphql.TypeRef("Status", "ENUM"),
+                ("BookInput", "nested"): graphql.TypeRef(
+                    "LaunchFilter", "INPUT_OBJECT"
+                ),
+            },
+        )
+        # {}, 42 for the input object, then null
+        self.assertEqual(len(fake.documents), 3)
+
+
+class TestProbeArgsBatch(aiounittest.AsyncTestCase):
+    async def test_probe_args_batch(self) -> None:
+        Config()
+        fake = FakeClient(
+            unknown_args_server({"user": ["id", "name"], "order": ["id"]})
+        )
+        wordlist = [f"word{i}" for i in range(200)] + ["id", "name"]
+
+        got = await oracle.probe_args_batch(
+            ["user", "order"], wordlist, "query { FUZZ }"
+        )
+
+        self.assertEqual(got, {"user": {"id", "name"}, "order": {"id"}})
+        # 2 fields * 4 buckets, packed 8 buckets per document, then the mutations of id and name
+        self.assertEqual(len(fake.documents), 2)
+
+    async def test_skip(self) -> None:
+        Config()
+        fake = FakeClient(
+            unknown_args_server({"user": ["id", "name"], "order": ["id"]})
+        )
+
+        got = await oracle.probe_args_batch(
+            ["user", "order"],
+            ["id", "name", "email"],
+            "query { FUZZ }",
+            skip={"user": {"email"}},
+        )
+
+        self.assertEqual(got, {"user": {"id", "name"}, "order": {"id"}})
+        self.assertIn("user(id: 7, name: 7)", fake.documents[0])
+
+    async def test_aborted_validation(self) -> None:
+        config = Config()
+        fake = FakeClient(
+            capped(unknown_args_server({"user": ["id", "name"], "order": ["id"]}))
+        )
+        wordlist = [f"word{i}" for i in range(200)] + ["id", "name"]
+
+        got = await oracle.probe_args_batch(
+            ["user", "order"], wordlist, "query { FUZZ }"
+        )
+
+        self.assertEqual(got, {"user": {"id", "name"}, "order": {"id"}})
+        self.assertEqual(config.max_errors, 100)
+        # the 404 args in one document, aborted, then at once in 5 documents under the
+        # limit rather than in halves of halves, then the mutations of id and name
+        self.assertEqual(len(fake.documents), 7)
+        self.assertTrue(all(d.count(": 7") <= 100 for d in fake.documents[1:6]))
+
+        # from now on, documents are filled up to 100 errors, an unknown arg each and
+        # two more per alias until its own are seen, cutting the buckets of 64 short
+        fake.documents.clear()
+        await oracle.probe_args_batch(["user", "order"], wordlist, "query { FUZZ }")
+        self.assertEqual(len(fake.documents), 6)
+        self.assertEqual(fake.documents[0].count(": 7"), 96)
+        self.assertEqual(fake.documents[1].count(": 7"), 100)
+
+    async def test_aborted_once(self) -> None:
+        Config()
+        respond = capped(unknown_args_server({"user": ["id"]}))
+        aborted = []
+
+        def counting(document: str) -> Dict:
+            response = respond(document)
+            if oracle.is_aborted(response.get("errors", [])):
+                aborted.append(document)
+            return response
+
+        fake = FakeClient(counting)
+        wordlist = [f"word{i}" for i in range(1000)] + ["id"]
+
+        got = await oracle.probe_args_batch(["user"], wordlist, "query { FUZZ }")
+
+        self.assertEqual(got, {"user": {"id"}})
+        # the other workers wait for the first document to learn the limit: its 512
+        # args, then 6 documents for them and 6 for the 489 args left
+        self.assertEqual(len(aborted), 1)
+        self.assertEqual(len(fake.documents), 13)
+
+    async def test_alias_errors(self) -> None:
+        Config()
+        respond = capped(
+            unknown_args_server({"user": ["id", "key"]}, subfields=True, required=2)
+        )
+        aborted = []
+
+        def counting(document: str) -> Dict:
+            response = respond(document)
+            if oracle.is_aborted(response.get("errors", [])):
+                aborted.append(document)
+            return response
+
+        fake = FakeClient(counting)
+        wordlist = [f"word{i}" for i in range(1000)] + ["id", "key"]
+
+        got = await oracle.probe_args_batch(["user"], wordlist, "query { FUZZ }")
+
+        self.assertEqual(got, {"user": {"id", "key"}})
+        # an alias makes 3 errors besides its unknown args, one more than counted for
+        # until the first document comes back, and no document aborts after it
+        self.assertEqual(len(aborted), 1)
+        self.assertTrue(
+            all(
+                d.count(": 7") + 3 * d.count("alias") <= 100 for d in fake.documents[1:]
+            )
+        )
+        self.assertEqual(len(fake.documents), 14)
+
+    async def test_attribute_by_field_name(self) -> None:
+        Config()
+        FakeClient(
+            lambda _: {
+                "errors": [
+                    {
+                        "message": 'Unknown argument "foo" on field "user" of type "Query".'
+                    },
+                    {
+                        "message": 'Unknown argument "bar" on field "order" of type "Query". Did you mean "id"?'
+                    },
+                ]
+            }
+        )
+
+        got = await oracle.probe_valid_args_batch(
+            [("user", ["foo", "id"]), ("order", ["bar"])], "query { FUZZ }"
+        )
+
+        self.assertEqual(got, {"user": {"id"}, "order": {"id"}})
+
+
+class TestProbeTypeRefsBatch(aiounittest.AsyncTestCase):
+    async def test_probe_field_types(self) -> None:
+        Config()
+
+        def respond(document: str) -> Dict:
+            errors = []
+            for match in re.finditer(
+                r"alias\d+: (?P<field>\w+)(?P<selection> \{ lol \})?", document
+            ):
+                location = [{"line": 1, "column": match.start() + 1}]
+                if match.group("field") == "user" and not match.group("selection"):
+                    errors.append(
+                        {
+                            "message": 'Field "user" of type "[User!]" must have a selection of subfields. Did you mean "user { ... }"?',
+                            "locations": location,
+                        }
+                    )
+                if match.group("field") == "name" and match.group("selection"):
+                    errors.append(
+                        {
+                            "message": 'Field "name" must not have a selection since type "String!" has no subfields.',
+                            "locations": location,
+                        }
+                    )
+            return {"errors": errors}
+
+        fake = FakeClient(respond)
+
+        got = await oracle.probe_field_types(["user", "name"], "query { FUZZ }")
+
+        self.assertEqual(
+            got["user"],
+            graphql.TypeRef("User", "OBJECT", is_list=True, non_null_item=True),
+        )
+        self.assertEqual(
+            got["name"], graphql.TypeRef("String", "SCALAR", non_null=True)
+        )
+        self.assertEqual(len(fake.documents), 2)
+
+    async def test_probe_arg_typerefs(self) -> None:
+        Config()
+
+        def respond(document: str) -> Dict:
+            errors = []
+            for match in re.finditer(r"(?P<arg>\w+): 42", document):
+                typename = {"id": "ID!", "first": "Int", "filter": "UserFilterInput"}[
+                    match.group("arg")
+                ]
+                if typename not in ["ID!", "Int"]:
+                    errors.append(
+                        {
+                            "message": f"Expected type {typename}, found 42.",
+                            "locations": [
+                                {"line": 1, "column": match.start("arg") + 1}
+                            ],
+                        }
+                    )
+            if "(" not in document:
+                errors.append(
+                    {
+                        "message": 'Field "user" argument "id" of type "ID!" is required, but it was not provided.'
+                    }
+                )
+            return {"errors": errors}
+
+        fake = FakeClient(respond)
+
+        got = await oracle.probe_arg_typerefs(
+            [
+                ("user", "id"),
+                ("user", "filter"),
+                ("users", "first"),
+                ("users", "filter"),
+            ],
+            "query { FUZZ }",
+        )
+
+        self.assertEqual(
+            got[("user", "id")], graphql.TypeRef("ID", "SCALAR", non_null=True)
+        )
+        self.assertEqual(
+            got[("user", "filter")], graphql.TypeRef("UserFilterInput", "INPUT_OBJECT")
+        )
+        self.assertEqual(
+            got[("users", "filter")], graphql.TypeRef("UserFilterInput", "INPUT_OBJECT")
+        )
+        self.assertIsNone(got[("users", "first")])
+        self.assertEqual(len(fake.documents), len(oracle.ARG_TYPEREF_VALUES))
+        # Resolved args are not probed with the remaining values
+        self.assertNotIn("filter", "".join(fake.documents[1:]))
+
+    async def test_arg_typeref_values_order(self) -> None:
+        Config()
+        self.assertEqual(oracle.get_arg_typeref_values(), oracle.ARG_TYPEREF_VALUES)
+
+        required = {
+            "message": 'Field "user" argument "id" of type "ID!" is required, but it was not provided.'
+        }
+        FakeClient(lambda document: {"errors": [] if "(" in document else [required]})
+        await oracle.probe_arg_typerefs([("user", "id")], "query { FUZZ }")
+
+        self.assertEqual(oracle.get_arg_typeref_values()[0], None)
+
+
 class TestGetTypeRef(unittest.TestCase):
     def test_non_nullable_object(self) -> None:
         want = graphql.TypeRef(
@@ -190,6 +1004,55 @@ class TestGetTypeRef(unittest.TestCase):
         )
         self.assertEqual(got, want)
 
+    def test_custom_scalar_field(self) -> None:
+        want = graphql.TypeRef(
+            name="DateTime",
+            kind="SCALAR",
+            is_list=False,
+            non_null_item=False,
+            non_null=True,
+        )
+        got = oracle.get_typeref(
+            'Field "createdAt" must not have a selection since type "DateTime!" has no subfields.',
+            FuzzingContext.FIELD,
+        )
+        self.assertEqual(got, want)
+
+    def test_input_object_arg(self) -> None:
+        # Input types need not be named *Input
+        got = oracle.get_typeref(
+            'Field "launches" argument "filter" of type "LaunchFilter!" is required, but it was not provided.',
+            FuzzingContext.ARGUMENT,
+        )
+        self.assertEqual(
+            got, graphql.TypeRef("LaunchFilter", "INPUT_OBJECT", non_null=True)
+        )
+
+        got = oracle.get_typeref(
+            "Expected type SortInput, found 7.", FuzzingContext.ARGUMENT
+        )
+        self.assertEqual(got, graphql.TypeRef("SortInput", "INPUT_OBJECT"))
+
+    def test_enum_arg(self) -> None:
+        want = graphql.TypeRef(
+            name="OrderStatus",
+            kind="ENUM",
+            is_list=False,
+            non_null_item=False,
+            non_null=False,
+        )
+        got = oracle.get_typeref(
+            'Enum "OrderStatus" cannot represent non-enum value: 42.',
+            FuzzingContext.ARGUMENT,
+        )
+        self.assertEqual(got, want)
+
+        got = oracle.get_typeref(
+            'Value "lol" does not exist in "OrderStatus" enum. Did you mean the enum value "PAID"?',
+            FuzzingContext.ARGUMENT,
+        )
+        self.assertEqual(got, want)
+
     def test_skip_error_message(self) -> None:
         want = None
         with self.assertLogs() as cm:
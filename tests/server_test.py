@@ -0,0 +1,165 @@
+import asyncio
+import json
+import logging
+import re
+from typing import Any, Awaitable, Callable, Dict
+
+import aiounittest
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+
+from clairvoyance.server import ScanServer
+
+TYPES = {
+    "Query": {
+        "kind": "OBJECT",
+        "name": "Query",
+        "fields": [
+            {
+                "name": "user",
+                "args": [],
+                "type": {"kind": "OBJECT", "name": "User", "ofType": None},
+            }
+        ],
+    },
+    "User": {
+        "kind": "OBJECT",
+        "name": "User",
+        "fields": [
+            {
+                "name": "id",
+                "args": [],
+                "type": {"kind": "SCALAR", "name": "ID", "ofType": None},
+            }
+        ],
+    },
+}
+
+
+def graphql_endpoint(
+    gate: asyncio.Event,
+) -> Callable[[web.Request], Awaitable[web.Response]]:
+    """Leak every type through __type, like a server with only __schema disabled, once the gate opens."""
+
+    async def handle(request: web.Request) -> web.Response:
+        await gate.wait()
+        document = (await request.json())["query"]
+        if document == "query { __typename }":
+            return web.json_response({"data": {"__typename": "Query"}})
+        if "__schema" in document or not document.startswith("query"):
+            return web.json_response({"errors": [{"message": "Not allowed"}]})
+
+        data = {}
+        for alias, name in re.findall(r'(\w+): __type #\n\(name: "(\w+)"\)', document):
+            data[alias] = TYPES.get(name)
+        return web.json_response({"data": data})
+
+    return handle
+
+
+class TestScanServer(
+    aiounittest.AsyncTestCase
+):  # pylint: disable=attribute-defined-outside-init
+    async def start(self) -> None:
+        endpoint = web.Application()
+        self.gate = asyncio.Event()
+        endpoint.router.add_post("/graphql", graphql_endpoint(self.gate))
+        self.endpoint = TestServer(endpoint)
+        await self.endpoint.start_server()
+        self.url = str(self.endpoint.make_url("/graphql"))
+
+        server = ScanServer(logging.getLogger("clairvoyance"), ["foo"], jobs=1)
+        self.api = TestClient(TestServer(server.app()))
+        await self.api.start_server()
+
+    async def stop(self) -> None:
+        await self.api.close()
+        await self.endpoint.close()
+
+    async def submit(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        response = await self.api.post("/jobs", json=job)
+        self.assertEqual(response.status, 201)
+        return await response.json()
+
+    async def test_job(self) -> None:
+        await self.start()
+        try:
+            job = await self.submit({"url": self.url})
+            self.gate.set()
+
+            response = await self.api.get(f"/jobs/{job['id']}/events")
+            events = [json.loads(line) async for line in response.content]
+
+            self.assertEqual(events[-1]["status"], "done")
+            schema = events[-1]["schema"]["data"]["__schema"]
+            self.assertIn("User", [t["name"] for t in schema["types"]])
+
+            response = await self.api.get(f"/jobs/{job['id']}")
+            self.assertEqual((await response.json())["schema"], events[-1]["schema"])
+        finally:
+            await self.stop()
+
+    async def test_input_schema(self) -> None:
+        await self.start()
+        try:
+            self.gate.set()
+            job = await self.submit({"url": self.url})
+            response = await self.api.get(f"/jobs/{job['id']}/events")
+            schema = [json.loads(line) async for line in response.content][-1]["schema"]
+
+            # an earlier schema, such as the one of another job, to start from
+            job = await self.submit({"url": self.url, "input_schema": schema})
+            response = await self.api.get(f"/jobs/{job['id']}/events")
+            events = [json.loads(line) async for line in response.content]
+
+            self.assertEqual(events[-1]["status"], "done")
+            self.assertEqual(events[-1]["schema"], schema)
+        finally:
+            await self.stop()
+
+    async def test_priorities_and_cancel(self) -> None:
+        await self.start()
+        try:
+            # The only worker waits on the first job while the others queue
+            first = await self.submit({"url": self.url})
+            low = await self.submit({"url": self.url})
+            high = await self.submit({"url": self.url, "priority": 10})
+            cancelled = await self.submit({"url": self.url, "priority": 20})
+
+            response = await self.api.delete(f"/jobs/{cancelled['id']}")
+            self.assertEqual((await response.json())["status"], "cancelled")
+            self.gate.set()
+
+            while True:
+                response = await self.api.get("/jobs")
+                jobs = {j["id"]: j for j in await response.json()}
+                if all(j["status"] in ("done", "cancelled") for j in jobs.values()):
+                    break
+                await asyncio.sleep(0.05)
+
+            self.assertEqual(jobs[first["id"]]["status"], "done")
+            self.assertEqual(jobs[cancelled["id"]]["status"], "cancelled")
+            self.assertIsNone(jobs[cancelled["id"]]["started"])
+            self.assertLess(jobs[high["id"]]["started"], jobs[low["id"]]["started"])
+        finally:
+            await self.stop()
+
+    async def test_bad_job(self) -> None:
+        await self.start()
+        try:
+            response = await self.api.post("/jobs", json={"output": "x.json"})
+            self.assertEqual(response.status, 400)
+
+            # the schema itself rather than the path of a file, and no delta
+            for job in [
+                {"url": self.url, "input_schema": "schema.json"},
+                {"url": self.url, "input_schema": {"data": {}}},
+                {"url": self.url, "delta": "delta.json"},
+            ]:
+                response = await self.api.post("/jobs", json=job)
+                self.assertEqual(response.status, 400)
+
+            response = await self.api.get("/jobs/nope")
+            self.assertEqual(response.status, 404)
+        finally:
+            await self.stop()
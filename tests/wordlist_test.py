@@ -0,0 +1,325 @@
+import collections
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from typing import Any, Dict, List
+from unittest import mock
+
+from clairvoyance import wordlist
+from clairvoyance.cli import cli
+from clairvoyance.wordlist import (
+    CandidateModel,
+    CompiledWordlist,
+    Shard,
+    SimilarityIndex,
+    WordQueue,
+    compile_wordlist,
+    learn_frequencies,
+    mutations,
+    ngrams,
+    open_wordlist,
+    pluralize,
+    rank,
+    schema_names,
+    singularize,
+    split_name,
+)
+
+
+class TestWordlist(unittest.TestCase):
+    def setUp(self) -> None:
+        self.corpus = tempfile.mkdtemp()
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.corpus)
+
+    def test_schema_names(self) -> None:
+        with open("tests/data/schema.json", "r", encoding="utf-8") as f:
+            names = schema_names(json.load(f))
+
+        self.assertIn("homes", names)
+        self.assertNotIn("dummy", names)
+        self.assertNotIn("__typename", names)
+
+    def test_learn_frequencies(self) -> None:
+        shutil.copy("tests/data/schema.json", os.path.join(self.corpus, "a.json"))
+        shutil.copy("tests/data/schema.json", os.path.join(self.corpus, "b.json"))
+        with open(os.path.join(self.corpus, "c.json"), "w", encoding="utf-8") as f:
+            f.write("not a schema")
+
+        frequencies = learn_frequencies([self.corpus])
+
+        self.assertEqual(frequencies["homes"], 2)
+        self.assertEqual(frequencies["lol"], 0)
+
+    def test_rank(self) -> None:
+        frequencies = collections.Counter({"id": 3, "name": 3, "email": 1})
+
+        got = rank(["zebra", "email", "name", "apple", "id", "email"], frequencies)
+
+        self.assertEqual(got, ["name", "id", "email", "zebra", "apple"])
+
+
+class TestCompiledWordlist(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "words.cwl")
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.directory)
+
+    def test_compile_wordlist(self) -> None:
+        count = compile_wordlist(
+            ["user", " id\n", "x-y", "user", "__schema", "email", "Avatar"], self.path
+        )
+        self.assertEqual(count, 4)
+
+        words = open_wordlist(self.path)
+        self.assertIsInstance(words, CompiledWordlist)
+        self.assertEqual(list(words), ["user", "id", "email", "Avatar"])
+        self.assertEqual(len(words), 4)
+        self.assertEqual(words[1], "id")
+        self.assertEqual(words[-1], "Avatar")
+        self.assertEqual(words[1:3], ["id", "email"])
+        with self.assertRaises(IndexError):
+            words[4]  # pylint: disable=pointless-statement
+
+        self.assertEqual(
+            [words.position(w) for w in ["user", "id", "email", "Avatar"]],
+            [0, 1, 2, 3],
+        )
+        self.assertIsNone(words.position("avatar"))
+        self.assertNotIn("x-y", words)
+        words.close()
+
+    def test_compile_on_its_own(self) -> None:
+        words = os.path.join(self.directory, "words.txt")
+        with open(words, "w", encoding="utf-8") as f:
+            f.write("user\nid\nuser\n")
+
+        with mock.patch("clairvoyance.cli.asyncio.run") as run:
+            cli(["-w", words, "--compile-wordlist", self.path])
+
+        run.assert_not_called()
+        compiled = open_wordlist(self.path)
+        self.assertEqual(list(compiled), ["user", "id"])
+        compiled.close()
+
+    def test_open_wordlist(self) -> None:
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write("user\nid\n\nuser\n")
+
+        words = open_wordlist(self.path)
+
+        self.assertNotIsInstance(words, CompiledWordlist)
+        self.assertEqual(list(words), ["user", "id"])
+        self.assertEqual(words.position("id"), 1)
+
+    def test_queue(self) -> None:
+        compile_wordlist(["avatar", "total", "email", "emails", "id"], self.path)
+        words = CompiledWordlist(self.path)
+        queue = WordQueue(words, sent={"total"}, first=["id", "name"])
+
+        self.assertEqual(queue.take(3), ["id", "name", "avatar"])
+        queue.pull(["email"])
+        self.assertEqual(queue.take(10), ["emails", "emailById"])
+        words.close()
+
+
+class TestCandidateModel(unittest.TestCase):
+    @staticmethod
+    def schema(types: Dict[str, List[str]]) -> Dict[str, Any]:
+        return {
+            "data": {
+                "__schema": {
+                    "types": [
+                        {
+                            "kind": "OBJECT",
+                            "name": name,
+                            "fields": [{"name": f} for f in fields],
+                        }
+                        for name, fields in types.items()
+                    ]
+                }
+            }
+        }
+
+    def test_split_name(self) -> None:
+        self.assertEqual(
+            split_name("UserProfile_settings"), ["user", "profile", "settings"]
+        )
+        self.assertEqual(split_name("HTTPRequest2"), ["http", "request", "2"])
+
+    def test_candidates(self) -> None:
+        model = CandidateModel()
+        model.learn(
+            self.schema(
+                {
+                    "User": ["id", "email", "avatar"],
+                    "Order": ["id", "total", "lineItems"],
+                }
+            )
+        )
+        model.learn(self.schema({"AdminUser": ["email", "role"]}))
+
+        self.assertEqual(
+            model.candidates("UserProfile"), ["email", "avatar", "id", "role"]
+        )
+        self.assertEqual(model.candidates("Invoice", ["total"]), ["id", "lineItems"])
+        self.assertEqual(model.candidates("Invoice", ["total"], limit=1), ["id"])
+
+    def test_observe(self) -> None:
+        model = CandidateModel()
+        model.observe("Product", ["sku", "price"])
+        model.observe("Product", ["sku", "price"])
+
+        self.assertEqual(model.candidates("ProductVariant"), ["price", "sku"])
+        self.assertEqual(model.candidates("Offer", ["price"]), ["sku"])
+
+
+class TestSimilarityIndex(unittest.TestCase):
+    words = ["email", "emails", "emailAddress", "avatar", "total", "lineItems"]
+
+    def test_ngrams(self) -> None:
+        self.assertEqual(ngrams("id"), {"^id", "id$"})
+        self.assertEqual(ngrams("a"), {"^a$"})
+
+    def assert_nearest(self) -> None:
+        index = SimilarityIndex(self.words)
+
+        self.assertEqual(index.nearest(["email"]), ["emails", "emailAddress"])
+        self.assertEqual(index.nearest(["email"], k=1), ["emails"])
+        self.assertEqual(
+            index.nearest(["email"], among={"emailAddress"}), ["emailAddress"]
+        )
+        self.assertEqual(index.nearest(["lineItem", "totals"]), ["lineItems", "total"])
+        self.assertEqual(index.nearest(["xyz"]), [])
+
+    @unittest.skipUnless(wordlist.numpy, "NumPy is not installed")
+    def test_nearest_vectorized(self) -> None:
+        self.assert_nearest()
+
+    def test_nearest(self) -> None:
+        with mock.patch.object(wordlist, "numpy", None):
+            self.assert_nearest()
+
+
+class TestWordQueue(unittest.TestCase):
+    def test_take(self) -> None:
+        queue = WordQueue(["a", "b", "c"])
+
+        self.assertEqual(queue.take(2), ["a", "b"])
+        self.assertEqual(len(queue), 1)
+        self.assertEqual(queue.take(2), ["c"])
+        self.assertEqual(queue.take(2), [])
+
+    def test_pull(self) -> None:
+        words = ["avatar", "total", "email", "lineItems", "emails", "emailAddress"]
+        queue = WordQueue(words, SimilarityIndex(words), sent=["emailById"])
+
+        self.assertEqual(queue.take(3), ["avatar", "total", "email"])
+        queue.pull(["email"])
+        self.assertEqual(queue.take(2), ["emails", "emailAddress"])
+        self.assertEqual(queue.take(2), ["lineItems"])
+
+    def test_pull_mutations(self) -> None:
+        queue = WordQueue(["createOrder", "id", "orders"])
+
+        self.assertEqual(queue.take(1), ["createOrder"])
+        queue.pull(["createOrder"])
+        self.assertEqual(
+            queue.take(10),
+            [
+                "order",
+                "orders",
+                "getOrder",
+                "updateOrder",
+                "deleteOrder",
+                "setOrder",
+                "listOrders",
+                "create_order",
+                "id",
+            ],
+        )
+        # nothing is sent twice
+        queue.pull(["updateOrder"])
+        self.assertEqual(queue.take(10), ["update_order"])
+
+
+class TestShard(unittest.TestCase):
+    def test_parse(self) -> None:
+        shard = Shard.parse("2/3")
+        self.assertEqual((shard.index, shard.count), (2, 3))
+        self.assertEqual(repr(shard), "2/3")
+        for spec in ["0/3", "4/3", "3"]:
+            with self.assertRaises(ValueError):
+                Shard.parse(spec)
+
+    def test_words(self) -> None:
+        words = [f"name{i}" for i in range(100)]
+        shards = [Shard(i, 3).words(words) for i in range(1, 4)]
+
+        # Every word is in exactly one shard, in order
+        self.assertEqual(sorted(w for s in shards for w in s), sorted(words))
+        for s in shards:
+            self.assertTrue(s)
+            self.assertEqual(list(s), [w for w in words if w in s])
+        self.assertNotIn(1, Shard(1, 1))
+
+    def test_compiled_words(self) -> None:
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, "words.cwl")
+        words = [f"name{i}" for i in range(100)]
+        compile_wordlist(words, path)
+        compiled = CompiledWordlist(path)
+        try:
+            got = Shard(2, 3).words(compiled)
+
+            # read from the compiled wordlist as needed, rather than copied out of it
+            self.assertNotIsInstance(got, CompiledWordlist)
+            self.assertFalse(hasattr(got, "_words"))
+            want = [w for w in words if w in Shard(2, 3)]
+            self.assertEqual(list(got), want)
+            self.assertEqual(got[-1], want[-1])
+            self.assertEqual(
+                [got.position(w) for w in words],
+                [want.index(w) if w in want else None for w in words],
+            )
+        finally:
+            compiled.close()
+            shutil.rmtree(directory)
+
+
+class TestMutations(unittest.TestCase):
+    def test_pluralize(self) -> None:
+        self.assertEqual(
+            [pluralize(w) for w in ["order", "category", "address", "day"]],
+            ["orders", "categories", "addresses", "days"],
+        )
+        self.assertEqual(
+            [singularize(w) for w in ["orders", "categories", "addresses", "status"]],
+            ["order", "category", "address", "status"],
+        )
+
+    def test_mutations(self) -> None:
+        self.assertEqual(
+            mutations("orderById"), ["order", "orders", "orderByIds", "order_by_id"]
+        )
+        self.assertEqual(mutations("category"), ["categories", "categoryById"])
+        self.assertEqual(
+            mutations("get_user"),
+            [
+                "user",
+                "users",
+                "create_user",
+                "update_user",
+                "delete_user",
+                "set_user",
+                "list_users",
+                "getUser",
+            ],
+        )
+        self.assertEqual(mutations("UserIds"), ["UserId", "user_ids"])
+        self.assertEqual(mutations("__typename"), [])
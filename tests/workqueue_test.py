@@ -0,0 +1,89 @@
+import os
+import shutil
+import tempfile
+import unittest
+from typing import Any, List
+
+from clairvoyance import graphql
+from clairvoyance.workqueue import WorkQueue
+
+
+class TestWorkQueue(unittest.TestCase):
+    def setUp(self) -> None:
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, "queue.db")
+        self.queues: List[WorkQueue] = []
+
+    def tearDown(self) -> None:
+        for queue in self.queues:
+            queue.close()
+        shutil.rmtree(self.dir)
+
+    def queue(self, **kwargs: Any) -> WorkQueue:
+        queue = WorkQueue(self.path, parts=2, **kwargs)
+        self.queues.append(queue)
+        return queue
+
+    def test_lease(self) -> None:
+        one, other = self.queue(), self.queue()
+
+        units = one.lease(10)
+        self.assertEqual([repr(u) for u in units], ["start"])
+        # The scan starts once, whoever comes first
+        self.assertEqual(other.lease(10), [])
+        self.assertFalse(other.finished())
+
+        schema = graphql.Schema(query_type="Query", mutation_type="Mutation")
+        schema.add_type("Status", "ENUM")
+        one.complete(units, schema)
+
+        # Root types are brute-forced in parts, the ones of the same part together
+        units = other.lease(10)
+        self.assertEqual(
+            [repr(u) for u in units], ["fields Query 1/2", "fields Mutation 1/2"]
+        )
+        self.assertEqual(
+            [repr(u) for u in one.lease(10)],
+            ["fields Query 2/2", "fields Mutation 2/2"],
+        )
+        self.assertEqual([repr(u) for u in one.lease(10)], ["inputs Status"])
+        self.assertEqual(one.lease(10), [])
+
+    def test_complete(self) -> None:
+        queue = self.queue()
+        queue.complete(queue.lease(), graphql.Schema(query_type="Query"))
+        units = queue.lease()
+
+        schema = graphql.Schema(query_type="Query")
+        schema.types["Query"].fields.append(
+            graphql.Field("user", graphql.TypeRef("User", "OBJECT"))
+        )
+        schema.add_type("User", "OBJECT")
+        merged, conflicts = queue.complete(units, schema)
+
+        self.assertEqual(conflicts, [])
+        self.assertEqual([f.name for f in merged.types["Query"].fields], ["user"])
+        stored = queue.schema()
+        assert stored
+        self.assertIn("User", stored.types)
+        # Types found along the way become units, once
+        self.assertEqual([repr(u) for u in queue.lease(10)], ["fields Query 2/2"])
+        self.assertEqual([repr(u) for u in queue.lease(10)], ["fields User"])
+        self.assertFalse(queue.finished())
+
+    def test_expired_lease(self) -> None:
+        crashed, other = self.queue(lease_time=-1), self.queue(attempts=2)
+
+        crashed.lease()
+        # Its lease expired, so the unit is done again
+        units = other.lease()
+        self.assertEqual([repr(u) for u in units], ["start"])
+
+        # Until it failed too often
+        other.release(units)
+        self.assertEqual(other.lease(), [])
+        self.assertTrue(other.finished())
+
+
+if __name__ == "__main__":
+    unittest.main()